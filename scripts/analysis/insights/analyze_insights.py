@@ -4,130 +4,203 @@ Generate insights and visualizations from sentiment and thematic analysis result
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.cbook import boxplot_stats
 from pathlib import Path
+import argparse
 import json
-from wordcloud import WordCloud
+from wordcloud import STOPWORDS
 from collections import Counter
 import logging
 import os
 
+from scripts.analysis.sentiment_thematic.ranking import KeywordRanker, rank_keywords
+from scripts.analysis.sentiment_thematic.rollup import RollupCube, locate_rollup
+from scripts.analysis.sentiment_thematic.storage import locate_results, read_results, results_fingerprint
+from scripts.analysis.sentiment_thematic.tokenizer import DEFAULT_STOP_WORDS, Tokenizer
+from .rendering import (
+    Figure, draw_keyword_cloud, draw_rating_distribution, draw_sentiment_distribution,
+    draw_theme_distribution, render_figures
+)
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns of the cleaned reviews and of the analysis results
+REVIEW_COLUMNS = ['review', 'rating', 'date', 'bank', 'source']
+RESULT_COLUMNS = ['sentiment_label', 'sentiment_score', 'vader_score', 'textblob_score', 'themes', 'keywords']
+
+# Load dtypes; repetitive strings are categoricals and ratings small floats
+COLUMN_DTYPES = {
+    'rating': np.float32,
+    'date': 'category',
+    'bank': 'category',
+    'source': 'category',
+    'sentiment_label': 'category'
+}
+
+# Columns each figure and aggregate reads
+SENTIMENT_FIGURE_COLUMNS = ['bank', 'sentiment_label']
+RATING_FIGURE_COLUMNS = ['bank', 'rating']
+KEYWORD_FIGURE_COLUMNS = ['bank', 'review']
+ROLLUP_COLUMNS = ['bank', 'date', 'sentiment_label', 'themes', 'rating', 'sentiment_score']
+
 class InsightsAnalyzer:
-    def __init__(self):
-        """Initialize the insights analyzer."""
+    def __init__(self, base_dir=None):
+        """
+        Initialize the insights analyzer.
+        
+        No data is read here: each analysis loads only the columns it needs,
+        on first use, into one cached join of reviews and results.
+        
+        Args:
+            base_dir (str or Path, optional): Project directory holding data/,
+                the repository root by default
+        """
         # Set up paths
-        self.base_dir = Path(__file__).parent.parent.parent.parent
+        self.base_dir = Path(base_dir) if base_dir is not None else Path(__file__).parent.parent.parent.parent
         self.data_dir = self.base_dir / "data"
         self.processed_dir = self.data_dir / "processed"
         self.analysis_dir = self.data_dir / "analysis"
         self.output_dir = self.analysis_dir / "insights"
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Load data
-        self.reviews_df = pd.read_csv(self.processed_dir / "reviews_cleaned.csv")
-        self.sentiment_df = pd.read_csv(
-            self.analysis_dir / "sentiment_thematic" / "sentiment_thematic_results.csv"
-        )
-        
-        # Merge data
-        self.merged_df = pd.merge(
-            self.reviews_df,
-            self.sentiment_df[['review_id', 'sentiment_label', 'sentiment_score', 
-                             'vader_score', 'textblob_score', 'themes', 'keywords']],
-            left_index=True,
-            right_on='review_id',
-            how='left'
-        )
-        
-        # Set up plotting style
-        plt.style.use('seaborn')
-        sns.set_palette("husl")
+        # Loaded columns of the join and the aggregates built from them
+        self._data = None
+        self._rollup = None
 
-    def analyze_sentiment_distribution(self):
-        """Analyze and visualize sentiment distribution by bank."""
-        plt.figure(figsize=(12, 6))
+    def load(self, columns):
+        """
+        Load columns of the reviews joined with their results, reading each column once.
         
-        # Create sentiment distribution plot
-        sentiment_counts = self.merged_df.groupby(['bank', 'sentiment_label']).size().unstack()
-        sentiment_counts.plot(kind='bar', stacked=True)
+        The join keeps every cleaned review, in file order, with the first
+        result of the same review_id; reviews without results get missing
+        values. Columns are read on first request only and then cached, so
+        all analyses share one copy of each column.
         
-        plt.title('Sentiment Distribution by Bank')
-        plt.xlabel('Bank')
-        plt.ylabel('Number of Reviews')
-        plt.legend(title='Sentiment')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        Args:
+            columns (list): Columns needed, from REVIEW_COLUMNS and RESULT_COLUMNS
+            
+        Returns:
+            pd.DataFrame: The requested columns
+        """
+        loaded = [] if self._data is None else list(self._data.columns)
+        missing = [column for column in columns if column not in loaded]
+        unknown = set(missing) - set(REVIEW_COLUMNS) - set(RESULT_COLUMNS)
+        if unknown:
+            raise KeyError(f"Unknown columns: {sorted(unknown)}")
         
-        # Save plot
-        plt.savefig(self.output_dir / 'sentiment_distribution.png')
-        plt.close()
-
-    def analyze_rating_distribution(self):
-        """Analyze and visualize rating distribution by bank."""
-        plt.figure(figsize=(12, 6))
+        review_columns = [column for column in REVIEW_COLUMNS if column in missing]
+        if self._data is None and 'bank' not in review_columns:
+            # The reviews define the rows of the join
+            review_columns.append('bank')
+        if review_columns:
+            reviews_df = pd.read_csv(
+                self.processed_dir / "reviews_cleaned.csv", usecols=review_columns,
+                dtype={column: COLUMN_DTYPES[column] for column in review_columns if column in COLUMN_DTYPES}
+            )
+            if self._data is None:
+                self._data = pd.DataFrame(index=reviews_df.index)
+            for column in review_columns:
+                self._data[column] = reviews_df[column]
         
-        # Create rating distribution plot
-        sns.boxplot(data=self.merged_df, x='bank', y='rating')
+        result_columns = [column for column in RESULT_COLUMNS if column in missing]
+        if result_columns:
+            results_df = read_results(
+                locate_results(self.analysis_dir / "sentiment_thematic"),
+                columns=['review_id'] + result_columns,
+                dtype={column: COLUMN_DTYPES[column] for column in result_columns if column in COLUMN_DTYPES}
+            )
+            results_df = results_df.drop_duplicates('review_id').set_index('review_id')
+            results_df = results_df.reindex(self._data.index)
+            for column in result_columns:
+                self._data[column] = results_df[column]
         
-        plt.title('Rating Distribution by Bank')
-        plt.xlabel('Bank')
-        plt.ylabel('Rating')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        logger.debug(f"Loaded columns {missing}")
+        return self._data[list(columns)]
+
+    @property
+    def merged_df(self):
+        """All columns of the reviews joined with their results."""
+        return self.load(REVIEW_COLUMNS + RESULT_COLUMNS)
+
+    @property
+    def rollup(self):
+        """
+        Rollup cube of the results; theme counts and insights are read from it.
         
-        # Save plot
-        plt.savefig(self.output_dir / 'rating_distribution.png')
-        plt.close()
+        The rollup saved by the sentiment_thematic run is read when it was
+        built from the current results file, as told by the results
+        fingerprint stored in it, so its cost does not grow with the number
+        of reviews; otherwise the cube is built from the joined rows.
+        """
+        if self._rollup is None:
+            results_dir = self.analysis_dir / "sentiment_thematic"
+            rollup_path = locate_rollup(results_dir)
+            rollup = RollupCube.load(rollup_path) if rollup_path.exists() else None
+            if rollup is not None and \
+                    rollup.results_fingerprint == results_fingerprint(locate_results(results_dir)):
+                logger.info(f"Reading rollup from {rollup_path}")
+                self._rollup = rollup
+            else:
+                self._rollup = RollupCube.from_results(self.load(ROLLUP_COLUMNS))
+        return self._rollup
 
-    def generate_keyword_cloud(self):
-        """Generate and save keyword cloud for each bank."""
-        for bank in self.merged_df['bank'].unique():
-            # Get keywords for the bank
-            bank_keywords = self.merged_df[self.merged_df['bank'] == bank]['keywords']
-            all_keywords = ' '.join([str(kw) for kw in bank_keywords if isinstance(kw, str)])
-            
-            # Generate word cloud
-            wordcloud = WordCloud(
-                width=800,
-                height=400,
-                background_color='white',
-                max_words=100
-            ).generate(all_keywords)
-            
-            # Create and save plot
-            plt.figure(figsize=(10, 5))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            plt.title(f'Keyword Cloud - {bank}')
-            plt.tight_layout()
+    def render(self, figures, workers=1, force=False):
+        """
+        Render figures into the output directory, skipping unchanged figures.
+        
+        Args:
+            figures (list): Figures to render
+            workers (int, optional): Number of worker processes, None for one per CPU
+            force (bool): Render figures even if their content is unchanged
             
-            # Save plot
-            plt.savefig(self.output_dir / f'keyword_cloud_{bank.lower().replace(" ", "_")}.png')
-            plt.close()
+        Returns:
+            dict: Seconds spent on every figure, None for skipped figures
+        """
+        return render_figures(figures, self.output_dir, workers, force)
 
-    def analyze_themes(self):
-        """Analyze theme distribution and generate insights."""
-        # Convert themes string to list
-        self.merged_df['themes_list'] = self.merged_df['themes'].apply(
-            lambda x: x.split('|') if isinstance(x, str) else []
+    def sentiment_figure(self):
+        """Figure of the review counts per bank and sentiment label."""
+        sentiment_df = self.load(SENTIMENT_FIGURE_COLUMNS)
+        sentiment_counts = sentiment_df.groupby(['bank', 'sentiment_label'], observed=True).size().unstack()
+        return Figure('sentiment_distribution', draw_sentiment_distribution, sentiment_counts)
+
+    def rating_figure(self):
+        """Figure of the rating boxplot statistics per bank."""
+        rating_df = self.load(RATING_FIGURE_COLUMNS)
+        stats = [
+            boxplot_stats(ratings.dropna().to_numpy(dtype=np.float64), labels=[bank])[0]
+            for bank, ratings in rating_df.groupby('bank', sort=False, observed=True)['rating']
+        ]
+        return Figure('rating_distribution', draw_rating_distribution, stats)
+
+    def keyword_cloud_figures(self):
+        """Figures of the keyword weights of every bank."""
+        # Weight words by TF-IDF instead of raw counts, so words common to all
+        # reviews count less; WordCloud's own stop words still apply
+        ranker = KeywordRanker(Tokenizer(DEFAULT_STOP_WORDS | STOPWORDS))
+        bank_keywords = rank_keywords(
+            self.load(KEYWORD_FIGURE_COLUMNS).dropna(subset=['bank']), top=100, ranker=ranker, text_column='review'
         )
+        return [
+            Figure(
+                f'keyword_cloud_{bank.lower().replace(" ", "_")}', draw_keyword_cloud,
+                {'bank': bank, 'frequencies': dict(keywords)}
+            )
+            for bank, keywords in bank_keywords.items() if keywords
+        ]
+
+    def theme_figure(self, theme_counts):
+        """
+        Figure of the theme counts per bank.
         
-        # Count themes by bank
-        theme_counts = {}
-        for bank in self.merged_df['bank'].unique():
-            bank_themes = self.merged_df[self.merged_df['bank'] == bank]['themes_list']
-            all_themes = [theme for themes in bank_themes for theme in themes]
-            theme_counts[bank] = Counter(all_themes)
-        
-        # Create theme distribution plot
-        plt.figure(figsize=(12, 6))
-        
-        # Prepare data for plotting
+        Args:
+            theme_counts (dict): Bank -> theme -> count, as RollupCube.theme_counts
+            
+        Returns:
+            Figure: The theme distribution figure
+        """
         theme_data = []
         for bank, counts in theme_counts.items():
             for theme, count in counts.items():
@@ -138,53 +211,37 @@ class InsightsAnalyzer:
                 })
         
         theme_df = pd.DataFrame(theme_data)
-        
-        # Create plot
-        sns.barplot(data=theme_df, x='Theme', y='Count', hue='Bank')
-        
-        plt.title('Theme Distribution by Bank')
-        plt.xlabel('Theme')
-        plt.ylabel('Count')
-        plt.xticks(rotation=45)
-        plt.legend(title='Bank')
-        plt.tight_layout()
-        
-        # Save plot
-        plt.savefig(self.output_dir / 'theme_distribution.png')
-        plt.close()
+        return Figure('theme_distribution', draw_theme_distribution, theme_df)
+
+    def analyze_sentiment_distribution(self):
+        """Analyze and visualize sentiment distribution by bank."""
+        self.render([self.sentiment_figure()])
+
+    def analyze_rating_distribution(self):
+        """Analyze and visualize rating distribution by bank."""
+        self.render([self.rating_figure()])
+
+    def generate_keyword_cloud(self):
+        """Generate and save keyword cloud for each bank."""
+        self.render(self.keyword_cloud_figures())
+
+    def analyze_themes(self):
+        """Analyze theme distribution and generate insights."""
+        # Count themes by bank
+        theme_counts = self.rollup.theme_counts()
+        self.render([self.theme_figure(theme_counts)])
         
         return theme_counts
 
     def generate_insights(self):
         """Generate insights and recommendations."""
+        # Top positive and negative themes by bank
         insights = {
-            'drivers': {},
-            'pain_points': {},
+            'drivers': self.rollup.top_themes('POSITIVE', 2),
+            'pain_points': self.rollup.top_themes('NEGATIVE', 2),
             'recommendations': []
         }
         
-        # Analyze sentiment and themes by bank
-        for bank in self.merged_df['bank'].unique():
-            bank_data = self.merged_df[self.merged_df['bank'] == bank]
-            
-            # Get top positive themes
-            positive_reviews = bank_data[bank_data['sentiment_label'] == 'POSITIVE']
-            positive_themes = Counter([
-                theme for themes in positive_reviews['themes_list']
-                for theme in themes
-            ])
-            
-            # Get top negative themes
-            negative_reviews = bank_data[bank_data['sentiment_label'] == 'NEGATIVE']
-            negative_themes = Counter([
-                theme for themes in negative_reviews['themes_list']
-                for theme in themes
-            ])
-            
-            # Store insights
-            insights['drivers'][bank] = dict(positive_themes.most_common(2))
-            insights['pain_points'][bank] = dict(negative_themes.most_common(2))
-        
         # Generate recommendations based on insights
         all_pain_points = Counter()
         for pain_points in insights['pain_points'].values():
@@ -207,13 +264,25 @@ class InsightsAnalyzer:
         
         return insights
 
-    def generate_report(self):
-        """Generate the final analysis report."""
+    def generate_report(self, workers=None, force=False):
+        """
+        Generate the final analysis report.
+        
+        Figures are built from aggregates first and then rendered together,
+        in parallel, skipping figures whose aggregates have not changed.
+        
+        Args:
+            workers (int, optional): Number of rendering processes, None for one per CPU
+            force (bool): Render figures even if their content is unchanged
+            
+        Returns:
+            dict: Seconds spent rendering every figure, None for skipped figures
+        """
         # Create visualizations
-        self.analyze_sentiment_distribution()
-        self.analyze_rating_distribution()
-        self.generate_keyword_cloud()
-        theme_counts = self.analyze_themes()
+        figures = [self.sentiment_figure(), self.rating_figure()]
+        figures.extend(self.keyword_cloud_figures())
+        figures.append(self.theme_figure(self.rollup.theme_counts()))
+        timings = self.render(figures, workers, force)
         
         # Generate insights
         insights = self.generate_insights()
@@ -224,11 +293,19 @@ class InsightsAnalyzer:
         
         logger.info("Analysis completed successfully!")
         logger.info(f"Results saved to {self.output_dir}")
+        return timings
 
 def main():
     """Run the insights analysis."""
+    parser = argparse.ArgumentParser(description="Generate insights and visualizations")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of processes rendering figures (default: one per CPU)")
+    parser.add_argument('--force', action='store_true',
+                        help="Render every figure even if its data has not changed")
+    args = parser.parse_args()
+    
     analyzer = InsightsAnalyzer()
-    analyzer.generate_report()
+    analyzer.generate_report(workers=args.workers, force=args.force)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
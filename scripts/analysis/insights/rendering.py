@@ -0,0 +1,216 @@
+"""
+Headless, parallel rendering of the insights figures.
+
+Every figure is a Figure: a name, a module-level draw function and the small
+precomputed aggregates it draws, so figures never read the review frames or
+share pyplot state. Figures are drawn on the non-interactive Agg backend,
+independent figures in a pool of worker processes. A figure is skipped when
+the content hash of its draw function and aggregates matches the last render
+recorded in the output directory's manifest.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import logging
+import os
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+logger = logging.getLogger(__name__)
+
+# Bump to re-render every figure after changing how figures are drawn
+RENDER_VERSION = '1'
+
+# File recording the content hash of every rendered figure
+MANIFEST_NAME = 'render_manifest.json'
+
+# matplotlib 3.6 renamed the seaborn styles
+STYLE = 'seaborn-v0_8' if 'seaborn-v0_8' in plt.style.available else 'seaborn'
+PALETTE = 'husl'
+
+Figure = namedtuple('Figure', ['name', 'draw', 'data'])
+
+def _canonical(value):
+    """
+    Convert figure aggregates to JSON-serializable values that are equal for equal content.
+    
+    Frames and Series become their labels and dtypes plus a digest of
+    pd.util.hash_pandas_object; arrays and numpy scalars become lists and
+    Python numbers. Dict keys are sorted when the result is serialized.
+    
+    Args:
+        value: Aggregates of a figure
+    
+    Returns:
+        JSON-serializable equivalent of value
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        rows = pd.util.hash_pandas_object(frame, index=True).to_numpy()
+        return {
+            'columns': [str(column) for column in frame.columns],
+            'index': [str(name) for name in frame.index.names],
+            'dtypes': [str(dtype) for dtype in frame.dtypes],
+            'rows': hashlib.blake2b(rows.tobytes(), digest_size=16).hexdigest()
+        }
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise TypeError(f"Cannot hash figure data of type {type(value).__name__}")
+
+def content_hash(figure):
+    """
+    Hash everything a figure's image depends on.
+    
+    The aggregates are hashed through a canonical, key-sorted JSON form
+    rather than a pickle, whose bytes can differ for equal data.
+    
+    Args:
+        figure (Figure): Figure to hash
+    
+    Returns:
+        str: Hex digest of the render version, draw function and aggregates
+    """
+    content = json.dumps(
+        [RENDER_VERSION, figure.draw.__module__, figure.draw.__qualname__, _canonical(figure.data)],
+        sort_keys=True
+    )
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+def figure_path(output_dir, name):
+    """Path of the PNG file of a figure."""
+    return output_dir / f'{name}.png'
+
+def draw_sentiment_distribution(counts, path):
+    """Stacked bars of review counts per bank and sentiment label."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    counts.plot(kind='bar', stacked=True, ax=ax)
+    ax.set_title('Sentiment Distribution by Bank')
+    ax.set_xlabel('Bank')
+    ax.set_ylabel('Number of Reviews')
+    ax.legend(title='Sentiment')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def draw_rating_distribution(stats, path):
+    """Boxplots of ratings per bank from precomputed boxplot statistics."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    boxes = ax.bxp(stats, patch_artist=True)
+    for box, color in zip(boxes['boxes'], sns.color_palette(n_colors=len(stats))):
+        box.set_facecolor(color)
+    ax.set_title('Rating Distribution by Bank')
+    ax.set_xlabel('Bank')
+    ax.set_ylabel('Rating')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def draw_theme_distribution(theme_df, path):
+    """Grouped bars of theme counts per bank."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(data=theme_df, x='Theme', y='Count', hue='Bank', ax=ax)
+    ax.set_title('Theme Distribution by Bank')
+    ax.set_xlabel('Theme')
+    ax.set_ylabel('Count')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.legend(title='Bank')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def draw_keyword_cloud(data, path):
+    """Word cloud of one bank's keyword weights."""
+    from wordcloud import WordCloud
+    wordcloud = WordCloud(
+        width=800,
+        height=400,
+        background_color='white',
+        max_words=100
+    ).generate_from_frequencies(data['frequencies'])
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title(f"Keyword Cloud - {data['bank']}")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def render_figure(figure, path):
+    """
+    Draw one figure to a file in the insights style.
+    
+    Args:
+        figure (Figure): Figure to draw
+        path (Path): PNG file to write
+    
+    Returns:
+        float: Seconds spent drawing
+    """
+    start = time.perf_counter()
+    with plt.style.context(STYLE), sns.color_palette(PALETTE):
+        figure.draw(figure.data, path)
+    return time.perf_counter() - start
+
+def _render_task(task):
+    """Worker entry point: render one (figure, path) pair."""
+    figure, path = task
+    return render_figure(figure, path)
+
+def render_figures(figures, output_dir, workers=None, force=False):
+    """
+    Render figures into output_dir, skipping figures whose content is unchanged.
+    
+    Args:
+        figures (list): Figures to render
+        output_dir (Path): Directory receiving the PNG files and the manifest
+        workers (int, optional): Number of worker processes, defaults to the
+            number of CPUs; 1 renders in-process
+        force (bool): Render every figure even if its content is unchanged
+    
+    Returns:
+        dict: Seconds spent on every figure, None for skipped figures
+    """
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    hashes = {figure.name: content_hash(figure) for figure in figures}
+    todo = [
+        figure for figure in figures
+        if force or manifest.get(figure.name) != hashes[figure.name]
+        or not figure_path(output_dir, figure.name).exists()
+    ]
+    timings = {figure.name: None for figure in figures}
+
+    tasks = [(figure, figure_path(output_dir, figure.name)) for figure in todo]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            seconds = list(executor.map(_render_task, tasks))
+    else:
+        seconds = [_render_task(task) for task in tasks]
+
+    for figure, elapsed in zip(todo, seconds):
+        timings[figure.name] = elapsed
+        manifest[figure.name] = hashes[figure.name]
+    manifest_path.write_text(json.dumps(manifest, indent=4, sort_keys=True))
+
+    for name, elapsed in timings.items():
+        logger.info(f"{name}: " + ("unchanged, skipped" if elapsed is None else f"{elapsed:.2f}s"))
+    return timings
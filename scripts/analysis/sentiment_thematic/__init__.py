@@ -3,8 +3,9 @@ Sentiment and Thematic Analysis module for fintech reviews.
 """
 
 from .analyzer import SentimentThematicAnalyzer
+from .cache import AnalysisCache
 
-__all__ = ['SentimentThematicAnalyzer']
+__all__ = ['SentimentThematicAnalyzer', 'AnalysisCache']
 
 """
 Package initialization for sentiment_thematic analysis module.
@@ -4,37 +4,101 @@ Sentiment and Thematic Analysis implementation for fintech reviews.
 
 import pandas as pd
 import numpy as np
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from collections import defaultdict
 import json
 from pathlib import Path
+import hashlib
 import logging
-import re
+
+from .matcher import ThemeMatcher
+from .parallel import score_in_parallel
+from .ranking import KeywordRanker
+from .sentiment import DEFAULT_SENTIMENT_BACKEND, UNSCORED_LABEL, create_sentiment_backend
+from .storage import read_results, write_results
+from .summary import summarize
+from .tokenizer import DEFAULT_STOP_WORDS, KeywordArray, Tokenizer, Vocabulary, tokenize
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Version of the scoring logic; bump it to invalidate cached results
+ANALYZER_VERSION = '1.1'
+
+# Number of reviews scored per batch by process_reviews
+DEFAULT_BATCH_SIZE = 10000
+
+# Theme categories and their keywords
+THEME_KEYWORDS = {
+    'Account Access Issues': ['login', 'password', 'access', 'account', 'security', 'verify', 'authentication'],
+    'Transaction Performance': ['transfer', 'transaction', 'payment', 'money', 'send', 'receive', 'deposit', 'withdraw'],
+    'User Interface & Experience': ['interface', 'ui', 'ux', 'design', 'app', 'screen', 'button', 'layout', 'navigation'],
+    'Customer Support': ['support', 'help', 'service', 'contact', 'response', 'assist', 'customer service'],
+    'Feature Requests': ['feature', 'function', 'option', 'ability', 'should', 'could', 'would like', 'wish']
+}
+
+# Sentiment result columns, in the order they are stored in cache records
+SENTIMENT_FIELDS = ('sentiment_label', 'sentiment_score', 'vader_score', 'textblob_score')
+
+# Languages of the optional language column the English sentiment analyzers
+# can score; "und" reviews are emoji or numbers, which VADER still reads
+SCORED_LANGUAGES = frozenset({'en', 'und'})
+
+# Optional preprocessing columns copied from the reviews to the results
+PASSTHROUGH_COLUMNS = ('language', 'cluster_id', 'cluster_size')
+
 class SentimentThematicAnalyzer:
-    def __init__(self):
-        """Initialize the sentiment and thematic analyzer."""
-        # Initialize sentiment analyzers
-        self.vader = SentimentIntensityAnalyzer()
+    def __init__(self, theme_keywords=None, cache=None, stop_words=None, sentiment=DEFAULT_SENTIMENT_BACKEND):
+        """
+        Initialize the sentiment and thematic analyzer.
+        
+        Args:
+            theme_keywords (dict, optional): Mapping of theme name to keywords,
+                defaults to THEME_KEYWORDS
+            cache (AnalysisCache, optional): Cache of per-text results used
+                by process_reviews
+            stop_words (iterable, optional): Words dropped from keywords,
+                defaults to DEFAULT_STOP_WORDS
+            sentiment (str): Name of the sentiment backend, one of
+                SENTIMENT_BACKENDS
+        """
+        # Initialize the sentiment backend
+        self.sentiment = sentiment
+        self.sentiment_backend = create_sentiment_backend(sentiment)
         
         # Define theme categories and their keywords
-        self.theme_keywords = {
-            'Account Access Issues': ['login', 'password', 'access', 'account', 'security', 'verify', 'authentication'],
-            'Transaction Performance': ['transfer', 'transaction', 'payment', 'money', 'send', 'receive', 'deposit', 'withdraw'],
-            'User Interface & Experience': ['interface', 'ui', 'ux', 'design', 'app', 'screen', 'button', 'layout', 'navigation'],
-            'Customer Support': ['support', 'help', 'service', 'contact', 'response', 'assist', 'customer service'],
-            'Feature Requests': ['feature', 'function', 'option', 'ability', 'should', 'could', 'would like', 'wish']
-        }
+        self.theme_keywords = dict(THEME_KEYWORDS if theme_keywords is None else theme_keywords)
+        
+        # Compile the theme matcher once for all reviews
+        self.theme_matcher = ThemeMatcher(self.theme_keywords)
+        
+        # Keyword tokenizer and the vocabulary keywords are interned in
+        self.stop_words = frozenset(DEFAULT_STOP_WORDS if stop_words is None else stop_words)
+        self.tokenizer = Tokenizer(self.stop_words)
+        self.vocabulary = Vocabulary()
+        
+        # Drop cached results computed with another version or theme set
+        self.cache = cache
+        if self.cache is not None:
+            self.cache.bind(self.fingerprint())
+
+    def fingerprint(self):
+        """
+        Fingerprint the analyzer version, themes, stop words and sentiment backend.
+        
+        Returns:
+            str: Hex digest that changes whenever cached results become stale
+        """
+        config = json.dumps({
+            'version': ANALYZER_VERSION,
+            'themes': self.theme_keywords,
+            'stop_words': sorted(self.stop_words),
+            'sentiment': self.sentiment
+        }, sort_keys=True)
+        return hashlib.blake2b(config.encode('utf-8'), digest_size=16).hexdigest()
 
     def analyze_sentiment(self, text):
         """
-        Analyze sentiment of a given text using VADER and TextBlob.
+        Analyze sentiment of a given text with the sentiment backend.
         
         Args:
             text (str): The text to analyze
@@ -42,38 +106,32 @@ class SentimentThematicAnalyzer:
         Returns:
             dict: Dictionary containing sentiment label and score
         """
-        try:
-            # VADER sentiment analysis
-            vader_scores = self.vader.polarity_scores(text)
-            
-            # TextBlob sentiment analysis
-            blob = TextBlob(text)
-            textblob_score = blob.sentiment.polarity
-            
-            # Combine scores (weighted average)
-            combined_score = (vader_scores['compound'] + textblob_score) / 2
-            
-            # Determine label
-            if combined_score >= 0.05:
-                label = 'POSITIVE'
-            elif combined_score <= -0.05:
-                label = 'NEGATIVE'
-            else:
-                label = 'NEUTRAL'
+        label, score, vader_score, textblob_score = self._score_sentiment(text)
+        return {
+            'label': label,
+            'score': score,
+            'vader_score': vader_score,
+            'textblob_score': textblob_score
+        }
+
+    def _score_sentiment(self, text):
+        """
+        Score a single text and return the sentiment fields as a tuple.
+        
+        Args:
+            text (str): The text to analyze
             
-            return {
-                'label': label,
-                'score': abs(combined_score),  # Use absolute value for confidence
-                'vader_score': vader_scores['compound'],
-                'textblob_score': textblob_score
-            }
-        except Exception as e:
-            logger.error(f"Error in sentiment analysis: {str(e)}")
-            return {'label': 'ERROR', 'score': 0.0, 'vader_score': 0.0, 'textblob_score': 0.0}
+        Returns:
+            tuple: (label, score, vader_score, textblob_score)
+        """
+        return self.sentiment_backend.score(text)
 
     def extract_keywords(self, text):
         """
-        Extract keywords from text using simple regex and word frequency.
+        Extract keywords from the words of a text.
+        
+        Keywords are interned in the analyzer's vocabulary, so repeated
+        words across reviews share one string object.
         
         Args:
             text (str): The text to extract keywords from
@@ -81,16 +139,28 @@ class SentimentThematicAnalyzer:
         Returns:
             list: List of extracted keywords
         """
-        # Convert to lowercase and remove special characters
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', ' ', text)
+        return self.vocabulary.intern(self.tokenizer.keywords(text))
+
+    def keyword_array(self, texts):
+        """
+        Extract the keywords of many texts as vocabulary ids in CSR layout.
         
-        # Split into words and remove common words
-        words = text.split()
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'as'}
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
+        Args:
+            texts (iterable): Texts to extract keywords from
+            
+        Returns:
+            KeywordArray: Keywords of every text, decodable with to_lists()
+        """
+        return KeywordArray.from_texts(texts, self.tokenizer, self.vocabulary)
+
+    def keyword_ranker(self):
+        """
+        Create a TF-IDF keyword ranker that shares this analyzer's tokenizer.
         
-        return keywords
+        Returns:
+            KeywordRanker: Unfitted ranker; fit or partial_fit it on review texts
+        """
+        return KeywordRanker(self.tokenizer)
 
     def identify_themes(self, text):
         """
@@ -102,92 +172,255 @@ class SentimentThematicAnalyzer:
         Returns:
             list: List of identified themes
         """
-        # Convert text to lowercase for matching
-        text = text.lower()
-        
-        theme_scores = defaultdict(int)
-        for theme, keywords in self.theme_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    theme_scores[theme] += 1
+        return self.theme_matcher.match(text)
+
+    def count_themes(self, text):
+        """
+        Count keyword hits per theme in text.
         
-        # Return themes with scores above threshold
-        return [theme for theme, score in theme_scores.items() if score > 0]
+        Args:
+            text (str): The text to identify themes in
+            
+        Returns:
+            dict: Mapping of identified theme to number of keyword hits
+        """
+        return self.theme_matcher.count(text)
 
-    def process_reviews(self, reviews_df):
+    def process_reviews(self, reviews_df, batch_size=DEFAULT_BATCH_SIZE, workers=1):
         """
         Process all reviews and return analysis results.
         
+        Reviews are scored in batches over the column arrays of the input
+        frame, and each batch is written straight into preallocated result
+        columns instead of building one dict per row. With workers > 1 the
+        batches are scored in a pool of worker processes and put back
+        together in input order.
+        
+        When reviews_df has a language column (see
+        scripts.preprocessing.language), reviews in other languages than
+        SCORED_LANGUAGES skip sentiment scoring: they are labeled UNSCORED
+        with NaN scores and still get keywords and themes. The language,
+        cluster_id and cluster_size columns of preprocessing are passed on
+        to the results when present.
+        
         Args:
             reviews_df (pd.DataFrame): DataFrame containing reviews
-            
+            batch_size (int): Number of reviews scored per batch
+            workers (int): Number of worker processes, 1 to score in-process
+        
         Returns:
             pd.DataFrame: DataFrame containing analysis results
         """
-        results = []
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
         
-        for _, row in reviews_df.iterrows():
-            review_text = row['review']
-            
-            # Analyze sentiment
-            sentiment_result = self.analyze_sentiment(review_text)
-            
-            # Extract keywords
-            keywords = self.extract_keywords(review_text)
+        texts = reviews_df['review'].to_numpy(dtype=object)
+        
+        scored = None
+        if 'language' in reviews_df.columns:
+            languages = reviews_df['language'].to_numpy(dtype=object)
+            scored = pd.isna(languages) | np.isin(languages, list(SCORED_LANGUAGES))
+        
+        if scored is None or scored.all():
+            columns = self._analyze(texts, batch_size, workers)
+        else:
+            columns = self._allocate_result_columns(len(texts))
+            for name, values in self._analyze(texts[scored], batch_size, workers).items():
+                columns[name][scored] = values
+            self._process_unscored(texts, columns, np.flatnonzero(~scored))
+        
+        results = {
+            'review_id': reviews_df.index.to_numpy(),
+            'bank': reviews_df['bank'].to_numpy(),
+            'rating': reviews_df['rating'].to_numpy(),
+            'review_text': texts,
+            'date': reviews_df['date'].to_numpy(),
+            'source': reviews_df['source'].to_numpy()
+        }
+        for name in PASSTHROUGH_COLUMNS:
+            if name in reviews_df.columns:
+                results[name] = reviews_df[name].to_numpy()
+        return pd.DataFrame({**results, **columns})
+
+    def _analyze(self, texts, batch_size, workers):
+        """
+        Analyze texts, through the cache when there is one.
+        
+        Args:
+            texts (np.ndarray): Review texts to analyze
+            batch_size (int): Number of reviews scored per batch
+            workers (int): Number of worker processes
             
-            # Identify themes
-            themes = self.identify_themes(review_text)
+        Returns:
+            dict: Result columns from _allocate_result_columns, filled in
+        """
+        columns = self._allocate_result_columns(len(texts))
+        if self.cache is not None:
+            self._process_cached(texts, columns, batch_size, workers)
+        else:
+            self._process_texts(texts, columns, batch_size, workers)
+        return columns
+
+    def _process_unscored(self, texts, columns, positions):
+        """
+        Fill the result columns of reviews that skip sentiment scoring.
+        
+        Args:
+            texts (np.ndarray): Review texts of all reviews
+            columns (dict): Result columns from _allocate_result_columns
+            positions (np.ndarray): Positions of the unscored reviews
+        """
+        columns['sentiment_label'][positions] = UNSCORED_LABEL
+        for name in ('sentiment_score', 'vader_score', 'textblob_score'):
+            columns[name][positions] = np.nan
+        keywords, themes = columns['keywords'], columns['themes']
+        for i in positions:
+            tokens = tokenize(texts[i])
+            keywords[i] = self.vocabulary.intern(self.tokenizer.select_keywords(tokens))
+            themes[i] = self.theme_matcher.match_tokens(tokens)
+
+    def _process_texts(self, texts, columns, batch_size, workers):
+        """
+        Analyze texts into the preallocated result columns.
+        
+        Args:
+            texts (np.ndarray): Review texts to analyze
+            columns (dict): Result columns from _allocate_result_columns
+            batch_size (int): Number of reviews scored per batch
+            workers (int): Number of worker processes
+        """
+        if workers > 1:
+            score_in_parallel(self, texts, columns, batch_size, workers)
+        else:
+            for start in range(0, len(texts), batch_size):
+                stop = min(start + batch_size, len(texts))
+                self._process_batch(texts[start:stop], columns, start)
+
+    def _process_cached(self, texts, columns, batch_size, workers):
+        """
+        Analyze texts through the cache, scoring each distinct uncached text once.
+        
+        Args:
+            texts (np.ndarray): Review texts to analyze
+            columns (dict): Result columns from _allocate_result_columns
+            batch_size (int): Number of reviews scored per batch
+            workers (int): Number of worker processes
+        """
+        keys = [self.cache.key(text) for text in texts]
+        
+        # First occurrence of every distinct key
+        first = {}
+        for i, key in enumerate(keys):
+            first.setdefault(key, i)
+        records = {key: self.cache.get(key) for key in first}
+        
+        missing = [key for key, record in records.items() if record is None]
+        if missing:
+            missing_texts = texts[[first[key] for key in missing]]
+            missing_columns = self._allocate_result_columns(len(missing))
+            self._process_texts(missing_texts, missing_columns, batch_size, workers)
+            for j, key in enumerate(missing):
+                record = tuple(missing_columns[name][j] for name in SENTIMENT_FIELDS) + (
+                    tuple(missing_columns['keywords'][j]),
+                    tuple(missing_columns['themes'][j])
+                )
+                records[key] = record
+                self.cache.put(key, record)
+            self.cache.flush()
+        
+        for i, key in enumerate(keys):
+            record = records[key]
+            for name, value in zip(SENTIMENT_FIELDS, record):
+                columns[name][i] = value
+            columns['keywords'][i] = list(record[4])
+            columns['themes'][i] = list(record[5])
+
+    def _allocate_result_columns(self, n):
+        """
+        Preallocate the analysis result columns for n reviews.
+        
+        Args:
+            n (int): Number of reviews
             
-            results.append({
-                'review_id': row.name,
-                'bank': row['bank'],
-                'rating': row['rating'],
-                'review_text': review_text,
-                'date': row['date'],
-                'source': row['source'],
-                'sentiment_label': sentiment_result['label'],
-                'sentiment_score': sentiment_result['score'],
-                'vader_score': sentiment_result['vader_score'],
-                'textblob_score': sentiment_result['textblob_score'],
-                'keywords': keywords,
-                'themes': themes
-            })
-        
-        return pd.DataFrame(results)
+        Returns:
+            dict: Mapping of column name to an empty numpy array
+        """
+        return {
+            'sentiment_label': np.empty(n, dtype=object),
+            'sentiment_score': np.empty(n, dtype=np.float64),
+            'vader_score': np.empty(n, dtype=np.float64),
+            'textblob_score': np.empty(n, dtype=np.float64),
+            'keywords': np.empty(n, dtype=object),
+            'themes': np.empty(n, dtype=object)
+        }
+
+    def _process_batch(self, texts, columns, offset):
+        """
+        Analyze a batch of review texts into the preallocated result columns.
+        
+        Args:
+            texts (np.ndarray): Review texts of the batch
+            columns (dict): Result columns from _allocate_result_columns
+            offset (int): Position of the first text of the batch in the columns
+        """
+        stop = offset + len(texts)
+        
+        # Each text is lowercased and split once for keywords, themes and
+        # word-based sentiment backends
+        records = [tokenize(text) for text in texts]
+        
+        labels, scores, vader_scores, textblob_scores = self.sentiment_backend.score_batch(texts, records)
+        columns['sentiment_label'][offset:stop] = labels
+        columns['sentiment_score'][offset:stop] = scores
+        columns['vader_score'][offset:stop] = vader_scores
+        columns['textblob_score'][offset:stop] = textblob_scores
+        
+        # Lists are assigned one by one so numpy keeps them as list objects
+        keywords, themes = columns['keywords'], columns['themes']
+        intern, select_keywords = self.vocabulary.intern, self.tokenizer.select_keywords
+        match_tokens = self.theme_matcher.match_tokens
+        for i, tokens in enumerate(records, offset):
+            keywords[i] = intern(select_keywords(tokens))
+            themes[i] = match_tokens(tokens)
 
     def save_results(self, results_df, output_path):
         """
-        Save analysis results to CSV.
+        Save analysis results to CSV, or to Parquet for a .parquet path.
         
         Args:
             results_df (pd.DataFrame): DataFrame containing results
             output_path (str or Path): Path to save results
         """
-        results_df.to_csv(output_path, index=False)
+        write_results(results_df, output_path)
         logger.info(f"Results saved to {output_path}")
 
+    def load_results(self, input_path, columns=None):
+        """
+        Load results written by save_results.
+        
+        Args:
+            input_path (str or Path): Path of the saved results
+            columns (list, optional): Columns to load, all columns by default
+            
+        Returns:
+            pd.DataFrame: DataFrame containing results, with keywords and
+                themes restored to lists
+        """
+        return read_results(input_path, columns=columns)
+
     def generate_summary(self, results_df):
         """
         Generate summary statistics from results.
         
+        All statistics are computed in one grouped pass and results_df is
+        left unchanged.
+        
         Args:
             results_df (pd.DataFrame): DataFrame containing results
             
         Returns:
             dict: Dictionary containing summary statistics
         """
-        # Convert themes list to string for proper grouping
-        results_df['themes_str'] = results_df['themes'].apply(lambda x: '|'.join(x) if x else 'No Theme')
-        
-        # Calculate theme distribution by bank
-        themes_by_bank = {}
-        for bank in results_df['bank'].unique():
-            bank_themes = results_df[results_df['bank'] == bank]['themes_str'].value_counts().to_dict()
-            themes_by_bank[bank] = bank_themes
-        
-        return {
-            'total_reviews': len(results_df),
-            'sentiment_distribution': results_df['sentiment_label'].value_counts().to_dict(),
-            'themes_by_bank': themes_by_bank,
-            'average_sentiment_by_bank': results_df.groupby('bank')['sentiment_score'].mean().to_dict()
-        } 
\ No newline at end of file
+        return summarize(results_df)
@@ -0,0 +1,171 @@
+"""
+Content-hash cache for per-review analysis results.
+
+Entries are keyed by a hash of the whitespace-normalized review text and
+hold the sentiment, keyword and theme results of that text. A bounded LRU
+lives in memory; an optional SQLite file keeps entries between runs. The
+cache is bound to a fingerprint of the analyzer configuration and drops
+every entry when that fingerprint changes.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Default number of entries kept in memory
+DEFAULT_MAX_ENTRIES = 100000
+
+class AnalysisCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries (int): Maximum number of entries kept in memory
+            path (str or Path, optional): SQLite file used as persistent store
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        
+        self.max_entries = max_entries
+        self.path = path
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path))
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    @staticmethod
+    def key(text):
+        """
+        Hash the normalized text of a review.
+        
+        Args:
+            text (str): Review text
+            
+        Returns:
+            str: Hex digest identifying the text
+        """
+        normalized = ' '.join(text.split())
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+    def bind(self, fingerprint):
+        """
+        Bind the cache to an analyzer configuration, invalidating stale entries.
+        
+        Args:
+            fingerprint (str): Fingerprint of the analyzer version and theme keywords
+        """
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM cache_meta WHERE name = 'fingerprint'").fetchone()
+            if row is None or row[0] != fingerprint:
+                if row is not None:
+                    logger.info("Analyzer configuration changed, clearing persistent cache")
+                self._db.execute("DELETE FROM cache_entries")
+                self._db.execute("INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('fingerprint', ?)", [fingerprint])
+                self._db.commit()
+        if fingerprint != self.fingerprint:
+            self._entries.clear()
+            self._pending.clear()
+            self.fingerprint = fingerprint
+
+    def get(self, key):
+        """
+        Look up an entry.
+        
+        Args:
+            key (str): Key from AnalysisCache.key
+            
+        Returns:
+            tuple or None: Cached record, or None on a miss
+        """
+        record = self._entries.get(key)
+        if record is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return record
+        
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM cache_entries WHERE key = ?", [key]).fetchone()
+            if row is not None:
+                record = self._decode(row[0])
+                self._remember(key, record)
+                self.hits += 1
+                return record
+        
+        self.misses += 1
+        return None
+
+    def put(self, key, record):
+        """
+        Store an entry; persistent writes are buffered until flush().
+        
+        Args:
+            key (str): Key from AnalysisCache.key
+            record (tuple): Analysis record for the text
+        """
+        self._remember(key, record)
+        if self._db is not None:
+            self._pending[key] = record
+
+    def flush(self):
+        """Write buffered entries to the persistent store."""
+        if self._db is not None and self._pending:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO cache_entries (key, value) VALUES (?, ?)",
+                [(key, self._encode(record)) for key, record in self._pending.items()]
+            )
+            self._db.commit()
+        self._pending.clear()
+
+    def stats(self):
+        """
+        Report cache counters.
+        
+        Returns:
+            dict: Hits, misses, evictions, hit rate and in-memory size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries)
+        }
+
+    def close(self):
+        """Flush pending entries and close the persistent store."""
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key, record):
+        """Insert into the in-memory LRU, evicting the least recently used entry."""
+        self._entries[key] = record
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _encode(record):
+        return json.dumps(record)
+
+    @staticmethod
+    def _decode(value):
+        label, score, vader_score, textblob_score, keywords, themes = json.loads(value)
+        return label, score, vader_score, textblob_score, tuple(keywords), tuple(themes)
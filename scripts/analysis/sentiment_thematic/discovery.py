@@ -0,0 +1,376 @@
+"""
+Offline discovery of review themes from text embeddings.
+
+Reviews are embedded as TF-IDF vectors over the hashed keyword columns of
+a KeywordRanker, reduced to a few dense dimensions with truncated SVD and
+L2-normalized, so dot products are cosine similarities. A sample of the
+reviews is clustered with mini-batch k-means; every cluster is a proposed
+theme named after its most distinctive keywords, and clusters dominated by
+an existing keyword theme are reported as known. The clustered sample is
+held in a random-hyperplane LSH index, and reviews without a theme are
+assigned, in batches, to the cluster most of their approximate nearest
+neighbours belong to.
+
+Usage:
+    python -m scripts.analysis.sentiment_thematic.discovery --clusters 20
+"""
+
+import argparse
+from collections import Counter
+import json
+import logging
+from pathlib import Path
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+from .ranking import KeywordRanker
+from .storage import locate_results, read_results
+
+logger = logging.getLogger(__name__)
+
+# Defaults of ThemeDiscovery
+DEFAULT_CLUSTERS = 20
+DEFAULT_DIMENSIONS = 64
+DEFAULT_SAMPLE_SIZE = 200000
+
+# Cluster of reviews too far from every cluster, or without any keyword
+UNASSIGNED = -1
+
+class CosineLSHIndex:
+    """
+    Approximate nearest-neighbour index of unit vectors.
+    
+    Every table hashes a vector to the signs of its dot products with
+    n_bits random hyperplanes, so vectors at a small angle share buckets.
+    Candidates of a query are the vectors of its bucket in every table, at
+    most max_bucket per table, re-ranked by exact cosine similarity. Tables
+    are kept as sorted codes, so queries are answered in vectorized batches.
+    """
+
+    def __init__(self, vectors, n_bits=12, n_tables=8, max_bucket=32, seed=0):
+        """
+        Index vectors.
+        
+        Args:
+            vectors (np.ndarray): Unit vectors, one per row
+            n_bits (int): Hyperplanes per table; more bits, smaller buckets
+            n_tables (int): Number of hash tables; more tables, better recall
+            max_bucket (int): Candidates taken per table and query
+            seed (int): Seed of the random hyperplanes
+        """
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.max_bucket = max_bucket
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, self.vectors.shape[1], n_bits)).astype(np.float32)
+        self.weights = 1 << np.arange(n_bits, dtype=np.int64)
+        codes = self.codes(self.vectors)
+        self.order = np.argsort(codes, axis=0, kind='stable')
+        self.sorted_codes = np.take_along_axis(codes, self.order, axis=0)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def codes(self, vectors):
+        """Bucket of every vector in every table, shape (len(vectors), n_tables)."""
+        signs = np.einsum('nd,tdb->ntb', vectors, self.planes) > 0
+        return signs @ self.weights
+
+    def candidates(self, queries):
+        """
+        Collect the distinct candidates of every query.
+        
+        Returns:
+            tuple: (query positions, candidate ids) arrays of equal length
+        """
+        codes = self.codes(queries)
+        positions, ids = [], []
+        for table in range(codes.shape[1]):
+            column = self.sorted_codes[:, table]
+            starts = np.searchsorted(column, codes[:, table], side='left')
+            stops = np.searchsorted(column, codes[:, table], side='right')
+            counts = np.minimum(stops - starts, self.max_bucket)
+            total = int(counts.sum())
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            positions.append(np.repeat(np.arange(len(queries)), counts))
+            ids.append(self.order[np.repeat(starts, counts) + offsets, table])
+        positions, ids = np.concatenate(positions), np.concatenate(ids)
+        _, first = np.unique(positions * len(self) + ids, return_index=True)
+        return positions[first], ids[first]
+
+    def query(self, queries, k=10):
+        """
+        Find approximate nearest neighbours of a batch of unit vectors.
+        
+        Args:
+            queries (np.ndarray): Unit vectors, one per row
+            k (int): Neighbours per query
+        
+        Returns:
+            tuple: (ids, similarities) arrays of shape (len(queries), k),
+                most similar first; missing neighbours have id -1
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        positions, ids = self.candidates(queries)
+        similarities = np.einsum('ij,ij->i', queries[positions], self.vectors[ids])
+        
+        order = np.lexsort((-similarities, positions))
+        positions, ids, similarities = positions[order], ids[order], similarities[order]
+        group_starts = np.searchsorted(positions, np.arange(len(queries)))
+        ranks = np.arange(len(positions)) - group_starts[positions]
+        keep = ranks < k
+        
+        neighbour_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        neighbour_similarities = np.zeros((len(queries), k), dtype=np.float32)
+        neighbour_ids[positions[keep], ranks[keep]] = ids[keep]
+        neighbour_similarities[positions[keep], ranks[keep]] = similarities[keep]
+        return neighbour_ids, neighbour_similarities
+
+class ThemeDiscovery:
+    """Propose themes by clustering review embeddings, and assign reviews to them."""
+
+    def __init__(self, n_clusters=DEFAULT_CLUSTERS, dimensions=DEFAULT_DIMENSIONS,
+                 sample_size=DEFAULT_SAMPLE_SIZE, max_features=20000, neighbours=10,
+                 min_similarity=0.3, batch_size=10000, tokenizer=None, seed=0):
+        """
+        Args:
+            n_clusters (int): Number of clusters, i.e. of proposed themes
+            dimensions (int): Dimensions of the embeddings
+            sample_size (int): Maximum number of reviews the model is fitted on
+            max_features (int): Most frequent keyword columns kept for the SVD
+            neighbours (int): Nearest clustered reviews voting on an assignment
+            min_similarity (float): Cosine similarity to the nearest neighbour
+                below which a review stays unassigned
+            batch_size (int): Reviews embedded and assigned at a time
+            tokenizer (Tokenizer, optional): Keyword tokenizer
+            seed (int): Seed of sampling, SVD, k-means and the LSH index
+        """
+        self.n_clusters = n_clusters
+        self.dimensions = dimensions
+        self.sample_size = sample_size
+        self.max_features = max_features
+        self.neighbours = neighbours
+        self.min_similarity = min_similarity
+        self.batch_size = batch_size
+        self.seed = seed
+        self.ranker = KeywordRanker(tokenizer)
+        self.columns = None
+        self.svd = None
+        self.kmeans = None
+        self.index = None
+        self.index_clusters = None
+        self.themes = None
+
+    def _reduced_tfidf(self, texts):
+        """TF-IDF rows of texts over the kept keyword columns."""
+        return normalize(self.ranker.transform(texts)[:, self.columns], norm='l2', copy=False)
+
+    def embed(self, texts):
+        """
+        Embed texts as unit vectors; texts without known keywords get zero vectors.
+        
+        Args:
+            texts (list): Review texts
+        
+        Returns:
+            np.ndarray: One float32 row per text
+        """
+        embeddings = [
+            self.svd.transform(self._reduced_tfidf(texts[start:start + self.batch_size]))
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        if not embeddings:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return normalize(np.vstack(embeddings), norm='l2', copy=False).astype(np.float32)
+
+    def fit(self, texts, themes=None):
+        """
+        Fit embeddings and clusters on a sample of texts and name the clusters.
+        
+        Args:
+            texts (list): Review texts
+            themes (list, optional): Keyword themes of every text, to tell
+                clusters matching an existing theme from new ones
+        
+        Returns:
+            ThemeDiscovery: self; ValueError is raised when the texts have
+                fewer than two distinct keywords to cluster on
+        """
+        if not len(texts):
+            raise ValueError("Not enough keywords to cluster: no texts")
+        rng = np.random.default_rng(self.seed)
+        sample = np.arange(len(texts))
+        if len(texts) > self.sample_size:
+            sample = np.sort(rng.choice(len(texts), self.sample_size, replace=False))
+        sample_texts = [texts[i] for i in sample]
+        
+        start = time.perf_counter()
+        self.ranker.fit(sample_texts)
+        frequent = np.argsort(-self.ranker.document_frequency, kind='stable')[:self.max_features]
+        self.columns = np.sort(frequent[self.ranker.document_frequency[frequent] > 0])
+        if len(self.columns) < 2:
+            raise ValueError(f"Not enough keywords to cluster: found {len(self.columns)}, need at least 2")
+        tfidf = self._reduced_tfidf(sample_texts)
+        dimensions = max(1, min(self.dimensions, tfidf.shape[1] - 1))
+        self.svd = TruncatedSVD(dimensions, algorithm='randomized', random_state=self.seed).fit(tfidf)
+        self.dimensions = dimensions
+        embeddings = self.embed(sample_texts)
+        
+        # Reviews without keywords would only form a cluster of their own
+        keyed = np.flatnonzero(np.abs(embeddings).sum(axis=1) > 0)
+        if not len(keyed):
+            raise ValueError("No reviews with keywords to cluster")
+        n_clusters = min(self.n_clusters, len(keyed))
+        self.kmeans = MiniBatchKMeans(
+            n_clusters, batch_size=min(self.batch_size, len(keyed)), n_init=3, random_state=self.seed
+        ).fit(embeddings[keyed])
+        self.index = CosineLSHIndex(embeddings[keyed], seed=self.seed)
+        self.index_clusters = self.kmeans.labels_.astype(np.int64)
+        logger.info(f"Clustered {len(keyed)} reviews into {n_clusters} clusters in {time.perf_counter() - start:.1f}s")
+        
+        keyed_texts = [sample_texts[i] for i in keyed]
+        keyed_themes = None if themes is None else [themes[sample[i]] for i in keyed]
+        self.themes = self._describe(keyed_texts, keyed_themes)
+        return self
+
+    def _describe(self, texts, themes, top=10, known_share=0.5):
+        """
+        Name every cluster after its top keywords and match it with existing themes.
+        
+        Returns:
+            pd.DataFrame: cluster, name, size, keywords, known_theme and
+                known_share, largest clusters first; known_theme is the
+                keyword theme of at least known_share of the cluster, if any
+        """
+        labels = self.index_clusters
+        keywords = self.ranker.group_keywords(texts, labels, top)
+        sizes = np.bincount(labels, minlength=self.kmeans.n_clusters)
+        rows = []
+        for cluster in range(self.kmeans.n_clusters):
+            terms = [term for term, _ in keywords.get(cluster, [])]
+            known, share = None, 0.0
+            if themes is not None and sizes[cluster]:
+                counts = Counter(
+                    theme for label, review_themes in zip(labels, themes) if label == cluster
+                    for theme in review_themes
+                )
+                if counts:
+                    theme, count = counts.most_common(1)[0]
+                    share = count / sizes[cluster]
+                    known = theme if share >= known_share else None
+            rows.append({
+                'cluster': cluster,
+                'name': ' / '.join(terms[:3]),
+                'size': int(sizes[cluster]),
+                'keywords': terms,
+                'known_theme': known,
+                'known_share': share
+            })
+        return pd.DataFrame(rows).sort_values('size', ascending=False, kind='stable').reset_index(drop=True)
+
+    def assign(self, texts):
+        """
+        Assign texts to clusters by a similarity-weighted vote of their nearest clustered reviews.
+        
+        Texts whose neighbours all fall outside the LSH buckets are assigned
+        to the nearest centroid instead.
+        
+        Args:
+            texts (list): Review texts
+        
+        Returns:
+            tuple: (cluster, similarity) arrays; cluster is UNASSIGNED when
+                the nearest neighbour is less similar than min_similarity
+        """
+        clusters = np.full(len(texts), UNASSIGNED, dtype=np.int64)
+        similarity = np.zeros(len(texts), dtype=np.float32)
+        centroids = normalize(self.kmeans.cluster_centers_, norm='l2').astype(np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            embeddings = self.embed(texts[start:start + self.batch_size])
+            ids, similarities = self.index.query(embeddings, self.neighbours)
+            
+            votes = np.zeros((len(embeddings), self.kmeans.n_clusters), dtype=np.float32)
+            found = ids >= 0
+            rows = np.repeat(np.arange(len(embeddings)), self.neighbours).reshape(ids.shape)
+            np.add.at(votes, (rows[found], self.index_clusters[ids[found]]), similarities[found])
+            batch_clusters = votes.argmax(axis=1)
+            batch_similarity = similarities[:, 0]
+            
+            # No candidates at all: nearest centroid
+            missing = ~found[:, 0]
+            if missing.any():
+                centroid_similarities = embeddings[missing] @ centroids.T
+                batch_clusters[missing] = centroid_similarities.argmax(axis=1)
+                batch_similarity[missing] = centroid_similarities.max(axis=1)
+            
+            batch_clusters[batch_similarity < self.min_similarity] = UNASSIGNED
+            clusters[start:start + len(embeddings)] = batch_clusters
+            similarity[start:start + len(embeddings)] = batch_similarity
+        return clusters, similarity
+
+def discover_themes(results_df, text_column='review_text', discovery=None, **kwargs):
+    """
+    Propose themes from results and assign their unthemed reviews.
+    
+    Args:
+        results_df (pd.DataFrame): Results with a text column and themes lists
+        text_column (str): Column holding the review text
+        discovery (ThemeDiscovery, optional): Unfitted discovery to use
+        **kwargs: Passed on to ThemeDiscovery when discovery is None
+    
+    Returns:
+        tuple: (proposed themes DataFrame, assignments DataFrame of the
+            unthemed reviews with cluster, discovered_theme and similarity,
+            indexed like results_df)
+    """
+    discovery = ThemeDiscovery(**kwargs) if discovery is None else discovery
+    texts = results_df[text_column].fillna('').astype(str).tolist()
+    themes = [list(review_themes) if isinstance(review_themes, list) else [] for review_themes in results_df['themes']]
+    discovery.fit(texts, themes)
+
+    unthemed = np.flatnonzero([not review_themes for review_themes in themes])
+    clusters, similarity = discovery.assign([texts[i] for i in unthemed])
+    names = discovery.themes.set_index('cluster')['name']
+    assignments = pd.DataFrame({
+        'cluster': clusters,
+        'discovered_theme': names.reindex(clusters).to_numpy(),
+        'similarity': similarity
+    }, index=results_df.index[unthemed])
+    logger.info(f"Assigned {int((clusters != UNASSIGNED).sum())} of {len(unthemed)} unthemed reviews")
+    return discovery.themes, assignments
+
+def main(argv=None):
+    """Propose themes from the analysis results and assign unthemed reviews."""
+    parser = argparse.ArgumentParser(description="Discover review themes by clustering review embeddings.")
+    parser.add_argument('--results', type=Path, default=None,
+                        help="Results file (default: the sentiment_thematic results)")
+    parser.add_argument('--clusters', type=int, default=DEFAULT_CLUSTERS,
+                        help=f"Number of proposed themes (default: {DEFAULT_CLUSTERS})")
+    parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help=f"Maximum number of reviews clustered (default: {DEFAULT_SAMPLE_SIZE})")
+    parser.add_argument('--text-column', default='review_text', help="Column holding the review text")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    output_base = Path(__file__).parent.parent.parent.parent / "data" / "analysis" / "sentiment_thematic"
+    results_path = args.results if args.results is not None else locate_results(output_base)
+    results_df = read_results(results_path, columns=['review_id', args.text_column, 'themes'])
+    themes_df, assignments = discover_themes(
+        results_df, text_column=args.text_column, n_clusters=args.clusters, sample_size=args.sample_size
+    )
+
+    output_dir = Path(results_path).parent
+    with open(output_dir / "sentiment_thematic_discovered_themes.json", 'w') as f:
+        json.dump(themes_df.to_dict(orient='records'), f, indent=4)
+    assignments.insert(0, 'review_id', results_df.loc[assignments.index, 'review_id'].to_numpy())
+    assignments.to_csv(output_dir / "sentiment_thematic_theme_assignments.csv", index=False)
+    for theme in themes_df.itertuples():
+        status = f"known: {theme.known_theme}" if theme.known_theme else "new"
+        logger.info(f"Cluster {theme.cluster} ({theme.size} reviews, {status}): {', '.join(theme.keywords)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Incremental sentiment and thematic analysis.
+
+Every review gets a stable identity, a hash of its bank, date and text,
+instead of its position in reviews_cleaned.csv. Only reviews whose key is
+missing from the existing results are scored; the rest reuse their stored
+analysis, so a run costs time proportional to the delta.
+"""
+
+import hashlib
+import logging
+
+import pandas as pd
+
+from .analyzer import PASSTHROUGH_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+def review_key(bank, date, text):
+    """
+    Compute the stable identity of a review.
+    
+    Args:
+        bank (str): Bank name
+        date (str): Review date
+        text (str): Review text
+        
+    Returns:
+        str: Hex digest identifying the review
+    """
+    value = '\x1f'.join([str(bank), str(date), str(text)])
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=16).hexdigest()
+
+def review_keys(reviews_df, text_column='review'):
+    """
+    Compute review keys for every row of a frame.
+    
+    Args:
+        reviews_df (pd.DataFrame): Reviews or results with bank and date columns
+        text_column (str): Name of the review text column
+        
+    Returns:
+        pd.Series: Review keys aligned with reviews_df
+    """
+    keys = [
+        review_key(bank, date, text)
+        for bank, date, text in zip(reviews_df['bank'], reviews_df['date'], reviews_df[text_column])
+    ]
+    return pd.Series(keys, index=reviews_df.index, dtype=object)
+
+def process_incremental(analyzer, reviews_df, existing_df=None, **kwargs):
+    """
+    Analyze reviews, reusing stored results for reviews seen before.
+    
+    Reviews of reviews_df whose key is in existing_df keep their stored
+    sentiment, keywords and themes; every other review is scored, as are
+    stored reviews whose language differs from the input's. The review and
+    preprocessing columns are refreshed from reviews_df, so results stored
+    before a column was added are reused too. Stored
+    results for reviews no longer in the input are dropped. The merged
+    results follow the order of reviews_df and carry a review_key column.
+    
+    Args:
+        analyzer (SentimentThematicAnalyzer): Analyzer used for new reviews
+        reviews_df (pd.DataFrame): DataFrame containing all current reviews
+        existing_df (pd.DataFrame, optional): Results of a previous run
+        **kwargs: Passed on to analyzer.process_reviews
+        
+    Returns:
+        tuple: (merged results DataFrame, number of reviews scored)
+    """
+    keys = review_keys(reviews_df)
+    
+    if existing_df is None or existing_df.empty:
+        is_new = pd.Series(True, index=reviews_df.index)
+        stored = None
+    else:
+        stored = existing_df
+        if 'review_key' not in stored.columns:
+            stored = stored.assign(review_key=review_keys(stored, text_column='review_text'))
+        stored = stored.drop_duplicates('review_key', keep='last').set_index('review_key')
+        is_new = ~keys.isin(stored.index)
+        if 'language' in reviews_df.columns:
+            # Language decides whether a review is scored, so results stored
+            # without it or with another language are scored again
+            stored_languages = stored['language'] if 'language' in stored.columns \
+                else pd.Series(None, index=stored.index, dtype=object)
+            stored_languages = stored_languages.reindex(keys.to_numpy()).to_numpy(dtype=object)
+            languages = reviews_df['language'].to_numpy(dtype=object)
+            same = (stored_languages == languages) | (pd.isna(stored_languages) & pd.isna(languages))
+            is_new |= ~same
+    
+    new_reviews = reviews_df[is_new.to_numpy()]
+    logger.info(f"{len(new_reviews)} of {len(reviews_df)} reviews need scoring")
+    new_results = analyzer.process_reviews(new_reviews, **kwargs)
+    new_results.insert(1, 'review_key', keys[is_new.to_numpy()].to_numpy())
+    
+    if stored is None or is_new.all():
+        return new_results, len(new_reviews)
+    
+    # Reuse stored analysis, refreshing the review columns from the input
+    old_reviews = reviews_df[~is_new.to_numpy()]
+    old_keys = keys[~is_new.to_numpy()]
+    old_results = stored.loc[old_keys.to_numpy()].reset_index()
+    old_results['review_id'] = old_reviews.index.to_numpy()
+    old_results['review_text'] = old_reviews['review'].to_numpy()
+    for column in ['bank', 'rating', 'date', 'source'] + list(PASSTHROUGH_COLUMNS):
+        if column in old_reviews.columns:
+            old_results[column] = old_reviews[column].to_numpy()
+    old_results = old_results.reindex(columns=new_results.columns)
+    
+    # Put both parts back in input order
+    order = pd.Series(range(len(reviews_df)), index=reviews_df.index)
+    merged = pd.concat([new_results, old_results], ignore_index=True)
+    positions = pd.concat([order[is_new.to_numpy()], order[~is_new.to_numpy()]], ignore_index=True)
+    merged = merged.iloc[positions.argsort(kind='stable').to_numpy()].reset_index(drop=True)
+    return merged, len(new_reviews)
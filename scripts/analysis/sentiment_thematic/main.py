@@ -2,6 +2,7 @@
 Main script to run sentiment and thematic analysis on fintech reviews.
 """
 
+import argparse
 import json
 from pathlib import Path
 import logging
@@ -14,46 +15,140 @@ project_root = str(Path(__file__).parent.parent.parent.parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer, DEFAULT_BATCH_SIZE
+from scripts.analysis.sentiment_thematic.cache import AnalysisCache, DEFAULT_MAX_ENTRIES
+from scripts.analysis.sentiment_thematic.incremental import process_incremental
+from scripts.analysis.sentiment_thematic.rollup import ROLLUP_STEM, RollupCube, refresh_rollup
+from scripts.analysis.sentiment_thematic.sentiment import DEFAULT_SENTIMENT_BACKEND, SENTIMENT_BACKENDS
+from scripts.analysis.sentiment_thematic.storage import RESULTS_STEM, results_fingerprint
+from scripts.analysis.sentiment_thematic.streaming import stream_reviews, DEFAULT_CHUNK_SIZE
+from scripts.analysis.sentiment_thematic.trends import TREND_FREQUENCIES, TrendEngine
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Run sentiment and thematic analysis on fintech reviews.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes used for scoring (default: 1)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Number of reviews scored per batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--sentiment', choices=sorted(SENTIMENT_BACKENDS), default=DEFAULT_SENTIMENT_BACKEND,
+                        help=f"Sentiment backend used to score reviews (default: {DEFAULT_SENTIMENT_BACKEND})")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f"Number of analysis results kept in memory (default: {DEFAULT_MAX_ENTRIES})")
+    parser.add_argument('--cache-path', type=Path, default=None,
+                        help="SQLite file that keeps analysis results between runs")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only score reviews missing from the existing results file")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help="File format of the detailed results (default: csv)")
+    parser.add_argument('--stream-from', type=Path, default=None,
+                        help="Raw reviews CSV to preprocess and analyze chunk by chunk")
+    parser.add_argument('--detect-language', action='store_true',
+                        help="Tag the language of streamed reviews and skip sentiment scoring of non-English ones")
+    parser.add_argument('--near-duplicates', choices=['flag', 'collapse'], default=None,
+                        help="Cluster near-duplicate streamed reviews; 'collapse' analyzes one review per cluster")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Number of raw reviews read per chunk when streaming (default: {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+    if args.stream_from is not None and args.incremental:
+        parser.error("--stream-from and --incremental cannot be combined")
+    if args.detect_language and args.stream_from is None:
+        parser.error("--detect-language requires --stream-from; otherwise preprocess with detect_language=True")
+    if args.near_duplicates and args.stream_from is None:
+        parser.error("--near-duplicates requires --stream-from; otherwise preprocess with near_duplicates=...")
+    return args
+
+def main(argv=None):
     """Run the sentiment and thematic analysis."""
-    # Initialize analyzer
-    analyzer = SentimentThematicAnalyzer()
-    
-    # Load reviews data
-    data_path = Path("../../../data/processed/reviews_cleaned.csv")
-    if not data_path.exists():
-        raise FileNotFoundError(f"Reviews file not found at {data_path}")
-    
-    reviews_df = pd.read_csv(data_path)
+    args = parse_args(argv)
     
-    # Debug: Print column names
-    logger.info("Available columns in the DataFrame:")
-    logger.info(reviews_df.columns.tolist())
-    
-    # Process reviews
-    logger.info("Starting sentiment and thematic analysis...")
-    results_df = analyzer.process_reviews(reviews_df)
+    # Initialize analyzer
+    cache = AnalysisCache(max_entries=args.cache_size, path=args.cache_path)
+    analyzer = SentimentThematicAnalyzer(cache=cache, sentiment=args.sentiment)
     
     # Create output directories
     output_base = Path("../../../data/analysis/sentiment_thematic")
     output_base.mkdir(parents=True, exist_ok=True)
+    results_path = output_base / f"{RESULTS_STEM}.{args.format}"
+    rollup_path = output_base / f"{ROLLUP_STEM}.{args.format}"
+    data_path = Path("../../../data/processed/reviews_cleaned.csv")
     
-    # Save detailed results
-    results_path = output_base / "sentiment_thematic_results.csv"
-    analyzer.save_results(results_df, results_path)
+    if args.stream_from is not None:
+        # Preprocess and analyze the raw reviews chunk by chunk
+        logger.info(f"Streaming reviews from {args.stream_from}...")
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        rollup = RollupCube()
+        scored = stream_reviews(
+            analyzer, args.stream_from, results_path, cleaned_path=data_path,
+            chunk_size=args.chunk_size, rollup=rollup, detect_language=args.detect_language,
+            near_duplicates=args.near_duplicates,
+            batch_size=args.batch_size, workers=args.workers
+        )
+        logger.info(f"Scored {scored} reviews")
+        logger.info(f"Analysis cache: {cache.stats()}")
+        cache.close()
+    else:
+        # Load reviews data
+        if not data_path.exists():
+            raise FileNotFoundError(f"Reviews file not found at {data_path}")
+        
+        reviews_df = pd.read_csv(data_path)
+        
+        # Debug: Print column names
+        logger.info("Available columns in the DataFrame:")
+        logger.info(reviews_df.columns.tolist())
+        
+        # Reuse previous results in incremental mode
+        existing_df = None
+        if args.incremental and results_path.exists():
+            existing_df = analyzer.load_results(results_path)
+            logger.info(f"Loaded {len(existing_df)} existing results from {results_path}")
+        
+        # Process reviews
+        logger.info("Starting sentiment and thematic analysis...")
+        results_df, scored = process_incremental(
+            analyzer, reviews_df, existing_df, batch_size=args.batch_size, workers=args.workers
+        )
+        logger.info(f"Scored {scored} reviews")
+        logger.info(f"Analysis cache: {cache.stats()}")
+        cache.close()
+        
+        # Update the rollup with the reviews added and removed since the last
+        # run, if it was built from the results being replaced
+        rollup = RollupCube.load(rollup_path) if existing_df is not None and rollup_path.exists() else None
+        if rollup is not None and rollup.results_fingerprint == results_fingerprint(results_path):
+            rollup = refresh_rollup(rollup, existing_df, results_df)
+        else:
+            rollup = RollupCube.from_results(results_df)
+        
+        # Save detailed results
+        analyzer.save_results(results_df, results_path)
     
-    # Generate and save summary
-    summary = analyzer.generate_summary(results_df)
+    rollup.results_fingerprint = results_fingerprint(results_path)
+    rollup.save(rollup_path)
+    
+    # Generate and save summary; the rollup only stands in for results that
+    # were streamed and are not in memory
+    summary = rollup.summary() if args.stream_from is not None else analyzer.generate_summary(results_df)
     summary_path = output_base / "sentiment_thematic_summary.json"
     with open(summary_path, 'w') as f:
         json.dump(summary, f, indent=4)
     
+    # Rolling trends per bank from the rollup, alerting on negative spikes
+    trends = TrendEngine.from_rollup(rollup)
+    for frequency in TREND_FREQUENCIES:
+        trend_df = trends.trends(frequency).merge(trends.theme_shares(frequency), on=['bank', 'date'], how='left')
+        trend_df.to_csv(output_base / f"sentiment_thematic_trends_{frequency}.csv", index=False)
+        for alert in trends.alerts(frequency).itertuples():
+            logger.warning(
+                f"Negative spike for {alert.bank} ({frequency}, period from {alert.date:%Y-%m-%d}): "
+                f"{alert.negative_share:.1%} negative of {alert.reviews} reviews, z={alert.negative_z:.1f}"
+            )
+    
     logger.info("Analysis completed successfully!")
     logger.info(f"Results saved to {results_path}")
     logger.info(f"Summary saved to {summary_path}")
@@ -0,0 +1,143 @@
+"""
+Keyword matcher used for theme identification.
+"""
+
+import re
+
+from .tokenizer import tokenize
+
+# Inflections accepted after a keyword, so "transfers" still matches "transfer"
+KEYWORD_SUFFIXES = ('', 's', 'es', 'ed', 'ing')
+
+# Splits keywords into words and the separators between them
+_KEYWORD_SPLIT = re.compile(r'(\W+)')
+
+def _gap_pattern(separator):
+    """Compile the pattern a gap between two words of a keyword must match."""
+    return re.compile(''.join(r'\s+' if char == ' ' else re.escape(char) for char in separator))
+
+class ThemeMatcher:
+    """
+    Find theme keywords in the words of a tokenized text.
+    
+    Keywords are looked up once per word in dictionaries built from the
+    theme keywords. Keywords only match whole words (plus a plain
+    inflection), so "app" does not match inside "happy", and multi-word
+    keywords such as "customer service" match across any run of whitespace.
+    When several keywords fit, the longest one wins and its words are not
+    matched again.
+    """
+
+    def __init__(self, theme_keywords):
+        """
+        Build the keyword lookup tables.
+        
+        Args:
+            theme_keywords (dict): Mapping of theme name to list of keywords
+        """
+        self.themes = list(theme_keywords)
+        
+        # Keywords shared by several themes count towards each of them
+        self.keyword_themes = {}
+        for theme, keywords in theme_keywords.items():
+            for keyword in keywords:
+                key = ' '.join(keyword.lower().split())
+                self.keyword_themes.setdefault(key, []).append(theme)
+        
+        # Single-word keywords by inflected form, and multi-word keywords by first word
+        self.word_forms = {}
+        self.phrases = {}
+        for key in self.keyword_themes:
+            parts = _KEYWORD_SPLIT.split(key)
+            # Separators at the ends of a keyword cannot be matched on words
+            words, separators = parts[0::2], parts[1::2]
+            if words and not words[0]:
+                words, separators = words[1:], separators[1:]
+            if words and not words[-1]:
+                words, separators = words[:-1], separators[:-1]
+            if not words:
+                continue
+            forms = [words[-1] + suffix for suffix in KEYWORD_SUFFIXES]
+            if len(words) == 1:
+                for form in forms:
+                    if len(key) > len(self.word_forms.get(form, '')):
+                        self.word_forms[form] = key
+            else:
+                gaps = [_gap_pattern(separator) for separator in separators]
+                self.phrases.setdefault(words[0], []).append((key, words[1:-1], frozenset(forms), gaps))
+        for candidates in self.phrases.values():
+            candidates.sort(key=lambda phrase: len(phrase[0]), reverse=True)
+
+    def count(self, text):
+        """
+        Count keyword hits per theme.
+        
+        Args:
+            text (str): The text to match
+        
+        Returns:
+            dict: Mapping of theme to number of keyword hits, in theme order,
+                for themes with at least one hit
+        """
+        return self.count_tokens(tokenize(text))
+
+    def count_tokens(self, tokens):
+        """
+        Count keyword hits per theme in an already tokenized text.
+        
+        Args:
+            tokens (TokenizedText): Record from tokenize
+        
+        Returns:
+            dict: Mapping of theme to number of keyword hits, in theme order,
+                for themes with at least one hit
+        """
+        hits = dict.fromkeys(self.themes, 0)
+        for key in self._matched_keywords(tokens.words, tokens.gaps):
+            for theme in self.keyword_themes[key]:
+                hits[theme] += 1
+        return {theme: count for theme, count in hits.items() if count > 0}
+
+    def _matched_keywords(self, words, gaps):
+        """Yield the keyword of every non-overlapping match, left to right."""
+        word_forms, phrases = self.word_forms, self.phrases
+        i, n = 0, len(words)
+        while i < n:
+            word = words[i]
+            for key, middle, last_forms, gap_patterns in phrases.get(word, ()):
+                length = len(middle) + 2
+                if i + length <= n and words[i + length - 1] in last_forms \
+                        and all(words[i + 1 + j] == middle_word for j, middle_word in enumerate(middle)) \
+                        and all(pattern.fullmatch(gaps[i + j]) for j, pattern in enumerate(gap_patterns)):
+                    yield key
+                    i += length
+                    break
+            else:
+                key = word_forms.get(word)
+                if key is not None:
+                    yield key
+                i += 1
+
+    def match(self, text):
+        """
+        List the themes with at least one keyword hit.
+        
+        Args:
+            text (str): The text to match
+        
+        Returns:
+            list: Matched themes in theme order
+        """
+        return list(self.count(text))
+
+    def match_tokens(self, tokens):
+        """
+        List the themes with at least one keyword hit in an already tokenized text.
+        
+        Args:
+            tokens (TokenizedText): Record from tokenize
+        
+        Returns:
+            list: Matched themes in theme order
+        """
+        return list(self.count_tokens(tokens))
@@ -0,0 +1,75 @@
+"""
+Multi-process scoring for SentimentThematicAnalyzer.
+
+Each worker process builds its own analyzer (and with it its own sentiment
+backend) once in the pool initializer, then scores
+chunks of review texts. Chunk results are written back into the result
+columns in input order, so the output matches the serial path exactly.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Analyzer owned by the current worker process
+_worker_analyzer = None
+
+def _init_worker(analyzer_cls, theme_keywords, stop_words, sentiment):
+    """
+    Build the worker-local analyzer.
+    
+    Args:
+        analyzer_cls (type): Analyzer class to instantiate
+        theme_keywords (dict): Theme keywords of the parent analyzer
+        stop_words (frozenset): Stop words of the parent analyzer
+        sentiment (str): Sentiment backend name of the parent analyzer
+    """
+    global _worker_analyzer
+    _worker_analyzer = analyzer_cls(theme_keywords=theme_keywords, stop_words=stop_words, sentiment=sentiment)
+
+def _score_chunk(texts):
+    """
+    Score one chunk of texts with the worker-local analyzer.
+    
+    Args:
+        texts (np.ndarray): Review texts of the chunk
+        
+    Returns:
+        dict: Result columns for the chunk
+    """
+    columns = _worker_analyzer._allocate_result_columns(len(texts))
+    _worker_analyzer._process_batch(texts, columns, 0)
+    return columns
+
+def score_in_parallel(analyzer, texts, columns, batch_size, workers):
+    """
+    Score texts across worker processes into preallocated result columns.
+    
+    Args:
+        analyzer (SentimentThematicAnalyzer): Analyzer whose configuration the workers copy
+        texts (np.ndarray): Review texts to score
+        columns (dict): Result columns from _allocate_result_columns
+        batch_size (int): Maximum number of texts per chunk
+        workers (int): Number of worker processes
+    """
+    if len(texts) == 0:
+        return
+    
+    # Keep every worker busy even when the input is small
+    chunk_size = min(batch_size, math.ceil(len(texts) / workers))
+    offsets = range(0, len(texts), chunk_size)
+    chunks = (texts[start:start + chunk_size] for start in offsets)
+    
+    logger.info(f"Scoring {len(texts)} reviews in {len(offsets)} chunks on {workers} workers")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(type(analyzer), analyzer.theme_keywords, analyzer.stop_words, analyzer.sentiment)
+    ) as executor:
+        # map() yields results in submission order
+        for start, chunk_columns in zip(offsets, executor.map(_score_chunk, chunks)):
+            stop = start + len(chunk_columns['sentiment_label'])
+            for name, values in chunk_columns.items():
+                columns[name][start:stop] = values
@@ -0,0 +1,212 @@
+"""
+Corpus-level TF-IDF keyword ranking.
+
+Reviews are hashed into a fixed number of sparse term-count columns with a
+HashingVectorizer, so no vocabulary has to be fitted up front and the model
+can be updated chunk by chunk with partial_fit. Only the document frequency
+of every column and the number of documents seen are kept; IDF weights are
+derived from them on demand, and every matrix stays sparse.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+from .tokenizer import Tokenizer
+
+# Number of hashed term columns; collisions stay rare up to millions of distinct terms
+DEFAULT_N_FEATURES = 2 ** 20
+
+class KeywordRanker:
+    """
+    Rank the most distinctive keywords of reviews, banks or time windows.
+    
+    Weights follow TfidfVectorizer's defaults: raw term counts times the
+    smoothed IDF ln((1 + n) / (1 + df)) + 1, with L2-normalized rows.
+    """
+
+    def __init__(self, tokenizer=None, n_features=DEFAULT_N_FEATURES):
+        """
+        Initialize an empty model.
+        
+        Args:
+            tokenizer (Tokenizer, optional): Keyword tokenizer, defaults to Tokenizer()
+            n_features (int): Number of hashed term columns
+        """
+        self.tokenizer = Tokenizer() if tokenizer is None else tokenizer
+        self.n_features = n_features
+        self.vectorizer = HashingVectorizer(
+            analyzer=self._analyze, n_features=n_features, alternate_sign=False, norm=None
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+        # Term seen for each hashed column, to report keywords instead of column numbers
+        self.terms = {}
+        self._seen = set()
+
+    def _analyze(self, text):
+        """Split a text into keywords, remembering the term of every new column."""
+        keywords = self.tokenizer.keywords(text)
+        seen = self._seen
+        for keyword in keywords:
+            if keyword not in seen:
+                seen.add(keyword)
+                self.terms.setdefault(self.column(keyword), keyword)
+        return keywords
+
+    def column(self, term):
+        """Hashed column of a term, as computed by the vectorizer."""
+        return abs(murmurhash3_32(term, seed=0)) % self.n_features
+
+    def counts(self, texts):
+        """
+        Count keywords of texts into a sparse matrix.
+        
+        Args:
+            texts (iterable): Review texts
+        
+        Returns:
+            scipy.sparse.csr_matrix: One row per text, one column per hashed term
+        """
+        return self.vectorizer.transform(texts)
+
+    def partial_fit(self, texts):
+        """
+        Add the document frequencies of texts to the model.
+        
+        Args:
+            texts (iterable): Review texts
+        
+        Returns:
+            KeywordRanker: self
+        """
+        counts = self.counts(texts)
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents += counts.shape[0]
+        return self
+
+    def fit(self, texts):
+        """
+        Fit the model on texts, discarding earlier updates.
+        
+        Args:
+            texts (iterable): Review texts
+        
+        Returns:
+            KeywordRanker: self
+        """
+        self.document_frequency[:] = 0
+        self.n_documents = 0
+        return self.partial_fit(texts)
+
+    def idf(self):
+        """Smoothed inverse document frequency of every column."""
+        return np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+
+    def transform(self, texts):
+        """
+        Weight the keywords of texts by TF-IDF.
+        
+        Args:
+            texts (iterable): Review texts
+        
+        Returns:
+            scipy.sparse.csr_matrix: L2-normalized TF-IDF rows
+        """
+        weighted = self.counts(texts).astype(np.float64)
+        weighted.data *= self.idf()[weighted.indices]
+        return normalize(weighted, norm='l2', copy=False)
+
+    def top_terms(self, matrix, top):
+        """
+        Read the highest weighted terms of every row of a sparse matrix.
+        
+        Args:
+            matrix (scipy.sparse.csr_matrix): Weighted term matrix
+            top (int): Number of terms per row
+        
+        Returns:
+            list: One list of (term, weight) pairs per row, highest first
+        """
+        matrix = matrix.tocsr()
+        terms, rows = self.terms, []
+        for start, stop in zip(matrix.indptr[:-1], matrix.indptr[1:]):
+            data = matrix.data[start:stop]
+            # Ties are broken by column so the ranking is deterministic
+            order = np.lexsort((matrix.indices[start:stop], -data))[:top]
+            rows.append([(terms[matrix.indices[start + i]], float(data[i])) for i in order])
+        return rows
+
+    def review_keywords(self, texts, top=5):
+        """
+        Rank the most distinctive keywords of every review.
+        
+        Args:
+            texts (iterable): Review texts
+            top (int): Number of keywords per review
+        
+        Returns:
+            list: One list of keywords per review, highest weight first
+        """
+        return [[term for term, _ in row] for row in self.top_terms(self.transform(texts), top)]
+
+    def group_keywords(self, texts, groups, top=20):
+        """
+        Rank the most distinctive keywords of groups of reviews.
+        
+        The TF-IDF rows of the reviews in a group are summed, so a term
+        ranks high when many of the group's reviews weigh it heavily.
+        
+        Args:
+            texts (iterable): Review texts
+            groups (array-like): Group of every text, e.g. bank or (bank, month)
+            top (int): Number of keywords per group
+        
+        Returns:
+            dict: Mapping of group to list of (keyword, weight) pairs, in
+                order of first appearance of the groups
+        """
+        codes, uniques = pd.factorize(pd.Series(list(groups), dtype=object), sort=False)
+        weights = self.transform(texts)
+        membership = sparse.csr_matrix(
+            (np.ones(len(codes)), (codes, np.arange(len(codes)))),
+            shape=(len(uniques), len(codes))
+        )
+        return dict(zip(uniques, self.top_terms(membership @ weights, top)))
+
+def rank_keywords(results_df, top=20, freq=None, ranker=None, text_column='review_text', fit=None):
+    """
+    Fit a keyword ranker on results and rank the keywords of each bank.
+    
+    The document frequencies are only updated when asked to, or when the
+    ranker is unfitted, so ranking the same results twice gives the same
+    weights.
+    
+    Args:
+        results_df (pd.DataFrame): DataFrame with bank, text and, for time
+            windows, date columns
+        top (int): Number of keywords per group
+        freq (str, optional): Pandas period frequency, e.g. 'M', to rank
+            each bank per time window instead of overall
+        ranker (KeywordRanker, optional): Ranker to weigh keywords with
+        text_column (str): Column holding the review text
+        fit (bool, optional): Add the texts to the ranker's document
+            frequencies, e.g. to update a ranker fitted on earlier reviews;
+            by default only an unfitted ranker is fitted
+    
+    Returns:
+        dict: Mapping of bank, or (bank, period string) with freq, to list of
+            (keyword, weight) pairs
+    """
+    texts = results_df[text_column].fillna('').astype(str).tolist()
+    ranker = KeywordRanker() if ranker is None else ranker
+    if fit or (fit is None and ranker.n_documents == 0):
+        ranker.partial_fit(texts)
+    groups = results_df['bank'].tolist()
+    if freq is not None:
+        periods = pd.to_datetime(results_df['date']).dt.to_period(freq).astype(str)
+        groups = list(zip(groups, periods))
+    return ranker.group_keywords(texts, groups, top)
@@ -0,0 +1,276 @@
+"""
+Rollup cube of analysis results.
+
+Results are aggregated into one row per bank, day, sentiment label and
+theme combination holding review counts and rating and sentiment score
+sums. The cube is a few thousand rows however many reviews there are; it
+is updated by adding and removing results, and summaries and insights are
+computed from it instead of from the raw rows.
+"""
+
+from collections import Counter
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .storage import is_parquet
+
+logger = logging.getLogger(__name__)
+
+# Dimensions of the cube; theme is the '|'-joined theme list of a review
+ROLLUP_KEYS = ['bank', 'date', 'sentiment_label', 'theme']
+
+# Measures of the cube; rated and scored count the non-missing values summed
+ROLLUP_MEASURES = ['reviews', 'rated', 'rating_sum', 'scored', 'score_sum']
+
+# Theme key of reviews without themes, as in generate_summary
+NO_THEME = 'No Theme'
+
+# File name, without extension, of the rollup saved next to the results
+ROLLUP_STEM = 'sentiment_thematic_rollup'
+
+# Where save keeps the fingerprint of the results the cube was built from
+FINGERPRINT_KEY = 'results_fingerprint'
+FINGERPRINT_PREFIX = f'# {FINGERPRINT_KEY}='
+
+def theme_key(themes):
+    """Join a theme list into its cube key."""
+    return '|'.join(themes) if isinstance(themes, list) and themes else NO_THEME
+
+def locate_rollup(directory):
+    """
+    Find the rollup file in a directory, preferring Parquet over CSV.
+    
+    Args:
+        directory (str or Path): Directory holding the rollup
+        
+    Returns:
+        Path: Path of the Parquet rollup if present, else of the CSV rollup
+    """
+    parquet_path = Path(directory) / f'{ROLLUP_STEM}.parquet'
+    return parquet_path if parquet_path.exists() else Path(directory) / f'{ROLLUP_STEM}.csv'
+
+def _ranked(counts):
+    """Order a Series of counts like value_counts, keeping first-seen order for ties."""
+    counts = counts[counts > 0]
+    return counts.iloc[np.argsort(-counts.to_numpy(), kind='stable')]
+
+class RollupCube:
+    """Aggregate cube keyed on bank, date, sentiment label and theme combination."""
+
+    def __init__(self, cube=None, results_fingerprint=None):
+        """
+        Args:
+            cube (pd.DataFrame, optional): Cube rows with ROLLUP_KEYS and
+                ROLLUP_MEASURES columns, empty by default
+            results_fingerprint (str, optional): Fingerprint of the results file
+                the cube was built from, as storage.results_fingerprint
+        """
+        if cube is None:
+            cube = pd.DataFrame({column: pd.Series(dtype=object) for column in ROLLUP_KEYS})
+            for column in ROLLUP_MEASURES:
+                cube[column] = pd.Series(dtype=np.float64)
+        self.cube = cube[ROLLUP_KEYS + ROLLUP_MEASURES].reset_index(drop=True)
+        self.results_fingerprint = results_fingerprint
+
+    @classmethod
+    def from_results(cls, results_df, results_fingerprint=None):
+        """Build the cube of a results frame."""
+        return cls(cls.aggregate(results_df), results_fingerprint)
+
+    @staticmethod
+    def aggregate(results_df):
+        """
+        Aggregate results into cube rows.
+        
+        Rows keep the order in which their key first appears in results_df.
+        
+        Args:
+            results_df (pd.DataFrame): Results with bank, date, sentiment_label,
+                themes, rating and sentiment_score columns
+        
+        Returns:
+            pd.DataFrame: One row per distinct key with the ROLLUP_MEASURES
+        """
+        rating = results_df['rating'].astype(np.float64)
+        score = results_df['sentiment_score'].astype(np.float64)
+        frame = pd.DataFrame({
+            'bank': results_df['bank'].astype(object).to_numpy(),
+            'date': results_df['date'].astype(object).to_numpy(),
+            'sentiment_label': results_df['sentiment_label'].astype(object).to_numpy(),
+            'theme': [theme_key(themes) for themes in results_df['themes']],
+            'reviews': 1.0,
+            'rated': rating.notna().to_numpy(dtype=np.float64),
+            'rating_sum': rating.fillna(0.0).to_numpy(),
+            'scored': score.notna().to_numpy(dtype=np.float64),
+            'score_sum': score.fillna(0.0).to_numpy()
+        })
+        return frame.groupby(ROLLUP_KEYS, sort=False, dropna=False, as_index=False)[ROLLUP_MEASURES].sum()
+
+    def add(self, results_df):
+        """Add newly analyzed results to the cube."""
+        self._merge(self.aggregate(results_df), 1.0)
+
+    def remove(self, results_df):
+        """Remove results that were added before, e.g. reviews that were re-analyzed."""
+        self._merge(self.aggregate(results_df), -1.0)
+
+    def _merge(self, delta, sign):
+        if delta.empty:
+            return
+        delta[ROLLUP_MEASURES] *= sign
+        merged = pd.concat([self.cube, delta], ignore_index=True)
+        merged = merged.groupby(ROLLUP_KEYS, sort=False, dropna=False, as_index=False)[ROLLUP_MEASURES].sum()
+        self.cube = merged[merged['reviews'] > 0].reset_index(drop=True)
+
+    def save(self, path):
+        """
+        Write the cube as CSV, or as Parquet for a .parquet path.
+        
+        The results fingerprint is kept in the Parquet metadata, or on a
+        leading '# results_fingerprint=' line of the CSV.
+        """
+        if is_parquet(path):
+            cube = self.cube.copy()
+            cube.attrs[FINGERPRINT_KEY] = self.results_fingerprint
+            cube.to_parquet(path, index=False)
+        else:
+            with open(path, 'w', newline='') as f:
+                f.write(f"{FINGERPRINT_PREFIX}{self.results_fingerprint or ''}\n")
+                self.cube.to_csv(f, index=False)
+        logger.info(f"Rollup of {len(self.cube)} cells saved to {path}")
+
+    @classmethod
+    def load(cls, path):
+        """Read a cube written by save."""
+        if is_parquet(path):
+            cube = pd.read_parquet(path)
+            return cls(cube, cube.attrs.get(FINGERPRINT_KEY))
+        with open(path, newline='') as f:
+            first = f.readline()
+            if first.startswith(FINGERPRINT_PREFIX):
+                fingerprint = first[len(FINGERPRINT_PREFIX):].strip() or None
+            else:
+                # Rollups saved without a fingerprint start with the header
+                f.seek(0)
+                fingerprint = None
+            return cls(pd.read_csv(f), fingerprint)
+
+    def summary(self):
+        """
+        Compute the statistics of SentimentThematicAnalyzer.generate_summary.
+        
+        Returns:
+            dict: Total reviews, sentiment distribution, theme combinations
+                per bank and average sentiment score per bank
+        """
+        cube = self.cube
+        themes_by_bank = {}
+        for bank, cells in cube.groupby('bank', sort=False):
+            counts = _ranked(cells.groupby('theme', sort=False)['reviews'].sum())
+            themes_by_bank[bank] = {theme: int(count) for theme, count in counts.items()}
+        
+        sentiment = _ranked(cube.groupby('sentiment_label', sort=False)['reviews'].sum())
+        scores = cube.groupby('bank')[['score_sum', 'scored']].sum()
+        return {
+            'total_reviews': int(cube['reviews'].sum()),
+            'sentiment_distribution': {label: int(count) for label, count in sentiment.items()},
+            'themes_by_bank': themes_by_bank,
+            'average_sentiment_by_bank': (scores['score_sum'] / scores['scored']).to_dict()
+        }
+
+    def theme_counts(self, sentiment_label=None):
+        """
+        Count reviews per individual theme for every bank.
+        
+        Args:
+            sentiment_label (str, optional): Only count reviews with this sentiment
+        
+        Returns:
+            dict: Mapping of bank to a Counter of theme to number of reviews,
+                in the order themes first appear
+        """
+        cube = self.cube
+        counts = {bank: Counter() for bank in cube['bank'].unique()}
+        if sentiment_label is not None:
+            cube = cube[cube['sentiment_label'] == sentiment_label]
+        for bank, theme, reviews in zip(cube['bank'], cube['theme'], cube['reviews']):
+            if theme != NO_THEME:
+                for name in theme.split('|'):
+                    counts[bank][name] += int(reviews)
+        return counts
+
+    def top_themes(self, sentiment_label, top=2):
+        """
+        Find the most frequent themes per bank among reviews of one sentiment.
+        
+        Args:
+            sentiment_label (str): 'POSITIVE', 'NEGATIVE' or 'NEUTRAL'
+            top (int): Number of themes kept per bank
+        
+        Returns:
+            dict: Mapping of bank to {theme: number of reviews}
+        """
+        return {
+            bank: dict(counts.most_common(top))
+            for bank, counts in self.theme_counts(sentiment_label).items()
+        }
+
+    def daily(self, bank=None):
+        """
+        Sum the cube per bank and day, e.g. for dashboards.
+        
+        Args:
+            bank (str, optional): Only return this bank
+        
+        Returns:
+            pd.DataFrame: Reviews, average rating and average sentiment score
+                per bank and date
+        """
+        cube = self.cube if bank is None else self.cube[self.cube['bank'] == bank]
+        days = cube.groupby(['bank', 'date'], as_index=False)[ROLLUP_MEASURES].sum()
+        return pd.DataFrame({
+            'bank': days['bank'],
+            'date': days['date'],
+            'reviews': days['reviews'].astype(int),
+            'average_rating': days['rating_sum'] / days['rated'],
+            'average_sentiment': days['score_sum'] / days['scored']
+        })
+
+def _cell_signatures(results_df):
+    """Hash every result on its review_key and the values the cube aggregates."""
+    return pd.util.hash_pandas_object(pd.DataFrame({
+        'review_key': results_df['review_key'].to_numpy(),
+        'date': results_df['date'].astype(object).to_numpy(),
+        'rating': results_df['rating'].astype(np.float64).to_numpy(),
+        'sentiment_label': results_df['sentiment_label'].astype(object).to_numpy(),
+        'sentiment_score': results_df['sentiment_score'].astype(np.float64).to_numpy(),
+        'theme': [theme_key(themes) for themes in results_df['themes']]
+    }), index=False)
+
+def refresh_rollup(cube, previous_df, results_df):
+    """
+    Bring a cube built from previous results up to date with new results.
+    
+    Only results that are new, gone, or whose aggregated values changed
+    (e.g. a corrected rating) are added to or removed from the cube, so the
+    cost of the cube update follows the size of the change.
+    
+    Args:
+        cube (RollupCube): Cube of previous_df
+        previous_df (pd.DataFrame): Results the cube was built from
+        results_df (pd.DataFrame): Current results
+        
+    Returns:
+        RollupCube: Updated cube, rebuilt from results_df when previous_df
+            has no review_key column
+    """
+    if 'review_key' not in previous_df.columns:
+        return RollupCube.from_results(results_df)
+    previous = _cell_signatures(previous_df)
+    current = _cell_signatures(results_df)
+    cube.remove(previous_df[~previous.isin(current).to_numpy()])
+    cube.add(results_df[~current.isin(previous).to_numpy()])
+    return cube
@@ -0,0 +1,456 @@
+"""
+Full-text search index over analyzed reviews.
+
+Reviews are stored in a SQLite file with an FTS5 index of their text, so
+term and phrase queries are answered from the inverted index instead of
+scanning the results file. The bank, sentiment label, themes and date of
+every review are also indexed as tag tokens (e.g. bcbe, snegative,
+m202405), so text queries with filters are answered by intersecting posting
+lists; filters without text use B-tree indexes of the same tags, so both
+paths match filter values alike. Every review is identified by its
+review_key and carries a hash of its indexed values, not of its review_id
+position; syncing with a results file only writes reviews that are new or
+changed, renumbers moved ones in place and deletes reviews that are gone.
+
+Usage:
+    python -m scripts.analysis.sentiment_thematic.search build
+    python -m scripts.analysis.sentiment_thematic.search query '"otp code"' --bank CBE \\
+        --since 2024-05-01 --until 2024-05-07 --sentiment NEGATIVE
+"""
+
+import argparse
+from datetime import date, timedelta
+import logging
+from pathlib import Path
+import re
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from .incremental import review_keys
+from .storage import iter_results, locate_results
+
+logger = logging.getLogger(__name__)
+
+# Default location of the index, next to the results
+DEFAULT_INDEX_NAME = 'review_search.sqlite'
+
+# Columns returned by SearchIndex.search
+RESULT_COLUMNS = ['review_id', 'bank', 'date', 'rating', 'sentiment_label', 'sentiment_score', 'themes', 'review_text']
+
+# Number of reviews written per transaction
+DEFAULT_WRITE_BATCH_SIZE = 50000
+
+# Version of SCHEMA_SQL; index files of another version are rebuilt
+SCHEMA_VERSION = 2
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    review_key TEXT NOT NULL UNIQUE,
+    row_hash INTEGER NOT NULL,
+    review_id INTEGER,
+    bank TEXT,
+    date TEXT,
+    rating REAL,
+    sentiment_label TEXT,
+    sentiment_score REAL,
+    themes TEXT,
+    review_text TEXT,
+    tags TEXT,
+    bank_tag TEXT,
+    sentiment_tag TEXT
+);
+CREATE INDEX IF NOT EXISTS reviews_filter_ix ON reviews (bank_tag, date, sentiment_tag);
+CREATE INDEX IF NOT EXISTS reviews_date_ix ON reviews (date);
+CREATE TABLE IF NOT EXISTS review_themes (
+    theme_tag TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (theme_tag, id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS review_fts USING fts5(
+    review_text, tags, content='reviews', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS reviews_insert AFTER INSERT ON reviews BEGIN
+    INSERT INTO review_fts (rowid, review_text, tags) VALUES (new.id, new.review_text, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS reviews_delete AFTER DELETE ON reviews BEGIN
+    INSERT INTO review_fts (review_fts, rowid, review_text, tags) VALUES ('delete', old.id, old.review_text, old.tags);
+    DELETE FROM review_themes WHERE id = old.id;
+END;
+"""
+
+DROP_SQL = """
+DROP TRIGGER IF EXISTS reviews_insert;
+DROP TRIGGER IF EXISTS reviews_delete;
+DROP TABLE IF EXISTS review_fts;
+DROP TABLE IF EXISTS review_themes;
+DROP TABLE IF EXISTS reviews;
+"""
+
+_NON_WORD = re.compile(r'\W+')
+
+def _theme_text(themes):
+    return '|'.join(themes) if isinstance(themes, (list, tuple)) else ''
+
+def tag(prefix, value):
+    """Tag token of a filter value, e.g. tag('b', 'CBE') == 'bcbe'."""
+    return prefix + _NON_WORD.sub('', str(value).casefold())
+
+def review_tags(bank, sentiment_label, themes, review_date):
+    """
+    Tag tokens of one review: bank, sentiment label, themes and the year,
+    month and day of its date.
+    """
+    tags = [tag('b', bank), tag('s', sentiment_label)] + [tag('t', theme) for theme in themes]
+    if isinstance(review_date, str) and len(review_date) == 10:
+        day = review_date.replace('-', '')
+        tags += [f'y{day[:4]}', f'm{day[:6]}', f'd{day}']
+    return ' '.join(tags)
+
+def date_terms(since, until):
+    """
+    Cover a date range with as few year, month and day tags as possible.
+    
+    Args:
+        since (date): First day
+        until (date): Last day
+    
+    Returns:
+        list: Tag tokens whose reviews together are the reviews of the range
+    """
+    terms = []
+    day = since
+    while day <= until:
+        next_year = date(day.year + 1, 1, 1)
+        next_month = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        if day.month == 1 and day.day == 1 and next_year - timedelta(days=1) <= until:
+            terms.append(f'y{day:%Y}')
+            day = next_year
+        elif day.day == 1 and next_month - timedelta(days=1) <= until:
+            terms.append(f'm{day:%Y%m}')
+            day = next_month
+        else:
+            terms.append(f'd{day:%Y%m%d}')
+            day += timedelta(days=1)
+    return terms
+
+class SearchIndex:
+    """SQLite FTS5 index of review texts with bank, date, sentiment and theme filters."""
+
+    def __init__(self, path):
+        """
+        Open or create an index.
+        
+        Args:
+            path (str or Path): SQLite file of the index, ':memory:' for a
+                temporary one
+        """
+        self.path = path
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version:
+                logger.info(f"Rebuilding search index of schema version {version} at {path}")
+            self._db.executescript(DROP_SQL)
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA_SQL)
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+    def close(self):
+        """Close the index."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _rows(results_df, text_column):
+        """
+        Convert results to index rows.
+        
+        The row hash covers the indexed text and filter values only;
+        review_id is a position in the results file and changes whenever an
+        earlier review is added or removed.
+        
+        Returns:
+            pd.DataFrame: review_key, row_hash and the indexed columns
+        """
+        keys = results_df['review_key'] if 'review_key' in results_df.columns \
+            else review_keys(results_df, text_column)
+        rows = pd.DataFrame({
+            'review_key': keys.to_numpy(dtype=object),
+            'review_id': results_df['review_id'].to_numpy() if 'review_id' in results_df.columns else None,
+            'bank': results_df['bank'].astype(object).to_numpy(),
+            'date': results_df['date'].astype(object).to_numpy(),
+            'rating': results_df['rating'].astype(np.float64).to_numpy(),
+            'sentiment_label': results_df['sentiment_label'].astype(object).to_numpy(),
+            'sentiment_score': results_df['sentiment_score'].astype(np.float64).to_numpy(),
+            'themes': [_theme_text(themes) for themes in results_df['themes']],
+            'review_text': results_df[text_column].astype(object).to_numpy()
+        })
+        hashes = pd.util.hash_pandas_object(rows.drop(columns=['review_key', 'review_id']), index=False)
+        rows.insert(1, 'row_hash', hashes.to_numpy().view(np.int64))
+        rows['bank_tag'] = [tag('b', bank) for bank in rows['bank']]
+        rows['sentiment_tag'] = [tag('s', label) for label in rows['sentiment_label']]
+        rows['tags'] = [
+            review_tags(bank, label, themes, review_date)
+            for bank, label, themes, review_date in zip(rows['bank'], rows['sentiment_label'],
+                                                         results_df['themes'], rows['date'])
+        ]
+        # Keep the last result of a review analyzed twice in one frame
+        return rows.drop_duplicates('review_key', keep='last')
+
+    def _stored_rows(self, keys):
+        """Look up the stored row hash and review_id of review keys."""
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_keys (review_key TEXT PRIMARY KEY)")
+        self._db.execute("DELETE FROM lookup_keys")
+        self._db.executemany("INSERT OR IGNORE INTO lookup_keys VALUES (?)", ((key,) for key in keys))
+        return {key: (row_hash, review_id) for key, row_hash, review_id in self._db.execute(
+            "SELECT r.review_key, r.row_hash, r.review_id FROM lookup_keys k "
+            "JOIN reviews r ON r.review_key = k.review_key"
+        )}
+
+    def add(self, results_df, text_column='review_text'):
+        """
+        Index new or re-analyzed results; unchanged reviews are skipped.
+        
+        Reviews whose only change is their review_id are renumbered in
+        place without touching the full-text index.
+        
+        Args:
+            results_df (pd.DataFrame): Results with bank, date, rating,
+                sentiment_label, sentiment_score, themes and text columns,
+                and optionally review_key and review_id
+            text_column (str): Column holding the review text
+        
+        Returns:
+            int: Number of reviews written to the full-text index
+        """
+        rows = self._rows(results_df, text_column)
+        stored = self._stored_rows(rows['review_key'])
+        missing = (None, None)
+        is_changed = np.array([
+            stored.get(key, missing)[0] != row_hash for key, row_hash in zip(rows['review_key'], rows['row_hash'])
+        ], dtype=bool)
+        changed = rows[is_changed]
+        moved = [
+            (review_id, key)
+            for key, review_id in zip(rows['review_key'][~is_changed].tolist(), rows['review_id'][~is_changed].tolist())
+            if stored[key][1] != review_id
+        ]
+        if moved:
+            with self._db:
+                self._db.executemany("UPDATE reviews SET review_id = ? WHERE review_key = ?", moved)
+        if changed.empty:
+            return 0
+        
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM reviews WHERE review_key = ?",
+                ((key,) for key in changed['review_key'] if key in stored)
+            )
+            first_id = self._db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM reviews").fetchone()[0]
+            ids = list(range(first_id, first_id + len(changed)))
+            columns = ['id'] + list(changed.columns)
+            self._db.executemany(
+                f"INSERT INTO reviews ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                zip(ids, *(changed[column].tolist() for column in changed.columns))
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO review_themes (theme_tag, id) VALUES (?, ?)",
+                ((tag('t', theme), row) for row, themes in zip(ids, changed['themes']) if themes
+                 for theme in themes.split('|'))
+            )
+        return len(changed)
+
+    def remove(self, keys):
+        """
+        Drop reviews from the index.
+        
+        Args:
+            keys (iterable): Review keys to drop
+        
+        Returns:
+            int: Number of reviews dropped
+        """
+        with self._db:
+            cursor = self._db.executemany("DELETE FROM reviews WHERE review_key = ?", ((key,) for key in keys))
+        return cursor.rowcount
+
+    def sync(self, results_path, text_column='review_text', chunk_size=DEFAULT_WRITE_BATCH_SIZE):
+        """
+        Bring the index up to date with a results file.
+        
+        The file is read in chunks; only new and changed reviews are
+        written, and reviews no longer in the file are dropped.
+        
+        Args:
+            results_path (str or Path): Results written by write_results
+            text_column (str): Column holding the review text
+            chunk_size (int): Number of results read and written at a time
+        
+        Returns:
+            dict: Number of reviews written and dropped
+        """
+        written = 0
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS seen_keys (review_key TEXT PRIMARY KEY)")
+        self._db.execute("DELETE FROM seen_keys")
+        for results_df in iter_results(results_path, chunk_size=chunk_size):
+            written += self.add(results_df, text_column)
+            self._db.execute("INSERT OR IGNORE INTO seen_keys SELECT review_key FROM lookup_keys")
+            logger.info(f"Indexed {written} new or changed reviews")
+        
+        gone = [key for (key,) in self._db.execute(
+            "SELECT review_key FROM reviews WHERE review_key NOT IN (SELECT review_key FROM seen_keys)"
+        )]
+        dropped = self.remove(gone) if gone else 0
+        self._db.execute("DELETE FROM seen_keys")
+        self.optimize()
+        return {'written': written, 'dropped': dropped}
+
+    def optimize(self):
+        """Merge the FTS index segments, e.g. after a large update."""
+        with self._db:
+            self._db.execute("INSERT INTO review_fts (review_fts) VALUES ('optimize')")
+
+    def search(self, query=None, bank=None, since=None, until=None, sentiment=None, theme=None, limit=20):
+        """
+        Find reviews by text and filters.
+        
+        Bank, sentiment and theme filters match like tags: case and
+        punctuation are ignored, so bank='cbe' finds CBE reviews.
+        
+        Args:
+            query (str, optional): FTS5 query: terms (otp crash), phrases
+                ("can't login"), prefixes (crash*), OR and NOT
+            bank (str, optional): Only reviews of this bank
+            since (str, optional): First review date, YYYY-MM-DD
+            until (str, optional): Last review date, YYYY-MM-DD
+            sentiment (str, optional): Only reviews with this sentiment label
+            theme (str, optional): Only reviews with this theme
+            limit (int, optional): Maximum number of reviews, None for all
+        
+        Returns:
+            pd.DataFrame: Matching reviews with RESULT_COLUMNS, best text
+                matches first, else newest first
+        """
+        sql, params = self._select(query, bank, since, until, sentiment, theme)
+        columns = ', '.join(f'r.{column}' for column in RESULT_COLUMNS)
+        order = 'f.rank, r.id' if query else 'r.date DESC, r.id'
+        sql = f"SELECT {columns} FROM {sql} ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        results_df = pd.DataFrame(self._execute(sql, params, query).fetchall(), columns=RESULT_COLUMNS)
+        results_df['themes'] = [themes.split('|') if themes else [] for themes in results_df['themes']]
+        return results_df
+
+    def count(self, query=None, bank=None, since=None, until=None, sentiment=None, theme=None):
+        """Count the reviews search would find without a limit."""
+        sql, params = self._select(query, bank, since, until, sentiment, theme)
+        return self._execute(f"SELECT COUNT(*) FROM {sql}", params, query).fetchone()[0]
+
+    def _select(self, query, bank, since, until, sentiment, theme):
+        """Build the FROM and WHERE clauses of a search."""
+        if query:
+            # Filters become tag terms of the FTS query; CROSS JOIN makes
+            # SQLite start from the FTS matches
+            terms = [f'review_text : ({query})']
+            for prefix, value in [('b', bank), ('s', sentiment), ('t', theme)]:
+                if value is not None:
+                    terms.append(f'tags : {tag(prefix, value)}')
+            if since is not None or until is not None:
+                terms.append(f"tags : ({' OR '.join(self._date_terms(since, until))})")
+            tables = "(SELECT rowid, rank FROM review_fts WHERE review_fts MATCH ?) f " \
+                "CROSS JOIN reviews r ON r.id = f.rowid"
+            return tables, [' AND '.join(terms)]
+        
+        conditions, params = [], []
+        for condition, value in [("r.bank_tag = ?", bank and tag('b', bank)), ("r.date >= ?", since),
+                                 ("r.date <= ?", until), ("r.sentiment_tag = ?", sentiment and tag('s', sentiment))]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        if theme is not None:
+            conditions.append("r.id IN (SELECT id FROM review_themes WHERE theme_tag = ?)")
+            params.append(tag('t', theme))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return "reviews r" + where, params
+
+    def _date_terms(self, since, until):
+        """Date tags of a range, open ends bounded by the dates in the index."""
+        first, last = self._db.execute("SELECT MIN(date), MAX(date) FROM reviews").fetchone()
+        since = date.fromisoformat(since) if since is not None else date.fromisoformat(first or '2000-01-01')
+        until = date.fromisoformat(until) if until is not None else date.fromisoformat(last or '2000-01-01')
+        # A range without days still needs a term, one that matches nothing
+        return date_terms(since, until) or ['d0']
+
+    def _execute(self, sql, params, query):
+        """Run a search, reporting FTS5 syntax errors of the query as ValueError."""
+        try:
+            return self._db.execute(sql, params)
+        except sqlite3.OperationalError as error:
+            if query:
+                raise ValueError(f"Invalid search query {query!r}: {error}") from error
+            raise
+
+def default_index_path():
+    """Index file next to the results in data/analysis/sentiment_thematic."""
+    return Path(__file__).parent.parent.parent.parent / "data" / "analysis" / "sentiment_thematic" / DEFAULT_INDEX_NAME
+
+def main(argv=None):
+    """Build or query the review search index."""
+    parser = argparse.ArgumentParser(description="Search analyzed reviews.")
+    parser.add_argument('--index', type=Path, default=None,
+                        help=f"Index file (default: {DEFAULT_INDEX_NAME} next to the results)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Create or update the index from a results file")
+    build.add_argument('--results', type=Path, default=None,
+                       help="Results file (default: the sentiment_thematic results)")
+    build.add_argument('--text-column', default='review_text', help="Column holding the review text")
+
+    query = commands.add_parser('query', help="Search the index")
+    query.add_argument('query', nargs='?', default=None,
+                       help='FTS5 query, e.g. otp, "cannot login" or crash* NOT update')
+    query.add_argument('--bank', default=None)
+    query.add_argument('--since', default=None, help="First date, YYYY-MM-DD")
+    query.add_argument('--until', default=None, help="Last date, YYYY-MM-DD")
+    query.add_argument('--sentiment', default=None, help="POSITIVE, NEUTRAL or NEGATIVE")
+    query.add_argument('--theme', default=None)
+    query.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    index_path = args.index if args.index is not None else default_index_path()
+    with SearchIndex(index_path) as index:
+        if args.command == 'build':
+            results_path = args.results if args.results is not None else locate_results(index_path.parent)
+            counts = index.sync(results_path, text_column=args.text_column)
+            logger.info(f"Index of {len(index)} reviews at {index_path}: {counts}")
+            return
+        
+        filters = dict(bank=args.bank, since=args.since, until=args.until, sentiment=args.sentiment, theme=args.theme)
+        start = time.perf_counter()
+        results_df = index.search(args.query, limit=args.limit, **filters)
+        total = index.count(args.query, **filters)
+        elapsed = time.perf_counter() - start
+        for row in results_df.itertuples(index=False):
+            print(f"[{row.bank} {row.date} {row.sentiment_label}] {row.review_text}")
+        print(f"{len(results_df)} of {total} matching reviews in {elapsed * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
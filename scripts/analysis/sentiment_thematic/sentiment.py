@@ -0,0 +1,300 @@
+"""
+Sentiment scoring backends.
+
+Every backend turns a batch of review texts into the four sentiment result
+columns (label, score, vader_score, textblob_score). Scores a backend does
+not compute are NaN. Backends are registered by name in SENTIMENT_BACKENDS
+so each run can pick its own speed/accuracy trade-off:
+
+- combined: average of VADER compound and TextBlob polarity (the original scoring)
+- vader: VADER compound only
+- textblob: TextBlob polarity only
+- lexicon: VADER's word valences summed over already tokenized batches with NumPy;
+  its signed compound score is stored as vader_score
+
+The score column holds the absolute score; the signed score is kept in the
+vader_score and textblob_score columns the backend computes.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from textblob import TextBlob
+from vaderSentiment.vaderSentiment import NEGATE, N_SCALAR, SentimentIntensityAnalyzer
+
+from .tokenizer import KeywordArray, Vocabulary, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Combined scores at or beyond these thresholds are POSITIVE or NEGATIVE
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+DEFAULT_SENTIMENT_BACKEND = 'combined'
+
+# Label of reviews no backend scored, e.g. reviews in another language
+UNSCORED_LABEL = 'UNSCORED'
+
+def sentiment_label(score):
+    """
+    Label a signed sentiment score.
+    
+    Args:
+        score (float): Score between -1 and 1
+    
+    Returns:
+        str: POSITIVE, NEGATIVE or NEUTRAL
+    """
+    if score >= POSITIVE_THRESHOLD:
+        return 'POSITIVE'
+    if score <= NEGATIVE_THRESHOLD:
+        return 'NEGATIVE'
+    return 'NEUTRAL'
+
+class SentimentBackend:
+    """
+    Base class of the sentiment backends.
+    
+    Subclasses score one text in polarities(), or override score_batch() to
+    score whole batches at once.
+    """
+
+    name = None
+
+    def polarities(self, text):
+        """
+        Score a single text.
+        
+        Args:
+            text (str): The text to analyze
+        
+        Returns:
+            tuple: (signed score, vader_score, textblob_score)
+        """
+        raise NotImplementedError
+
+    def score(self, text):
+        """
+        Score a single text and return the sentiment fields as a tuple.
+        
+        Args:
+            text (str): The text to analyze
+        
+        Returns:
+            tuple: (label, score, vader_score, textblob_score)
+        """
+        try:
+            combined_score, vader_score, textblob_score = self.polarities(text)
+            # Use absolute value for confidence
+            return sentiment_label(combined_score), abs(combined_score), vader_score, textblob_score
+        except Exception as e:
+            logger.error(f"Error in sentiment analysis: {str(e)}")
+            return 'ERROR', 0.0, 0.0, 0.0
+
+    def score_batch(self, texts, tokens=None):
+        """
+        Score a batch of texts.
+        
+        Args:
+            texts (sequence): Review texts
+            tokens (list, optional): TokenizedText record of every text, for
+                backends that work on words
+        
+        Returns:
+            tuple: Sequences of labels, scores, vader_scores and textblob_scores
+        """
+        if len(texts) == 0:
+            return (), (), (), ()
+        return tuple(zip(*[self.score(text) for text in texts]))
+
+class VaderBackend(SentimentBackend):
+    """VADER compound score."""
+
+    name = 'vader'
+
+    def __init__(self):
+        self.vader = SentimentIntensityAnalyzer()
+
+    def polarities(self, text):
+        compound = self.vader.polarity_scores(text)['compound']
+        return compound, compound, np.nan
+
+class TextBlobBackend(SentimentBackend):
+    """TextBlob pattern analyzer polarity."""
+
+    name = 'textblob'
+
+    def polarities(self, text):
+        polarity = TextBlob(text).sentiment.polarity
+        return polarity, np.nan, polarity
+
+class CombinedBackend(SentimentBackend):
+    """Average of the VADER compound score and the TextBlob polarity."""
+
+    name = 'combined'
+
+    def __init__(self):
+        self.vader = SentimentIntensityAnalyzer()
+
+    def polarities(self, text):
+        # VADER sentiment analysis
+        vader_score = self.vader.polarity_scores(text)['compound']
+        
+        # TextBlob sentiment analysis
+        textblob_score = TextBlob(text).sentiment.polarity
+        
+        # Combine scores (weighted average)
+        return (vader_score + textblob_score) / 2, vader_score, textblob_score
+
+class LexiconBackend(SentimentBackend):
+    """
+    Vectorized lexicon scorer.
+    
+    Sums the VADER valence of every word, scaled by N_SCALAR for each
+    negation among the three preceding words, and normalizes the sum the way
+    VADER does: s / sqrt(s^2 + alpha). Casing, punctuation emphasis, boosters
+    and "but" clauses are ignored, which is what makes it cheap: a batch is
+    scored with a few array operations over vocabulary ids.
+    """
+
+    name = 'lexicon'
+
+    # VADER's normalization constant
+    ALPHA = 15
+
+    # Words looked back on for negation
+    NEGATION_WINDOW = 3
+
+    def __init__(self):
+        self.lexicon = SentimentIntensityAnalyzer().lexicon
+        # "t" is what remains of "n't" once "don't" is split into words
+        self.negations = frozenset(word for word in NEGATE if word.isalnum()) | {'t'}
+        self.vocabulary = Vocabulary()
+        self.valence = np.zeros(0, dtype=np.float64)
+        self.negating = np.zeros(0, dtype=bool)
+
+    def _extend_tables(self):
+        """Look up the valence and negation flag of words added to the vocabulary."""
+        new = self.vocabulary.tokens[len(self.valence):]
+        if new:
+            self.valence = np.concatenate([self.valence, [self.lexicon.get(word, 0.0) for word in new]])
+            self.negating = np.concatenate([self.negating, [word in self.negations for word in new]])
+
+    def compound(self, tokens):
+        """
+        Compute the signed score of tokenized texts.
+        
+        Args:
+            tokens (list): TokenizedText record of every text
+        
+        Returns:
+            np.ndarray: Score between -1 and 1 per text
+        """
+        words = KeywordArray.from_lists((record.words for record in tokens), self.vocabulary)
+        self._extend_tables()
+        ids, offsets = words.ids, words.offsets
+        n = len(words)
+        rows = np.repeat(np.arange(n), np.diff(offsets))
+        
+        # Count negations among the preceding words of the same review
+        negating = self.negating[ids]
+        negations = np.zeros(len(ids), dtype=np.int64)
+        for k in range(1, self.NEGATION_WINDOW + 1):
+            negations[k:] += negating[:-k] & (rows[k:] == rows[:-k])
+        
+        values = self.valence[ids] * np.power(N_SCALAR, negations)
+        sums = np.bincount(rows, weights=values, minlength=n)
+        return np.clip(sums / np.sqrt(sums * sums + self.ALPHA), -1.0, 1.0)
+
+    def score_batch(self, texts, tokens=None):
+        if tokens is None:
+            tokens = [tokenize(text) for text in texts]
+        compound = self.compound(tokens)
+        labels = np.where(
+            compound >= POSITIVE_THRESHOLD, 'POSITIVE',
+            np.where(compound <= NEGATIVE_THRESHOLD, 'NEGATIVE', 'NEUTRAL')
+        ).astype(object)
+        # The compound is a VADER-style score, kept signed as vader_score
+        return labels, np.abs(compound), compound, np.full(len(compound), np.nan)
+
+    def score(self, text):
+        labels, scores, vader_scores, textblob_scores = self.score_batch([text])
+        return labels[0], float(scores[0]), vader_scores[0], textblob_scores[0]
+
+# Available backends by name
+SENTIMENT_BACKENDS = {
+    backend.name: backend
+    for backend in (CombinedBackend, VaderBackend, TextBlobBackend, LexiconBackend)
+}
+
+def create_sentiment_backend(name=None):
+    """
+    Instantiate a sentiment backend by name.
+    
+    Args:
+        name (str, optional): One of SENTIMENT_BACKENDS, defaults to
+            DEFAULT_SENTIMENT_BACKEND
+    
+    Returns:
+        SentimentBackend: New backend instance
+    """
+    name = DEFAULT_SENTIMENT_BACKEND if name is None else name
+    if name not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {name!r}, expected one of {sorted(SENTIMENT_BACKENDS)}")
+    return SENTIMENT_BACKENDS[name]()
+
+def signed_scores(results_df):
+    """
+    Recover signed scores from the vader_score and textblob_score columns.
+    
+    The signed score is the mean of the backend's component scores, as in
+    CombinedBackend. Rows without any component score, e.g. results of
+    another tool, fall back to the absolute score signed by the label,
+    which is wrong for NEUTRAL reviews with a small negative score.
+    
+    Args:
+        results_df (pd.DataFrame): Results with sentiment columns
+    
+    Returns:
+        np.ndarray: Signed score between -1 and 1 per row
+    """
+    components = [
+        results_df[column].to_numpy(dtype=np.float64)
+        for column in ('vader_score', 'textblob_score') if column in results_df.columns
+    ]
+    sign = np.where(results_df['sentiment_label'] == 'NEGATIVE', -1.0, 1.0)
+    signed = sign * results_df['sentiment_score'].to_numpy(dtype=np.float64)
+    if components:
+        components = np.vstack(components)
+        present = ~np.isnan(components)
+        counts = present.sum(axis=0)
+        means = np.where(present, components, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        signed = np.where(counts > 0, means, signed)
+    return signed
+
+def agreement(reference_df, candidate_df):
+    """
+    Compare the sentiment columns of two scorings of the same reviews.
+    
+    Args:
+        reference_df (pd.DataFrame): Reference results, e.g. from the combined backend
+        candidate_df (pd.DataFrame): Results of the backend under evaluation
+    
+    Returns:
+        dict: label_agreement (share of equal labels), score_correlation
+            (Pearson correlation of the signed scores of reviews both
+            scored) and confusion
+            (DataFrame of reference labels by candidate labels)
+    """
+    reference = reference_df['sentiment_label'].to_numpy()
+    candidate = candidate_df['sentiment_label'].to_numpy()
+    reference_scores, candidate_scores = signed_scores(reference_df), signed_scores(candidate_df)
+    scored = ~(np.isnan(reference_scores) | np.isnan(candidate_scores))
+    return {
+        'label_agreement': float(np.mean(reference == candidate)) if len(reference) else float('nan'),
+        'score_correlation': float(np.corrcoef(reference_scores[scored], candidate_scores[scored])[0, 1]),
+        'confusion': pd.crosstab(
+            pd.Series(reference, name='reference'), pd.Series(candidate, name='candidate')
+        )
+    }
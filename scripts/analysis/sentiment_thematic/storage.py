@@ -0,0 +1,217 @@
+"""
+Reading and writing sentiment and thematic analysis results.
+
+Results can be stored as CSV or as Parquet. In Parquet files keywords and
+themes are real list<string> columns and low-cardinality text columns are
+dictionary-encoded, so loaders read them back without re-parsing and can
+project only the columns they need.
+"""
+
+import ast
+import hashlib
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# File name of the results, without suffix
+RESULTS_STEM = 'sentiment_thematic_results'
+
+# Columns holding lists of strings
+LIST_COLUMNS = ['keywords', 'themes']
+
+# Columns stored dictionary-encoded in Parquet
+CATEGORICAL_COLUMNS = ['bank', 'source', 'sentiment_label']
+
+def _import_pyarrow():
+    """Import pyarrow, which is only needed for Parquet results."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("Parquet results require pyarrow: pip install pyarrow") from error
+    return pa, pq
+
+def is_parquet(path):
+    """Tell whether a results path uses the Parquet format."""
+    return Path(path).suffix == '.parquet'
+
+def locate_results(directory):
+    """
+    Find the results file in a directory, preferring Parquet over CSV.
+    
+    Args:
+        directory (str or Path): Directory holding the results
+        
+    Returns:
+        Path: Path of the Parquet results if present, else of the CSV results
+    """
+    parquet_path = Path(directory) / f'{RESULTS_STEM}.parquet'
+    return parquet_path if parquet_path.exists() else Path(directory) / f'{RESULTS_STEM}.csv'
+
+def results_fingerprint(path, block_size=1 << 20):
+    """
+    Hash the bytes of a results file, e.g. to tell whether a rollup was built from it.
+    
+    Args:
+        path (str or Path): Results file
+        block_size (int): Bytes read at a time
+        
+    Returns:
+        str: Hex digest of the file, None if it does not exist
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _results_table(results_df):
+    """Convert results to an Arrow table with list and dictionary columns."""
+    pa, _ = _import_pyarrow()
+    arrays = []
+    for column in results_df.columns:
+        values = results_df[column]
+        if column in LIST_COLUMNS:
+            arrays.append(pa.array([list(value) for value in values], type=pa.list_(pa.string())))
+        elif column in CATEGORICAL_COLUMNS:
+            arrays.append(pa.Array.from_pandas(values.astype(object), type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.Array.from_pandas(values))
+    return pa.Table.from_arrays(arrays, names=[str(column) for column in results_df.columns])
+
+def write_results(results_df, output_path):
+    """
+    Write results as CSV or Parquet depending on the file suffix.
+    
+    Args:
+        results_df (pd.DataFrame): DataFrame containing results
+        output_path (str or Path): Path to save results
+    """
+    if not is_parquet(output_path):
+        results_df.to_csv(output_path, index=False)
+        return
+    
+    _, pq = _import_pyarrow()
+    pq.write_table(_results_table(results_df), output_path)
+
+class ResultsWriter:
+    """
+    Append results to a CSV or Parquet file chunk by chunk.
+    
+    Every chunk must have the same columns; Parquet chunks are cast to the
+    schema of the first one and written as separate row groups.
+    """
+    
+    def __init__(self, output_path):
+        """
+        Initialize the writer.
+        
+        Args:
+            output_path (str or Path): Path to save results, replaced if it exists
+        """
+        self.output_path = Path(output_path)
+        self.rows = 0
+        self._parquet_writer = None
+        if self.output_path.exists():
+            self.output_path.unlink()
+
+    def write(self, results_df):
+        """
+        Append a chunk of results.
+        
+        Args:
+            results_df (pd.DataFrame): DataFrame containing results
+        """
+        if is_parquet(self.output_path):
+            _, pq = _import_pyarrow()
+            table = _results_table(results_df)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        else:
+            results_df.to_csv(self.output_path, mode='a', header=self.rows == 0, index=False)
+        self.rows += len(results_df)
+
+    def close(self):
+        """Finish the file."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_results(input_path, columns=None, dtype=None):
+    """
+    Read results written by write_results.
+    
+    Args:
+        input_path (str or Path): Path of the saved results
+        columns (list, optional): Columns to load, all columns by default
+        dtype (dict, optional): Column -> dtype of loaded columns, e.g.
+            'category' for repetitive strings
+        
+    Returns:
+        pd.DataFrame: DataFrame containing results, with keywords and themes
+            as lists
+    """
+    if is_parquet(input_path):
+        _, pq = _import_pyarrow()
+        return _table_frame(pq.read_table(input_path, columns=columns), dtype)
+    
+    return _parse_list_columns(pd.read_csv(input_path, usecols=columns, dtype=dtype))
+
+def iter_results(input_path, columns=None, chunk_size=100000):
+    """
+    Read results written by write_results in chunks of bounded size.
+    
+    Args:
+        input_path (str or Path): Path of the saved results
+        columns (list, optional): Columns to load, all columns by default
+        chunk_size (int): Maximum number of results per chunk
+        
+    Yields:
+        pd.DataFrame: Consecutive results, with keywords and themes as lists
+    """
+    if is_parquet(input_path):
+        pa, pq = _import_pyarrow()
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield _table_frame(pa.Table.from_batches([batch]))
+        return
+    
+    for chunk in pd.read_csv(input_path, usecols=columns, chunksize=chunk_size):
+        yield _parse_list_columns(chunk)
+
+def _table_frame(table, dtype=None):
+    """Convert an Arrow table of results to a DataFrame with list columns."""
+    results_df = table.drop_columns(
+        [column for column in LIST_COLUMNS if column in table.column_names]
+    ).to_pandas()
+    for column in LIST_COLUMNS:
+        if column in table.column_names:
+            results_df[column] = table.column(column).to_pylist()
+    results_df = results_df[table.column_names]
+    if dtype:
+        results_df = results_df.astype(
+            {column: kind for column, kind in dtype.items() if column in results_df.columns}
+        )
+    return results_df
+
+def _parse_list_columns(results_df):
+    """Parse the list columns of results read from CSV."""
+    for column in LIST_COLUMNS:
+        if column in results_df.columns:
+            results_df[column] = [
+                ast.literal_eval(value) if isinstance(value, str) else []
+                for value in results_df[column]
+            ]
+    return results_df
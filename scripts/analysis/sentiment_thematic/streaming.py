@@ -0,0 +1,67 @@
+"""
+Streaming pipeline from raw reviews to analysis results.
+
+The raw CSV is read in bounded chunks. Each chunk is deduplicated against
+everything seen before, cleaned, analyzed and appended to the output files,
+so peak memory depends on the chunk size rather than on the number of
+reviews. The only state that grows is one 64-bit digest per distinct review
+kept for cross-chunk deduplication.
+"""
+
+import logging
+
+import pandas as pd
+
+from scripts.preprocessing.preprocess_reviews import preprocess_chunks
+from .incremental import review_keys
+from .storage import ResultsWriter
+
+logger = logging.getLogger(__name__)
+
+# Default number of raw reviews read per chunk
+DEFAULT_CHUNK_SIZE = 50000
+
+def stream_reviews(analyzer, raw_path, results_path, cleaned_path=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, rollup=None, detect_language=False,
+                   near_duplicates=None, **kwargs):
+    """
+    Preprocess and analyze raw reviews chunk by chunk.
+    
+    Review ids are positions in the cleaned output, as if reviews_cleaned.csv
+    had been written first and then analyzed in one go.
+    
+    Args:
+        analyzer (SentimentThematicAnalyzer): Analyzer used for every chunk
+        raw_path (str or Path): Raw reviews CSV
+        results_path (str or Path): Results file, CSV or Parquet
+        cleaned_path (str or Path, optional): CSV receiving the cleaned reviews
+        chunk_size (int): Number of raw reviews read per chunk
+        rollup (RollupCube, optional): Cube every chunk of results is added to
+        detect_language (bool): Tag each review with its language, so that
+            reviews the English analyzers cannot read skip sentiment scoring
+        near_duplicates (str, optional): 'flag' to add a cluster_id column
+            grouping near-duplicate reviews, 'collapse' to also analyze only
+            the first review of every cluster
+        **kwargs: Passed on to analyzer.process_reviews
+        
+    Returns:
+        int: Number of reviews analyzed
+    """
+    cleaned_writer = ResultsWriter(cleaned_path) if cleaned_path is not None else None
+    with ResultsWriter(results_path) as results_writer:
+        for reviews_df in preprocess_chunks(raw_path, chunk_size, detect_language, near_duplicates):
+            offset = results_writer.rows
+            reviews_df.index = pd.RangeIndex(offset, offset + len(reviews_df))
+            
+            results_df = analyzer.process_reviews(reviews_df, **kwargs)
+            results_df.insert(1, 'review_key', review_keys(reviews_df).to_numpy())
+            results_writer.write(results_df)
+            if rollup is not None:
+                rollup.add(results_df)
+            if cleaned_writer is not None:
+                cleaned_writer.write(reviews_df)
+            logger.info(f"Analyzed {results_writer.rows} reviews")
+    
+    if cleaned_writer is not None:
+        cleaned_writer.close()
+    return results_writer.rows
@@ -0,0 +1,78 @@
+"""
+Summary statistics of analysis results.
+
+Bank, sentiment label and theme combination are factorized once into
+integer codes, and every count is taken in a single bincount over the
+combined (bank, label, theme) cell code instead of masking the frame once
+per bank. The input frame is never modified.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .rollup import NO_THEME
+
+def _codes(values):
+    """Factorize values in order of first appearance, ignoring unused categories."""
+    codes, uniques = pd.factorize(values, sort=False)
+    return codes, list(uniques)
+
+def _ranked(names, counts):
+    """Order counts like value_counts: descending, first-seen order for ties, zeros dropped."""
+    order = np.argsort(-counts, kind='stable')
+    return {names[i]: int(counts[i]) for i in order if counts[i] > 0}
+
+def theme_strings(themes):
+    """
+    Join theme lists into the theme combination keys of the summary.
+    
+    Args:
+        themes (pd.Series): Lists of themes
+    
+    Returns:
+        pd.Series: '|'-joined themes, 'No Theme' for empty lists
+    """
+    return pd.Series(['|'.join(names) or NO_THEME for names in themes], index=themes.index, dtype=object)
+
+def summarize(results_df):
+    """
+    Compute summary statistics from results.
+    
+    Produces the same statistics, in the same order, as the per-bank loop
+    generate_summary used before. Categorical bank and label columns are
+    supported and only observed categories are reported.
+    
+    Args:
+        results_df (pd.DataFrame): DataFrame containing results
+    
+    Returns:
+        dict: Dictionary containing summary statistics
+    """
+    bank_codes, banks = _codes(results_df['bank'])
+    label_codes, labels = _codes(results_df['sentiment_label'])
+    theme_codes, themes = _codes(theme_strings(results_df['themes']))
+
+    # One count per (bank, label, theme) cell; missing labels get their own slot
+    n_labels, n_themes = len(labels) + 1, len(themes)
+    cells = (bank_codes * n_labels + label_codes + 1) * n_themes + theme_codes
+    counts = np.bincount(cells, minlength=len(banks) * n_labels * n_themes)
+    counts = counts.reshape(len(banks), n_labels, n_themes)
+
+    # Themes of each bank in order of first appearance within the bank
+    _, pairs = pd.factorize(bank_codes * n_themes + theme_codes, sort=False)
+    pairs = pairs[np.argsort(pairs // n_themes, kind='stable')]
+    bounds = np.searchsorted(pairs // n_themes, np.arange(len(banks) + 1))
+    bank_theme_counts = counts.sum(axis=1)
+    themes_by_bank = {}
+    for b, bank in enumerate(banks):
+        own = pairs[bounds[b]:bounds[b + 1]] % n_themes
+        themes_by_bank[bank] = _ranked([themes[t] for t in own], bank_theme_counts[b, own])
+
+    average_sentiment = results_df.groupby('bank', observed=True)['sentiment_score'].mean()
+
+    return {
+        'total_reviews': len(results_df),
+        'sentiment_distribution': _ranked(labels, counts.sum(axis=(0, 2))[1:]),
+        'themes_by_bank': themes_by_bank,
+        'average_sentiment_by_bank': average_sentiment.to_dict()
+    }
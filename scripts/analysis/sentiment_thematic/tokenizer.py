@@ -0,0 +1,219 @@
+"""
+Tokenizer and keyword vocabulary.
+
+Every review is lowercased and split into words once, into a TokenizedText
+record that keyword extraction and theme matching both read. The split
+pattern and stop words are built once per Tokenizer. Tokens
+are interned in a shared Vocabulary, so every occurrence of a word is the
+same string object, and can be stored as integer ids: a KeywordArray keeps
+the keywords of many reviews in two flat numpy arrays (CSR offsets plus
+vocabulary ids) instead of one Python list of strings per review.
+"""
+
+import re
+
+import numpy as np
+
+# Words dropped from keywords
+DEFAULT_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'as'
+})
+
+# Shortest word kept as a keyword
+DEFAULT_MIN_LENGTH = 3
+
+# Splits text into runs of word characters, keeping the separators between them
+_WORD_SPLIT = re.compile(r'(\W+)')
+
+class TokenizedText:
+    """
+    A review lowercased and split into words, shared by the text analyzers.
+    
+    words are the runs of word characters of the lowercased text, with an
+    empty string first or last when the text starts or ends with a
+    separator; gaps[i] is the text between words[i] and words[i + 1].
+    """
+
+    __slots__ = ('text', 'lowered', 'words', 'gaps')
+
+    def __init__(self, text, lowered, words, gaps):
+        self.text = text
+        self.lowered = lowered
+        self.words = words
+        self.gaps = gaps
+
+def tokenize(text):
+    """
+    Lowercase and split a text once.
+    
+    Args:
+        text (str): The text to tokenize
+        
+    Returns:
+        TokenizedText: Record shared by keyword extraction and theme matching
+    """
+    lowered = text.lower()
+    parts = _WORD_SPLIT.split(lowered)
+    return TokenizedText(text, lowered, parts[0::2], parts[1::2])
+
+class Tokenizer:
+    """Split texts into lowercase keywords."""
+
+    def __init__(self, stop_words=DEFAULT_STOP_WORDS, min_length=DEFAULT_MIN_LENGTH):
+        """
+        Compile the tokenizer.
+        
+        Args:
+            stop_words (iterable): Lowercase words dropped from keywords
+            min_length (int): Shortest word kept as a keyword
+        """
+        self.stop_words = frozenset(stop_words)
+        self.min_length = min_length
+
+    def keywords(self, text):
+        """
+        Extract the keywords of a text.
+        
+        Args:
+            text (str): The text to tokenize
+        
+        Returns:
+            list: Lowercase keywords in text order, repeats included
+        """
+        return self.select_keywords(tokenize(text))
+
+    def select_keywords(self, tokens):
+        """
+        Extract the keywords of an already tokenized text.
+        
+        Args:
+            tokens (TokenizedText): Record from tokenize
+        
+        Returns:
+            list: Words of at least min_length characters that are not stop words
+        """
+        stop_words, min_length = self.stop_words, self.min_length
+        return [word for word in tokens.words if len(word) >= min_length and word not in stop_words]
+
+class Vocabulary:
+    """Mapping between keywords and integer ids, shared by all reviews."""
+
+    def __init__(self, tokens=()):
+        self.ids = {}
+        self.tokens = []
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __contains__(self, token):
+        return token in self.ids
+
+    def add(self, token):
+        """Return the id of a token, assigning the next id to a new token."""
+        token_id = self.ids.get(token)
+        if token_id is None:
+            token_id = self.ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return token_id
+
+    def encode(self, tokens):
+        """Map tokens to ids, adding new tokens."""
+        add = self.add
+        return [add(token) for token in tokens]
+
+    def intern(self, tokens):
+        """Replace tokens by the vocabulary's own string objects, adding new tokens."""
+        add, stored = self.add, self.tokens
+        return [stored[add(token)] for token in tokens]
+
+    def decode(self, ids):
+        """Map ids back to tokens."""
+        tokens = self.tokens
+        return [tokens[token_id] for token_id in ids]
+
+class KeywordArray:
+    """
+    Keywords of many reviews in CSR layout.
+    
+    The keywords of review i are vocabulary.tokens[ids[offsets[i]:offsets[i + 1]]].
+    """
+
+    def __init__(self, offsets, ids, vocabulary):
+        """
+        Args:
+            offsets (np.ndarray): n + 1 start positions into ids
+            ids (np.ndarray): Vocabulary ids of all keywords, review after review
+            vocabulary (Vocabulary): Vocabulary the ids refer to
+        """
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_texts(cls, texts, tokenizer, vocabulary=None):
+        """
+        Tokenize texts into a KeywordArray.
+        
+        Args:
+            texts (iterable): Review texts
+            tokenizer (Tokenizer): Tokenizer to split the texts with
+            vocabulary (Vocabulary, optional): Vocabulary to extend, a new one by default
+        
+        Returns:
+            KeywordArray: Keywords of every text
+        """
+        return cls.from_lists((tokenizer.keywords(text) for text in texts), vocabulary)
+
+    @classmethod
+    def from_lists(cls, keyword_lists, vocabulary=None):
+        """
+        Encode lists of keywords into a KeywordArray.
+        
+        Args:
+            keyword_lists (iterable): One list of keywords per review
+            vocabulary (Vocabulary, optional): Vocabulary to extend, a new one by default
+        
+        Returns:
+            KeywordArray: Keywords of every review
+        """
+        vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        encode = vocabulary.encode
+        lengths, ids = [0], []
+        for keywords in keyword_lists:
+            encoded = encode(keywords)
+            ids.extend(encoded)
+            lengths.append(len(encoded))
+        return cls(np.cumsum(lengths), ids, vocabulary)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def row_ids(self, i):
+        """Vocabulary ids of the keywords of review i."""
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        """Keywords of review i."""
+        return self.vocabulary.decode(self.row_ids(i).tolist())
+
+    def to_lists(self):
+        """Decode every review back to a list of keywords."""
+        tokens = self.vocabulary.decode(self.ids.tolist())
+        offsets = self.offsets.tolist()
+        return [tokens[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+
+    def counts(self):
+        """
+        Count keyword occurrences over all reviews.
+        
+        Returns:
+            np.ndarray: Occurrences of every vocabulary id
+        """
+        return np.bincount(self.ids, minlength=len(self.vocabulary))
+
+    @property
+    def nbytes(self):
+        """Memory of the offset and id arrays."""
+        return self.offsets.nbytes + self.ids.nbytes
@@ -0,0 +1,284 @@
+"""
+Rolling sentiment, rating and theme trends per bank.
+
+Results are summed per day into calendar-complete daily tables with one
+column per bank and measure, so every series of every bank is resampled and
+rolled in one vectorized pass over a date-sorted index. Trend values are
+ratios of rolling sums (e.g. negative reviews over reviews in the window),
+so every review weighs the same whatever the daily volume. The tables hold
+one row per day however many reviews there are; new results only add to
+the days they fall on.
+
+A window is flagged as a negative spike when its share of negative reviews
+is significantly above the share of the baseline periods just before it.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .rollup import NO_THEME, ROLLUP_MEASURES, RollupCube
+
+logger = logging.getLogger(__name__)
+
+# Trend frequencies: period, rolling window and spike baseline, both in periods
+TREND_FREQUENCIES = {
+    'daily': ('D', 7, 28),
+    'weekly': ('W', 4, 8),
+    'monthly': ('M', 3, 6)
+}
+
+# Spike detection defaults: z-score of the window's negative share against
+# the baseline share, and reviews needed in both before flagging anything
+SPIKE_THRESHOLD = 3.0
+SPIKE_MIN_REVIEWS = 20
+
+def _empty_table(name):
+    return pd.DataFrame(
+        index=pd.DatetimeIndex([], name='date'),
+        columns=pd.MultiIndex.from_arrays([[], []], names=['bank', name]),
+        dtype=np.float64
+    )
+
+def _daily_tables(cells):
+    """
+    Sum rollup cells per day into totals, sentiment label and theme tables.
+    
+    Args:
+        cells (pd.DataFrame): Rows with ROLLUP_KEYS and ROLLUP_MEASURES
+            columns, as RollupCube.aggregate; cells without a valid date
+            are left out
+    
+    Returns:
+        tuple: (totals, labels, themes) DataFrames indexed by date with
+            (bank, measure), (bank, sentiment_label) and (bank, theme) columns
+    """
+    dates = pd.to_datetime(cells['date'], format='%Y-%m-%d', errors='coerce')
+    valid = dates.notna().to_numpy() & cells['bank'].notna().to_numpy()
+    if not valid.all():
+        logger.debug(f"Skipping {int((~valid).sum())} cells without date or bank")
+    cells = cells[valid].assign(date=dates[valid].to_numpy())
+
+    totals = cells.groupby(['date', 'bank'])[ROLLUP_MEASURES].sum().unstack('bank')
+    totals.columns = totals.columns.swaplevel().rename(['bank', 'measure'])
+
+    labels = cells.dropna(subset=['sentiment_label']).groupby(
+        ['date', 'bank', 'sentiment_label']
+    )['reviews'].sum().unstack(['bank', 'sentiment_label'])
+
+    themed = cells[cells['theme'] != NO_THEME]
+    themes = themed.assign(theme=themed['theme'].str.split('|')).explode('theme')
+    themes = themes.groupby(['date', 'bank', 'theme'])['reviews'].sum().unstack(['bank', 'theme'])
+    return totals, labels, themes
+
+def _add_tables(table, delta):
+    """Add a daily delta to a table, over the full calendar of both."""
+    if delta.empty:
+        return table
+    table = table.add(delta, fill_value=0.0) if not table.empty else delta
+    days = pd.date_range(table.index.min(), table.index.max(), freq='D', name='date')
+    return table.reindex(days, fill_value=0.0).fillna(0.0).sort_index(axis=1)
+
+def _period_range(index):
+    """Every period from the first to the last of a PeriodIndex."""
+    if len(index) == 0:
+        return index
+    return pd.period_range(index.min(), index.max(), freq=index.freq, name=index.name)
+
+def negative_z_scores(reviews, negative, window, baseline):
+    """
+    Binomial z-score of each window's negative share against the baseline before it.
+    
+    The baseline share is smoothed with one pseudo review of each kind, so
+    baselines without any or with only negative reviews still score.
+    Periods missing from a PeriodIndex count as periods without reviews,
+    so windows and baselines always span the same number of periods.
+    
+    Args:
+        reviews (pd.DataFrame): Reviews per period, one column per bank
+        negative (pd.DataFrame): Negative reviews per period, same shape
+        window (int): Periods per window
+        baseline (int): Periods right before the window forming its baseline
+    
+    Returns:
+        tuple: (z-scores, reviews in the baseline) DataFrames shaped like reviews
+    """
+    index = reviews.index
+    if isinstance(index, pd.PeriodIndex):
+        reviews = reviews.reindex(_period_range(index), fill_value=0.0)
+        negative = negative.reindex(reviews.index, fill_value=0.0)
+    window_reviews = reviews.rolling(window, min_periods=1).sum()
+    window_share = negative.rolling(window, min_periods=1).sum() / window_reviews
+    base_reviews = reviews.rolling(baseline, min_periods=1).sum().shift(window).fillna(0.0)
+    base_negative = negative.rolling(baseline, min_periods=1).sum().shift(window).fillna(0.0)
+    base_share = (base_negative + 1.0) / (base_reviews + 2.0)
+    z = (window_share - base_share) / np.sqrt(base_share * (1.0 - base_share) / window_reviews)
+    return z.reindex(index), base_reviews.reindex(index)
+
+class TrendEngine:
+    """Rolling daily, weekly and monthly trends of analysis results per bank."""
+
+    def __init__(self):
+        self.totals = _empty_table('measure')
+        self.labels = _empty_table('sentiment_label')
+        self.themes = _empty_table('theme')
+        # Period sums per frequency, dropped whenever results are added
+        self._periods = {}
+
+    @classmethod
+    def from_rollup(cls, rollup):
+        """Build the trends of everything in a rollup cube."""
+        engine = cls()
+        engine.add_cells(rollup.cube)
+        return engine
+
+    def add(self, results_df):
+        """Add newly analyzed results, e.g. the reviews of new days."""
+        self.add_cells(RollupCube.aggregate(results_df))
+
+    def add_cells(self, cells):
+        """Add rollup cells, e.g. the rows of RollupCube.aggregate."""
+        totals, labels, themes = _daily_tables(cells)
+        self.totals = _add_tables(self.totals, totals)
+        self.labels = _add_tables(self.labels, labels)
+        self.themes = _add_tables(self.themes, themes)
+        self._periods.clear()
+
+    def periods(self, frequency):
+        """
+        Sum the daily tables per period of a frequency.
+        
+        All three tables cover every period from the first to the last
+        day of the totals, so rolling windows count periods, not rows.
+        
+        Args:
+            frequency (str): Key of TREND_FREQUENCIES
+        
+        Returns:
+            tuple: (totals, labels, themes) indexed by PeriodIndex
+        """
+        if frequency not in TREND_FREQUENCIES:
+            raise ValueError(f"Unknown trend frequency: {frequency!r}, expected one of {sorted(TREND_FREQUENCIES)}")
+        if frequency not in self._periods:
+            period = TREND_FREQUENCIES[frequency][0]
+            tables = [
+                table.groupby(table.index.to_period(period)).sum().rename_axis('date')
+                for table in (self.totals, self.labels, self.themes)
+            ]
+            index = _period_range(tables[0].index)
+            self._periods[frequency] = tuple(table.reindex(index, fill_value=0.0) for table in tables)
+        return self._periods[frequency]
+
+    def trends(self, frequency='daily', window=None, baseline=None,
+               threshold=SPIKE_THRESHOLD, min_reviews=SPIKE_MIN_REVIEWS):
+        """
+        Compute rolling trends per bank and period.
+        
+        Args:
+            frequency (str): 'daily', 'weekly' or 'monthly'
+            window (int, optional): Periods per rolling window, the
+                frequency's default from TREND_FREQUENCIES
+            baseline (int, optional): Periods before the window that its
+                negative share is compared with
+            threshold (float): z-score above which a window is a spike
+            min_reviews (int): Reviews needed in the window and in the
+                baseline before a spike is flagged
+        
+        Returns:
+            pd.DataFrame: One row per bank and period with the period start
+                date, the reviews in the window, average rating and sentiment
+                score, the share of each sentiment label, and the negative
+                spike z-score and flag; periods without reviews in the window
+                are left out
+        """
+        totals, labels, _ = self.periods(frequency)
+        _, default_window, default_baseline = TREND_FREQUENCIES[frequency]
+        window = default_window if window is None else window
+        baseline = default_baseline if baseline is None else baseline
+        if totals.empty:
+            return pd.DataFrame(columns=['bank', 'date', 'reviews', 'average_rating', 'average_sentiment',
+                                         'negative_z', 'negative_spike'])
+        
+        rolled = totals.rolling(window, min_periods=1).sum()
+        measure = lambda name: rolled.xs(name, axis=1, level='measure')
+        reviews = measure('reviews')
+        columns = {
+            'reviews': reviews,
+            'average_rating': measure('rating_sum') / measure('rated'),
+            'average_sentiment': measure('score_sum') / measure('scored')
+        }
+        
+        rolled_labels = labels.rolling(window, min_periods=1).sum()
+        for label in labels.columns.get_level_values('sentiment_label').unique():
+            counts = rolled_labels.xs(label, axis=1, level='sentiment_label')
+            columns[f'{label.lower()}_share'] = counts.reindex(columns=reviews.columns, fill_value=0.0) / reviews
+        
+        period_reviews = totals.xs('reviews', axis=1, level='measure')
+        negative = pd.DataFrame(0.0, index=period_reviews.index, columns=period_reviews.columns)
+        if 'NEGATIVE' in labels.columns.get_level_values('sentiment_label'):
+            negative = labels.xs('NEGATIVE', axis=1, level='sentiment_label') \
+                .reindex(columns=period_reviews.columns, fill_value=0.0)
+        negative_z, base_reviews = negative_z_scores(period_reviews, negative, window, baseline)
+        columns['negative_z'] = negative_z
+        columns['negative_spike'] = (negative_z > threshold) & (reviews >= min_reviews) & \
+            (base_reviews >= min_reviews)
+        
+        trend = pd.DataFrame({name: frame.stack() for name, frame in columns.items()})
+        trend = trend[trend['reviews'] > 0].reset_index()
+        trend['date'] = trend['date'].dt.to_timestamp()
+        trend['reviews'] = trend['reviews'].astype(int)
+        trend['negative_spike'] = trend['negative_spike'].astype(bool)
+        return trend[['bank', 'date'] + list(columns)]
+
+    def theme_shares(self, frequency='daily', window=None):
+        """
+        Compute the rolling share of reviews mentioning each theme per bank and period.
+        
+        Args:
+            frequency (str): 'daily', 'weekly' or 'monthly'
+            window (int, optional): Periods per rolling window
+        
+        Returns:
+            pd.DataFrame: One row per bank and period with the period start
+                date and one share column per theme; periods without reviews
+                in the window are left out
+        """
+        totals, _, themes = self.periods(frequency)
+        window = TREND_FREQUENCIES[frequency][1] if window is None else window
+        if totals.empty:
+            return pd.DataFrame({'bank': pd.Series(dtype=object), 'date': pd.Series(dtype='datetime64[ns]')})
+        reviews = totals.xs('reviews', axis=1, level='measure')
+        
+        # Every bank and theme over every period, so shares of banks or
+        # periods without themed reviews are 0 rather than missing
+        columns = pd.MultiIndex.from_product(
+            [reviews.columns, themes.columns.get_level_values('theme').unique().sort_values()],
+            names=['bank', 'theme']
+        )
+        themes = themes.reindex(index=reviews.index, columns=columns, fill_value=0.0)
+        
+        reviews = reviews.rolling(window, min_periods=1).sum().stack()
+        reviews = reviews[reviews > 0]
+        shares = themes.rolling(window, min_periods=1).sum().stack('bank')
+        shares = shares.reindex(reviews.index).div(reviews, axis=0).reset_index()
+        shares['date'] = shares['date'].dt.to_timestamp()
+        shares.columns.name = None
+        return shares[['bank', 'date'] + [column for column in shares.columns if column not in ('bank', 'date')]]
+
+    def alerts(self, frequency='daily', **kwargs):
+        """
+        Find banks whose latest window is a negative spike.
+        
+        Args:
+            frequency (str): 'daily', 'weekly' or 'monthly'
+            **kwargs: Passed on to trends
+        
+        Returns:
+            pd.DataFrame: Trend rows of the latest period that are spikes
+        """
+        trend = self.trends(frequency, **kwargs)
+        if trend.empty:
+            return trend
+        latest = trend[trend['date'] == trend['date'].max()]
+        return latest[latest['negative_spike']].reset_index(drop=True)
@@ -0,0 +1,3 @@
+"""
+Package initialization for benchmark scripts.
+"""
@@ -0,0 +1,78 @@
+"""
+Benchmark the grouped SentimentThematicAnalyzer.generate_summary against the
+previous per-bank implementation.
+
+Usage:
+    python -m scripts.benchmarks.bench_generate_summary --sizes 100000 1000000 --banks 3 30 300
+"""
+
+import argparse
+import json
+import logging
+import time
+
+from scripts.analysis.sentiment_thematic.summary import summarize
+from scripts.benchmarks.synthetic import make_results
+
+logger = logging.getLogger(__name__)
+
+def generate_summary_per_bank(results_df):
+    """
+    Reference implementation of generate_summary before the grouped rewrite.
+    
+    Args:
+        results_df (pd.DataFrame): DataFrame containing results, modified in place
+        
+    Returns:
+        dict: Dictionary containing summary statistics
+    """
+    results_df['themes_str'] = results_df['themes'].apply(lambda x: '|'.join(x) if x else 'No Theme')
+    
+    themes_by_bank = {}
+    for bank in results_df['bank'].unique():
+        bank_themes = results_df[results_df['bank'] == bank]['themes_str'].value_counts().to_dict()
+        themes_by_bank[bank] = bank_themes
+    
+    return {
+        'total_reviews': len(results_df),
+        'sentiment_distribution': results_df['sentiment_label'].value_counts().to_dict(),
+        'themes_by_bank': themes_by_bank,
+        'average_sentiment_by_bank': results_df.groupby('bank')['sentiment_score'].mean().to_dict()
+    }
+
+def run(sizes, banks):
+    """
+    Time both implementations for each input size and bank count and check
+    they produce the same JSON.
+    
+    Args:
+        sizes (list): Numbers of synthetic results to benchmark
+        banks (list): Numbers of distinct banks to benchmark
+    """
+    print(f"{'results':>10} {'banks':>6} {'per-bank (s)':>13} {'grouped (s)':>12} {'speedup':>8}")
+    for n in sizes:
+        for n_banks in banks:
+            results_df = make_results(n, n_banks)
+            
+            start = time.perf_counter()
+            before = generate_summary_per_bank(results_df.copy())
+            per_bank_time = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            after = summarize(results_df)
+            grouped_time = time.perf_counter() - start
+            
+            assert json.dumps(before, indent=4) == json.dumps(after, indent=4)
+            print(f"{n:>10} {n_banks:>6} {per_bank_time:>13.3f} {grouped_time:>12.3f} "
+                  f"{per_bank_time / grouped_time:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--banks', type=int, nargs='+', default=[3, 30, 300])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    run(args.sizes, args.banks)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark keyword extraction with the shared tokenizer and vocabulary against
+the previous per-call implementation.
+
+Compares tokenizing time and the memory held by the keywords of all reviews:
+lists of fresh strings (previous), lists of interned strings (extract_keywords)
+and a CSR KeywordArray of vocabulary ids (keyword_array).
+
+Usage:
+    python -m scripts.benchmarks.bench_keywords --sizes 100000 1000000
+"""
+
+import argparse
+import logging
+import re
+import time
+import tracemalloc
+
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.benchmarks.synthetic import make_reviews
+
+logger = logging.getLogger(__name__)
+
+def extract_keywords_uncompiled(text):
+    """
+    Reference implementation of extract_keywords before the shared tokenizer.
+    
+    Args:
+        text (str): The text to extract keywords from
+        
+    Returns:
+        list: List of extracted keywords
+    """
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    words = text.split()
+    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'as'}
+    return [word for word in words if word not in stop_words and len(word) > 2]
+
+def measure(build, make_analyzer):
+    """
+    Time build() untraced, then run it again under tracemalloc.
+    
+    Returns:
+        tuple: (result, seconds, bytes still allocated by the result)
+    """
+    make_analyzer()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    
+    # Fresh analyzer, so the traced run pays for building its vocabulary
+    make_analyzer()
+    tracemalloc.start()
+    result = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, allocated
+
+def run(sizes):
+    """
+    Time and measure the three keyword representations for each input size.
+    
+    Args:
+        sizes (list): Numbers of synthetic reviews to benchmark
+    """
+    print(f"{'reviews':>10} {'variant':>18} {'seconds':>9} {'memory (MB)':>12}")
+    for n in sizes:
+        texts = make_reviews(n)['review'].tolist()
+        variants = {
+            'list[str]': lambda: [extract_keywords_uncompiled(text) for text in texts],
+            'interned list[str]': lambda: [analyzer.extract_keywords(text) for text in texts],
+            'KeywordArray': lambda: analyzer.keyword_array(texts)
+        }
+        analyzer = None
+        
+        def make_analyzer():
+            nonlocal analyzer
+            analyzer = SentimentThematicAnalyzer()
+        
+        expected = None
+        for name, build in variants.items():
+            result, elapsed, allocated = measure(build, make_analyzer)
+            lists = result.to_lists() if name == 'KeywordArray' else result
+            if expected is None:
+                expected = lists
+            assert lists == expected
+            print(f"{n:>10} {name:>18} {elapsed:>9.2f} {allocated / 2**20:>12.1f}")
+            del result, lists
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    run(args.sizes)
+
+if __name__ == "__main__":
+    main()
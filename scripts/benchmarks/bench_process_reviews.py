@@ -0,0 +1,84 @@
+"""
+Benchmark the batched SentimentThematicAnalyzer.process_reviews against the
+previous row-by-row implementation.
+
+Usage:
+    python -m scripts.benchmarks.bench_process_reviews --sizes 10000 100000 1000000
+"""
+
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.benchmarks.synthetic import make_reviews
+
+logger = logging.getLogger(__name__)
+
+def process_reviews_rowwise(analyzer, reviews_df):
+    """
+    Reference implementation of process_reviews before batching.
+    
+    Args:
+        analyzer (SentimentThematicAnalyzer): Analyzer to score with
+        reviews_df (pd.DataFrame): DataFrame containing reviews
+        
+    Returns:
+        pd.DataFrame: DataFrame containing analysis results
+    """
+    results = []
+    for _, row in reviews_df.iterrows():
+        review_text = row['review']
+        sentiment_result = analyzer.analyze_sentiment(review_text)
+        results.append({
+            'review_id': row.name,
+            'bank': row['bank'],
+            'rating': row['rating'],
+            'review_text': review_text,
+            'date': row['date'],
+            'source': row['source'],
+            'sentiment_label': sentiment_result['label'],
+            'sentiment_score': sentiment_result['score'],
+            'vader_score': sentiment_result['vader_score'],
+            'textblob_score': sentiment_result['textblob_score'],
+            'keywords': analyzer.extract_keywords(review_text),
+            'themes': analyzer.identify_themes(review_text)
+        })
+    return pd.DataFrame(results)
+
+def run(sizes, batch_size):
+    """
+    Time both implementations for each input size and check they agree.
+    
+    Args:
+        sizes (list): Numbers of synthetic reviews to benchmark
+        batch_size (int): Batch size passed to process_reviews
+    """
+    analyzer = SentimentThematicAnalyzer()
+    print(f"{'reviews':>10} {'rowwise (s)':>12} {'batched (s)':>12} {'speedup':>8}")
+    for n in sizes:
+        reviews_df = make_reviews(n)
+        
+        start = time.perf_counter()
+        before = process_reviews_rowwise(analyzer, reviews_df)
+        rowwise_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        after = analyzer.process_reviews(reviews_df, batch_size=batch_size)
+        batched_time = time.perf_counter() - start
+        
+        pd.testing.assert_frame_equal(before, after)
+        print(f"{n:>10} {rowwise_time:>12.2f} {batched_time:>12.2f} {rowwise_time / batched_time:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    run(args.sizes, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark the sentiment backends for throughput and agreement with the
+combined VADER + TextBlob scoring.
+
+For every backend, reports reviews scored per second and, against the
+combined backend, the share of equal labels, the correlation of the signed
+scores and the label confusion matrix.
+
+Usage:
+    python -m scripts.benchmarks.bench_sentiment --size 20000
+    python -m scripts.benchmarks.bench_sentiment --input data/processed/reviews_cleaned.csv
+"""
+
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from scripts.analysis.sentiment_thematic.sentiment import (
+    DEFAULT_SENTIMENT_BACKEND, SENTIMENT_BACKENDS, agreement, create_sentiment_backend
+)
+from scripts.analysis.sentiment_thematic.tokenizer import tokenize
+from scripts.benchmarks.synthetic import make_reviews
+
+logger = logging.getLogger(__name__)
+
+def score(backend, texts):
+    """
+    Score texts in one batch with a backend.
+    
+    Returns:
+        tuple: (results DataFrame with label and score columns, seconds)
+    """
+    start = time.perf_counter()
+    labels, scores, _, _ = backend.score_batch(texts, [tokenize(text) for text in texts])
+    elapsed = time.perf_counter() - start
+    return pd.DataFrame({'sentiment_label': list(labels), 'sentiment_score': list(scores)}), elapsed
+
+def run(texts, backends):
+    """
+    Time each backend on texts and compare it with the combined backend.
+    
+    Args:
+        texts (list): Review texts to score
+        backends (list): Backend names to benchmark
+    """
+    reference, reference_time = score(create_sentiment_backend(DEFAULT_SENTIMENT_BACKEND), texts)
+    print(f"{'backend':>10} {'reviews/s':>11} {'speedup':>8} {'label agree':>12} {'score corr':>11}")
+    for name in backends:
+        results, elapsed = (reference, reference_time) if name == DEFAULT_SENTIMENT_BACKEND \
+            else score(create_sentiment_backend(name), texts)
+        report = agreement(reference, results)
+        print(f"{name:>10} {len(texts) / elapsed:>11.0f} {reference_time / elapsed:>7.1f}x "
+              f"{report['label_agreement']:>12.3f} {report['score_correlation']:>11.3f}")
+        if name != DEFAULT_SENTIMENT_BACKEND:
+            print(report['confusion'].to_string())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000,
+                        help="Number of synthetic reviews when no --input is given")
+    parser.add_argument('--input', default=None,
+                        help="CSV with a review or review_text column to score instead of synthetic reviews")
+    parser.add_argument('--backends', nargs='+', choices=sorted(SENTIMENT_BACKENDS), default=list(SENTIMENT_BACKENDS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    if args.input is not None:
+        reviews_df = pd.read_csv(args.input)
+        column = 'review' if 'review' in reviews_df.columns else 'review_text'
+        texts = reviews_df[column].fillna('').astype(str).tolist()
+    else:
+        texts = make_reviews(args.size)['review'].tolist()
+    run(texts, args.backends)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Synthetic review generation shared by the benchmark scripts.
+"""
+
+import numpy as np
+import pandas as pd
+
+BANKS = ['CBE', 'BOA', 'Dashen']
+
+PHRASES = [
+    "good app", "nice", "very slow app", "I can't login to my account",
+    "transfer failed but money was taken", "great interface and easy navigation",
+    "customer service never responds", "please add a feature to pay bills",
+    "the app crashes after the update", "fast and reliable transactions",
+    "worst banking app ever", "otp code never arrives", "love it",
+    "it would be nice to have dark mode", "support helped me quickly"
+]
+
+def make_reviews(n, seed=0):
+    """
+    Build a DataFrame of n synthetic reviews shaped like reviews_cleaned.csv.
+    
+    Args:
+        n (int): Number of reviews to generate
+        seed (int): Random seed
+        
+    Returns:
+        pd.DataFrame: DataFrame with review, rating, date, bank and source columns
+    """
+    rng = np.random.default_rng(seed)
+    first = rng.integers(0, len(PHRASES), n)
+    second = rng.integers(0, len(PHRASES), n)
+    phrases = np.array(PHRASES, dtype=object)
+    reviews = np.where(rng.random(n) < 0.5, phrases[first], phrases[first] + ". " + phrases[second])
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D')
+    return pd.DataFrame({
+        'review': reviews,
+        'rating': rng.integers(1, 6, n),
+        'date': dates.strftime('%Y-%m-%d'),
+        'bank': np.array(BANKS, dtype=object)[rng.integers(0, len(BANKS), n)],
+        'source': 'Google Play'
+    })
+
+THEMES = ['Account Access Issues', 'Transaction Performance', 'User Interface & Experience',
+          'Customer Support', 'Feature Requests']
+
+def make_results(n, n_banks=3, seed=0):
+    """
+    Build a DataFrame of n synthetic analysis results without scoring reviews.
+    
+    Args:
+        n (int): Number of results to generate
+        n_banks (int): Number of distinct banks
+        seed (int): Random seed
+        
+    Returns:
+        pd.DataFrame: DataFrame with the bank, sentiment and theme columns
+            of process_reviews output
+    """
+    rng = np.random.default_rng(seed)
+    banks = np.array(BANKS + [f'Bank {i}' for i in range(len(BANKS), n_banks)], dtype=object)[:n_banks]
+    # Each review mentions each theme with probability 0.2, in theme order
+    mentions = rng.random((n, len(THEMES))) < 0.2
+    themes = np.empty(n, dtype=object)
+    themes[:] = [[theme for theme, hit in zip(THEMES, row) if hit] for row in mentions.tolist()]
+    return pd.DataFrame({
+        'bank': banks[rng.integers(0, n_banks, n)],
+        'rating': rng.integers(1, 6, n),
+        'sentiment_label': np.array(['POSITIVE', 'NEGATIVE', 'NEUTRAL'], dtype=object)[rng.integers(0, 3, n)],
+        'sentiment_score': rng.random(n),
+        'themes': themes
+    })
+
@@ -0,0 +1,417 @@
+"""
+Pluggable database backends with session pools.
+
+Each backend owns a pool of connections to one database and hands them out
+with acquire/release, keeping statistics per pool. Drivers are imported and
+the Oracle client is initialized lazily, the first time a connection is
+needed, so importing this module has no side effects.
+
+- OracleBackend: cx_Oracle SessionPool
+- PostgresBackend: psycopg2 ThreadedConnectionPool, the fallback database
+- SQLiteBackend: pool of SQLiteConnection stand-ins for local runs
+"""
+
+from contextlib import contextmanager
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from .config import (
+    DB_BACKEND, DB_CONFIG, ORACLE_CLIENT_PATH, POSTGRES_CONFIG, SQLITE_PATH,
+    POOL_MIN_SIZE, POOL_MAX_SIZE
+)
+from .sqlite_standin import SQLiteConnection
+
+logger = logging.getLogger(__name__)
+
+# Schema of the PostgreSQL fallback
+POSTGRES_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS banks (
+    bank_id SERIAL PRIMARY KEY,
+    bank_name TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id BIGSERIAL PRIMARY KEY,
+    review_key TEXT NOT NULL UNIQUE,
+    bank_id INTEGER NOT NULL REFERENCES banks (bank_id),
+    review_text TEXT,
+    rating DOUBLE PRECISION,
+    review_date DATE,
+    source TEXT,
+    sentiment_label TEXT,
+    sentiment_score DOUBLE PRECISION,
+    vader_score DOUBLE PRECISION,
+    textblob_score DOUBLE PRECISION,
+    themes TEXT,
+    keywords TEXT,
+    row_hash TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS reviews_bank_date_ix ON reviews (bank_id, review_date, sentiment_label);
+CREATE TABLE IF NOT EXISTS review_theme (
+    review_id BIGINT NOT NULL REFERENCES reviews (review_id) ON DELETE CASCADE,
+    theme TEXT NOT NULL,
+    PRIMARY KEY (review_id, theme)
+);
+CREATE INDEX IF NOT EXISTS review_theme_theme_ix ON review_theme (theme, review_id);
+CREATE TABLE IF NOT EXISTS review_keyword (
+    review_id BIGINT NOT NULL REFERENCES reviews (review_id) ON DELETE CASCADE,
+    keyword TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    PRIMARY KEY (review_id, keyword)
+);
+CREATE INDEX IF NOT EXISTS review_keyword_keyword_ix ON review_keyword (keyword, review_id)
+"""
+
+# Session-local stage table used by the review MERGE on PostgreSQL
+POSTGRES_STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS reviews_stage (
+    review_key TEXT NOT NULL,
+    bank_id INTEGER NOT NULL,
+    review_text TEXT,
+    rating DOUBLE PRECISION,
+    review_date DATE,
+    source TEXT,
+    sentiment_label TEXT,
+    sentiment_score DOUBLE PRECISION,
+    vader_score DOUBLE PRECISION,
+    textblob_score DOUBLE PRECISION,
+    themes TEXT,
+    keywords TEXT,
+    row_hash TEXT
+)
+"""
+
+# Oracle positional binds (:1, :2, ...) become psycopg2 format binds
+_POSITIONAL_BIND = re.compile(r':\d+')
+
+# init_oracle_client may only run once per process
+_oracle_client_lock = threading.Lock()
+_oracle_client_initialized = False
+
+def init_oracle_client(cx_Oracle):
+    """Load the Oracle Instant Client the first time Oracle is used."""
+    global _oracle_client_initialized
+    with _oracle_client_lock:
+        if _oracle_client_initialized:
+            return
+        if os.path.exists(ORACLE_CLIENT_PATH):
+            cx_Oracle.init_oracle_client(lib_dir=ORACLE_CLIENT_PATH)
+            logger.info(f"Oracle client initialized from {ORACLE_CLIENT_PATH}")
+        else:
+            logger.warning(f"Oracle client path {ORACLE_CLIENT_PATH} not found. Please set ORACLE_CLIENT_PATH environment variable.")
+        _oracle_client_initialized = True
+
+class Backend:
+    """Base class of the pooled backends; subclasses implement the _pool_* methods."""
+
+    # SQL dialect DatabaseManager generates statements for
+    dialect = None
+
+    def __init__(self, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE):
+        if not 1 <= min_size <= max_size:
+            raise ValueError(f"Invalid pool sizes: min_size={min_size}, max_size={max_size}")
+        self.min_size = min_size
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._started = False
+        self._acquired = 0
+        self._released = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._wait_seconds = 0.0
+
+    def acquire(self):
+        """
+        Take a connection from the pool, creating the pool on first use.
+        
+        Blocks while all max_size connections are in use.
+        
+        Returns:
+            Connection with the cx_Oracle-style interface DatabaseManager uses
+        """
+        with self._lock:
+            if not self._started:
+                self._pool_start()
+                self._started = True
+        
+        start = time.perf_counter()
+        connection = self._pool_acquire()
+        waited = time.perf_counter() - start
+        
+        with self._lock:
+            self._acquired += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_seconds += waited
+        return connection
+
+    def release(self, connection):
+        """
+        Return a connection to the pool, rolling back uncommitted work.
+        
+        Args:
+            connection: Connection obtained from acquire
+        """
+        try:
+            connection.rollback()
+        finally:
+            self._pool_release(connection)
+            with self._lock:
+                self._released += 1
+                self._in_use -= 1
+
+    @contextmanager
+    def connection(self):
+        """Acquire a connection for the duration of a with block."""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def stats(self):
+        """
+        Report pool statistics.
+        
+        Returns:
+            dict: Acquire and release counts, connections in use, peak use,
+                total seconds spent waiting for a connection and pool sizes
+        """
+        with self._lock:
+            return {
+                'backend': self.dialect,
+                'acquired': self._acquired,
+                'released': self._released,
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'wait_seconds': self._wait_seconds,
+                'min_size': self.min_size,
+                'max_size': self.max_size
+            }
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            if self._started:
+                self._pool_close()
+                self._started = False
+
+    def _pool_start(self):
+        raise NotImplementedError
+
+    def _pool_acquire(self):
+        raise NotImplementedError
+
+    def _pool_release(self, connection):
+        raise NotImplementedError
+
+    def _pool_close(self):
+        raise NotImplementedError
+
+class OracleBackend(Backend):
+    """Oracle through a cx_Oracle SessionPool."""
+
+    dialect = 'oracle'
+
+    def __init__(self, config=DB_CONFIG, **kwargs):
+        super().__init__(**kwargs)
+        self.config = config
+        self._pool = None
+
+    def _pool_start(self):
+        try:
+            import cx_Oracle
+        except ImportError as error:
+            raise ImportError("cx_Oracle is required to connect to Oracle: pip install cx_Oracle") from error
+        init_oracle_client(cx_Oracle)
+        try:
+            self._pool = cx_Oracle.SessionPool(
+                min=self.min_size, max=self.max_size, increment=1, threaded=True,
+                getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT, **self.config
+            )
+            logger.info("Successfully created Oracle session pool")
+        except cx_Oracle.Error as error:
+            logger.error(f"Error connecting to Oracle database: {error}")
+            raise
+
+    def _pool_acquire(self):
+        return self._pool.acquire()
+
+    def _pool_release(self, connection):
+        self._pool.release(connection)
+
+    def _pool_close(self):
+        self._pool.close(force=True)
+        self._pool = None
+
+class PostgresCursor:
+    """psycopg2 cursor accepting Oracle-style positional binds."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def setinputsizes(self, *args, **kwargs):
+        """psycopg2 infers bind types, so input sizes are ignored."""
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_POSITIONAL_BIND.sub('%s', sql), list(params))
+        return self
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(_POSITIONAL_BIND.sub('%s', sql), rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class PostgresConnection:
+    """psycopg2 connection exposing the cx_Oracle connection methods DatabaseManager uses."""
+
+    dialect = 'postgresql'
+
+    def __init__(self, raw):
+        self.raw = raw
+        with raw.cursor() as cursor:
+            cursor.execute(POSTGRES_STAGE_SQL)
+        raw.commit()
+
+    def cursor(self):
+        return PostgresCursor(self.raw.cursor())
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+class PostgresBackend(Backend):
+    """PostgreSQL through a psycopg2 ThreadedConnectionPool."""
+
+    dialect = 'postgresql'
+
+    def __init__(self, config=POSTGRES_CONFIG, **kwargs):
+        super().__init__(**kwargs)
+        self.config = config
+        self._pool = None
+        self._wrapped = {}
+        # ThreadedConnectionPool raises instead of waiting when exhausted
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    def _pool_start(self):
+        try:
+            from psycopg2.pool import ThreadedConnectionPool
+        except ImportError as error:
+            raise ImportError("psycopg2 is required to connect to PostgreSQL: pip install psycopg2-binary") from error
+        self._pool = ThreadedConnectionPool(self.min_size, self.max_size, **self.config)
+        logger.info("Successfully created PostgreSQL connection pool")
+
+    def _pool_acquire(self):
+        self._slots.acquire()
+        try:
+            raw = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        # Keep one wrapper per session so the stage table is created once
+        with self._lock:
+            if id(raw) not in self._wrapped:
+                self._wrapped[id(raw)] = PostgresConnection(raw)
+            return self._wrapped[id(raw)]
+
+    def _pool_release(self, connection):
+        self._pool.putconn(connection.raw)
+        self._slots.release()
+
+    def _pool_close(self):
+        self._pool.closeall()
+        self._pool = None
+        self._wrapped.clear()
+
+class SQLiteBackend(Backend):
+    """Pool of SQLiteConnection stand-ins sharing one database."""
+
+    dialect = 'sqlite'
+
+    # Counter giving each in-memory database its own name
+    _memory_databases = 0
+
+    def __init__(self, database=SQLITE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        if str(database) == ':memory:':
+            # Pooled connections share one named in-memory database
+            SQLiteBackend._memory_databases += 1
+            database = f"file:standin_{os.getpid()}_{SQLiteBackend._memory_databases}?mode=memory&cache=shared"
+        self.database = database
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+
+    def _pool_start(self):
+        for _ in range(self.min_size):
+            self._idle.put(SQLiteConnection(self.database))
+        self._opened = self.min_size
+
+    def _pool_acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.max_size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            return SQLiteConnection(self.database)
+        return self._idle.get()
+
+    def _pool_release(self, connection):
+        self._idle.put(connection)
+
+    def _pool_close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+        self._opened = 0
+
+BACKENDS = {
+    'oracle': OracleBackend,
+    'postgresql': PostgresBackend,
+    'sqlite': SQLiteBackend
+}
+
+# Backends shared by every DatabaseManager of the process
+_shared_backends = {}
+_shared_lock = threading.Lock()
+
+def get_backend(name=None):
+    """
+    Return the process-wide backend of the given name.
+    
+    Args:
+        name (str, optional): 'oracle', 'postgresql' or 'sqlite', defaults to
+            the DB_BACKEND setting
+        
+    Returns:
+        Backend: Shared backend instance
+    """
+    name = name or DB_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown database backend {name!r}, expected one of {sorted(BACKENDS)}")
+    with _shared_lock:
+        if name not in _shared_backends:
+            _shared_backends[name] = BACKENDS[name]()
+        return _shared_backends[name]
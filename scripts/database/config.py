@@ -13,6 +13,28 @@ DB_CONFIG = {
     'encoding': 'UTF-8'
 }
 
+# Backend used by DatabaseManager: 'oracle', 'postgresql' or 'sqlite'
+DB_BACKEND = os.getenv('DB_BACKEND', 'oracle')
+
+# Oracle Instant Client directory, loaded the first time Oracle is used
+ORACLE_CLIENT_PATH = os.getenv('ORACLE_CLIENT_PATH', r'D:\instantclient_19_20\instantclient_23_8')
+
+# PostgreSQL fallback configuration
+POSTGRES_CONFIG = {
+    'user': os.getenv('POSTGRES_USER', 'postgres'),
+    'password': os.getenv('POSTGRES_PASSWORD', 'your_password'),
+    'host': os.getenv('POSTGRES_HOST', 'localhost'),
+    'port': int(os.getenv('POSTGRES_PORT', '5432')),
+    'dbname': os.getenv('POSTGRES_DB', 'bank_reviews')
+}
+
+# SQLite stand-in database file
+SQLITE_PATH = os.getenv('SQLITE_PATH', str(Path(__file__).parent.parent.parent / 'data' / 'bank_reviews.db'))
+
+# Session pool sizes
+POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN', '1'))
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX', '8'))
+
 # SQL file paths
 SQL_DIR = Path(__file__).parent
 CREATE_TABLES_SQL = SQL_DIR / 'create_tables.sql'
@@ -0,0 +1,61 @@
+CREATE TABLE banks (
+    bank_id NUMBER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    bank_name VARCHAR2(100) NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT SYSTIMESTAMP,
+    updated_at TIMESTAMP DEFAULT SYSTIMESTAMP
+);
+
+CREATE TABLE reviews (
+    review_id NUMBER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    review_key VARCHAR2(32) NOT NULL,
+    bank_id NUMBER NOT NULL REFERENCES banks (bank_id),
+    review_text CLOB,
+    rating NUMBER,
+    review_date DATE,
+    source VARCHAR2(100),
+    sentiment_label VARCHAR2(20),
+    sentiment_score NUMBER,
+    vader_score NUMBER,
+    textblob_score NUMBER,
+    themes CLOB,
+    keywords CLOB,
+    row_hash VARCHAR2(32),
+    created_at TIMESTAMP DEFAULT SYSTIMESTAMP,
+    updated_at TIMESTAMP DEFAULT SYSTIMESTAMP,
+    CONSTRAINT reviews_review_key_uk UNIQUE (review_key)
+);
+
+CREATE INDEX reviews_bank_date_ix ON reviews (bank_id, review_date, sentiment_label);
+
+CREATE TABLE review_theme (
+    review_id NUMBER NOT NULL REFERENCES reviews (review_id) ON DELETE CASCADE,
+    theme VARCHAR2(100) NOT NULL,
+    CONSTRAINT review_theme_pk PRIMARY KEY (review_id, theme)
+) ORGANIZATION INDEX;
+
+CREATE INDEX review_theme_theme_ix ON review_theme (theme, review_id);
+
+CREATE TABLE review_keyword (
+    review_id NUMBER NOT NULL REFERENCES reviews (review_id) ON DELETE CASCADE,
+    keyword VARCHAR2(400) NOT NULL,
+    occurrences NUMBER NOT NULL,
+    CONSTRAINT review_keyword_pk PRIMARY KEY (review_id, keyword)
+) ORGANIZATION INDEX;
+
+CREATE INDEX review_keyword_keyword_ix ON review_keyword (keyword, review_id);
+
+CREATE GLOBAL TEMPORARY TABLE reviews_stage (
+    review_key VARCHAR2(32) NOT NULL,
+    bank_id NUMBER NOT NULL,
+    review_text CLOB,
+    rating NUMBER,
+    review_date DATE,
+    source VARCHAR2(100),
+    sentiment_label VARCHAR2(20),
+    sentiment_score NUMBER,
+    vader_score NUMBER,
+    textblob_score NUMBER,
+    themes CLOB,
+    keywords CLOB,
+    row_hash VARCHAR2(32)
+) ON COMMIT DELETE ROWS
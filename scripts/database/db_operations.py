@@ -2,53 +2,178 @@
 Database operations for the bank reviews application.
 """
 
-import cx_Oracle
 import pandas as pd
 import logging
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date
 import json
-import os
-from .config import DB_CONFIG, CREATE_TABLES_SQL, REVIEWS_FILE, SENTIMENT_RESULTS_FILE
+import time
+import hashlib
+from .backends import POSTGRES_SCHEMA_SQL, get_backend
+from .config import CREATE_TABLES_SQL, REVIEWS_FILE, SENTIMENT_RESULTS_FILE
+from .sqlite_standin import SCHEMA_SQL
+from scripts.analysis.sentiment_thematic.incremental import review_keys
+from scripts.analysis.sentiment_thematic.storage import locate_results, read_results
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Set Oracle client path
-ORACLE_CLIENT_PATH = os.getenv('ORACLE_CLIENT_PATH', r'D:\instantclient_19_20\instantclient_23_8')
-if os.path.exists(ORACLE_CLIENT_PATH):
-    cx_Oracle.init_oracle_client(lib_dir=ORACLE_CLIENT_PATH)
-    logger.info(f"Oracle client initialized from {ORACLE_CLIENT_PATH}")
-else:
-    logger.warning(f"Oracle client path {ORACLE_CLIENT_PATH} not found. Please set ORACLE_CLIENT_PATH environment variable.")
+# Number of reviews sent per executemany call and committed together
+DEFAULT_LOAD_BATCH_SIZE = 5000
+
+# Columns loaded into the reviews table, in bind order
+REVIEW_COLUMNS = [
+    'review_key', 'bank_id', 'review_text', 'rating', 'review_date', 'source',
+    'sentiment_label', 'sentiment_score', 'vader_score', 'textblob_score',
+    'themes', 'keywords', 'row_hash'
+]
+
+_BINDS = ', '.join(f':{i}' for i in range(1, len(REVIEW_COLUMNS) + 1))
+
+INSERT_REVIEW_SQL = f"INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)}) VALUES ({_BINDS})"
+
+STAGE_REVIEW_SQL = f"INSERT INTO reviews_stage ({', '.join(REVIEW_COLUMNS)}) VALUES ({_BINDS})"
+
+# Normalized theme and keyword rows of each review
+INSERT_THEME_SQL = "INSERT INTO review_theme (review_id, theme) VALUES (:1, :2)"
+INSERT_KEYWORD_SQL = "INSERT INTO review_keyword (review_id, keyword, occurrences) VALUES (:1, :2, :3)"
+DELETE_CHILD_SQL = {
+    'review_theme': "DELETE FROM review_theme WHERE review_id = :1",
+    'review_keyword': "DELETE FROM review_keyword WHERE review_id = :1"
+}
+
+# Staged reviews the MERGE will insert or update
+CHANGED_STAGE_KEYS_SQL = """
+    SELECT s.review_key FROM reviews_stage s
+    LEFT JOIN reviews r ON r.review_key = s.review_key
+    WHERE r.review_key IS NULL OR r.row_hash IS NULL OR r.row_hash <> s.row_hash
+"""
+
+# Keys looked up per query when mapping review_key to review_id; Oracle
+# accepts at most 1000 expressions in an IN list
+KEY_LOOKUP_CHUNK = 500
+
+# Bind type of the unbounded text columns, the driver's CLOB type on Oracle
+CLOB = 'CLOB'
+
+# Bind types of REVIEW_COLUMNS; integers are maximum string lengths
+REVIEW_INPUT_SIZES = [32, int, CLOB, float, date, 100, 20, float, float, float, CLOB, CLOB, 32]
+
+def review_input_sizes(dialect):
+    """
+    Bind types of REVIEW_COLUMNS for a dialect.
+    
+    On Oracle, CLOB columns are bound as cx_Oracle.DB_TYPE_CLOB so reviews
+    longer than 4000 bytes load; other drivers ignore input sizes.
+    
+    Args:
+        dialect (str): SQL dialect of the connection
+        
+    Returns:
+        list: Arguments of cursor.setinputsizes
+    """
+    if dialect != 'oracle':
+        return REVIEW_INPUT_SIZES
+    import cx_Oracle
+    return [cx_Oracle.DB_TYPE_CLOB if size == CLOB else size for size in REVIEW_INPUT_SIZES]
+
+# Set-based apply of the staged reviews, keyed on review_key; rows whose
+# row_hash is unchanged are left untouched
+_UPDATED_COLUMNS = [column for column in REVIEW_COLUMNS if column != 'review_key']
+MERGE_REVIEWS_SQL = {
+    'oracle': f"""
+        MERGE INTO reviews r
+        USING reviews_stage s
+        ON (r.review_key = s.review_key)
+        WHEN MATCHED THEN UPDATE SET
+            {', '.join(f'r.{column} = s.{column}' for column in _UPDATED_COLUMNS)},
+            r.updated_at = SYSTIMESTAMP
+            WHERE r.row_hash <> s.row_hash OR r.row_hash IS NULL
+        WHEN NOT MATCHED THEN INSERT ({', '.join(REVIEW_COLUMNS)})
+            VALUES ({', '.join(f's.{column}' for column in REVIEW_COLUMNS)})
+    """,
+    'sqlite': f"""
+        INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)})
+        SELECT {', '.join(REVIEW_COLUMNS)} FROM reviews_stage WHERE true
+        ON CONFLICT (review_key) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in _UPDATED_COLUMNS)},
+            updated_at = CURRENT_TIMESTAMP
+            WHERE reviews.row_hash IS NOT excluded.row_hash
+    """,
+    'postgresql': f"""
+        INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)})
+        SELECT {', '.join(REVIEW_COLUMNS)} FROM reviews_stage
+        ON CONFLICT (review_key) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in _UPDATED_COLUMNS)},
+            updated_at = CURRENT_TIMESTAMP
+            WHERE reviews.row_hash IS DISTINCT FROM excluded.row_hash
+    """
+}
+
+# Schemas created by create_tables; Oracle reads CREATE_TABLES_SQL
+SCHEMA_SCRIPTS = {
+    'sqlite': SCHEMA_SQL,
+    'postgresql': POSTGRES_SCHEMA_SQL
+}
+
+# Oracle error raised by CREATE for an existing object
+ORA_NAME_ALREADY_USED = 955
 
 class DatabaseManager:
-    def __init__(self):
-        """Initialize database connection."""
-        try:
-            self.connection = cx_Oracle.connect(**DB_CONFIG)
-            logger.info("Successfully connected to Oracle database")
-        except cx_Oracle.Error as error:
-            logger.error(f"Error connecting to Oracle database: {error}")
-            raise
+    def __init__(self, connection=None, backend=None):
+        """
+        Initialize database connection.
+        
+        Without a connection, one is acquired from the pool of the backend,
+        by default the shared backend selected by DB_BACKEND, and handed
+        back to the pool by close.
+        
+        Args:
+            connection (optional): Open DB-API connection to use instead of
+                a pooled one, e.g. an SQLiteConnection stand-in
+            backend (Backend, optional): Pooled backend to acquire from
+        """
+        if connection is not None:
+            self.backend = None
+            self.connection = connection
+            self.dialect = getattr(connection, 'dialect', 'oracle')
+            return
+        self.backend = backend if backend is not None else get_backend()
+        self.dialect = self.backend.dialect
+        self.connection = self.backend.acquire()
 
     def create_tables(self):
-        """Create database tables using the SQL script."""
+        """Create database tables using the SQL script, keeping existing ones."""
         try:
-            with open(CREATE_TABLES_SQL, 'r') as file:
-                sql_script = file.read()
+            if self.dialect in SCHEMA_SCRIPTS:
+                sql_script = SCHEMA_SCRIPTS[self.dialect]
+            else:
+                with open(CREATE_TABLES_SQL, 'r') as file:
+                    sql_script = file.read()
             
             cursor = self.connection.cursor()
             for statement in sql_script.split(';'):
                 if statement.strip():
-                    cursor.execute(statement)
+                    try:
+                        cursor.execute(statement)
+                    except Exception as e:
+                        if not self._already_exists(e):
+                            raise
             self.connection.commit()
             logger.info("Successfully created database tables")
         except Exception as e:
             logger.error(f"Error creating tables: {e}")
             raise
 
+    @staticmethod
+    def _already_exists(error):
+        """Tell whether a CREATE failed only because the object exists."""
+        if not error.args:
+            return False
+        return getattr(error.args[0], 'code', None) == ORA_NAME_ALREADY_USED
+
     def insert_banks(self, banks_df):
         """Insert unique banks into the banks table."""
         try:
@@ -58,70 +183,212 @@ class DatabaseManager:
             cursor.execute("SELECT bank_name FROM banks")
             existing_banks = {row[0] for row in cursor.fetchall()}
             
-            # Insert new banks
-            for bank_name in banks_df['bank'].unique():
-                if bank_name not in existing_banks:
-                    cursor.execute(
-                        "INSERT INTO banks (bank_name) VALUES (:1)",
-                        [bank_name]
-                    )
+            # Insert new banks in one round trip
+            new_banks = [[bank_name] for bank_name in banks_df['bank'].unique() if bank_name not in existing_banks]
+            if new_banks:
+                cursor.executemany("INSERT INTO banks (bank_name) VALUES (:1)", new_banks)
             
             self.connection.commit()
-            logger.info("Successfully inserted banks")
+            logger.info(f"Successfully inserted {len(new_banks)} banks")
         except Exception as e:
             logger.error(f"Error inserting banks: {e}")
             raise
 
-    def insert_reviews(self, reviews_df):
-        """Insert reviews into the reviews table."""
+    def insert_reviews(self, reviews_df, batch_size=DEFAULT_LOAD_BATCH_SIZE):
+        """
+        Bulk insert reviews into the reviews table.
+        
+        Rows are bound as arrays with executemany, one call and one commit
+        per batch. The themes and keywords of each batch are also loaded
+        into the review_theme and review_keyword tables.
+        
+        Args:
+            reviews_df (pd.DataFrame): Reviews merged with their analysis results
+            batch_size (int): Number of rows sent and committed per batch
+            
+        Returns:
+            dict: Rows inserted, elapsed seconds and rows per second
+        """
         try:
+            start = time.perf_counter()
             cursor = self.connection.cursor()
             
             # Get bank IDs
             cursor.execute("SELECT bank_id, bank_name FROM banks")
             bank_ids = {row[1]: row[0] for row in cursor.fetchall()}
             
-            # Prepare data for insertion
-            for _, row in reviews_df.iterrows():
-                bank_id = bank_ids[row['bank']]
-                
-                # Convert themes and keywords to strings
-                themes = '|'.join(row['themes']) if isinstance(row['themes'], list) else row['themes']
-                keywords = '|'.join(row['keywords']) if isinstance(row['keywords'], list) else row['keywords']
-                
-                cursor.execute("""
-                    INSERT INTO reviews (
-                        bank_id, review_text, rating, review_date, source,
-                        sentiment_label, sentiment_score, vader_score, textblob_score,
-                        themes, keywords
-                    ) VALUES (
-                        :1, :2, :3, :4, :5, :6, :7, :8, :9, :10, :11
-                    )
-                """, [
-                    bank_id,
-                    row['review'],
-                    float(row['rating']),
-                    datetime.strptime(row['date'], '%Y-%m-%d').date(),
-                    row['source'],
-                    row['sentiment_label'],
-                    float(row['sentiment_score']),
-                    float(row['vader_score']),
-                    float(row['textblob_score']),
-                    themes,
-                    keywords
-                ])
+            rows = self._review_rows(reviews_df, bank_ids)
+            for offset in range(0, len(rows), batch_size):
+                batch = rows[offset:offset + batch_size]
+                cursor.setinputsizes(*review_input_sizes(self.dialect))
+                cursor.executemany(INSERT_REVIEW_SQL, batch)
+                self._load_review_children(cursor, batch)
+                self.connection.commit()
             
-            self.connection.commit()
-            logger.info("Successfully inserted reviews")
+            elapsed = time.perf_counter() - start
+            stats = {
+                'rows': len(rows),
+                'seconds': elapsed,
+                'rows_per_second': len(rows) / elapsed if elapsed else 0.0
+            }
+            logger.info(f"Successfully inserted {len(rows)} reviews ({stats['rows_per_second']:.0f} rows/s)")
+            return stats
         except Exception as e:
             logger.error(f"Error inserting reviews: {e}")
             raise
 
+    def upsert_reviews(self, reviews_df, batch_size=DEFAULT_LOAD_BATCH_SIZE):
+        """
+        Idempotently load reviews, keyed on their review_key fingerprint.
+        
+        All rows are bulk-loaded into the reviews_stage table and applied
+        with one set-based MERGE (INSERT ... ON CONFLICT on SQLite). New
+        reviews are inserted, changed reviews updated and unchanged reviews
+        left alone, so loading the same data twice changes nothing. The
+        review_theme and review_keyword rows of inserted and updated reviews
+        are replaced in the same transaction.
+        
+        Args:
+            reviews_df (pd.DataFrame): Reviews merged with their analysis results
+            batch_size (int): Number of rows staged per executemany call
+            
+        Returns:
+            dict: Rows staged, rows inserted or updated, elapsed seconds and
+                rows per second
+        """
+        try:
+            start = time.perf_counter()
+            cursor = self.connection.cursor()
+            
+            # Get bank IDs
+            cursor.execute("SELECT bank_id, bank_name FROM banks")
+            bank_ids = {row[1]: row[0] for row in cursor.fetchall()}
+            
+            # MERGE needs one source row per key; the last occurrence wins
+            rows = list({row[0]: row for row in self._review_rows(reviews_df, bank_ids)}.values())
+            
+            for offset in range(0, len(rows), batch_size):
+                # Input sizes apply to the next statement only
+                cursor.setinputsizes(*review_input_sizes(self.dialect))
+                cursor.executemany(STAGE_REVIEW_SQL, rows[offset:offset + batch_size])
+            
+            cursor.execute(CHANGED_STAGE_KEYS_SQL)
+            changed_keys = {row[0] for row in cursor.fetchall()}
+            cursor.execute(MERGE_REVIEWS_SQL[self.dialect])
+            changed = cursor.rowcount
+            
+            changed_rows = [row for row in rows if row[0] in changed_keys]
+            for offset in range(0, len(changed_rows), batch_size):
+                self._load_review_children(cursor, changed_rows[offset:offset + batch_size])
+            
+            # Oracle empties the temporary stage table on commit
+            if self.dialect != 'oracle':
+                cursor.execute("DELETE FROM reviews_stage")
+            self.connection.commit()
+            
+            elapsed = time.perf_counter() - start
+            stats = {
+                'rows': len(rows),
+                'changed': changed,
+                'seconds': elapsed,
+                'rows_per_second': len(rows) / elapsed if elapsed else 0.0
+            }
+            logger.info(f"Merged {len(rows)} reviews, {changed} inserted or updated "
+                        f"({stats['rows_per_second']:.0f} rows/s)")
+            return stats
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Error upserting reviews: {e}")
+            raise
+
+    @staticmethod
+    def _load_review_children(cursor, rows):
+        """
+        Replace the review_theme and review_keyword rows of loaded reviews.
+        
+        Args:
+            cursor: Cursor of the loading transaction
+            rows (list): Bind rows from _review_rows, already in the reviews table
+        """
+        review_ids = {}
+        keys = [row[0] for row in rows]
+        for offset in range(0, len(keys), KEY_LOOKUP_CHUNK):
+            chunk = keys[offset:offset + KEY_LOOKUP_CHUNK]
+            binds = ', '.join(f':{i}' for i in range(1, len(chunk) + 1))
+            cursor.execute(f"SELECT review_key, review_id FROM reviews WHERE review_key IN ({binds})", chunk)
+            review_ids.update(cursor.fetchall())
+        
+        ids = [[review_ids[key]] for key in keys]
+        theme_rows, keyword_rows = [], []
+        for (review_id,), row in zip(ids, rows):
+            themes, keywords = row[10], row[11]
+            if themes:
+                theme_rows.extend([review_id, theme] for theme in dict.fromkeys(themes.split('|')))
+            if keywords:
+                keyword_rows.extend(
+                    [review_id, keyword, occurrences]
+                    for keyword, occurrences in Counter(keywords.split('|')).items()
+                )
+        
+        for sql in DELETE_CHILD_SQL.values():
+            cursor.executemany(sql, ids)
+        if theme_rows:
+            cursor.executemany(INSERT_THEME_SQL, theme_rows)
+        if keyword_rows:
+            cursor.executemany(INSERT_KEYWORD_SQL, keyword_rows)
+
+    @staticmethod
+    def _review_rows(reviews_df, bank_ids):
+        """
+        Build the bind rows of INSERT_REVIEW_SQL column by column.
+        
+        Args:
+            reviews_df (pd.DataFrame): Reviews merged with their analysis results
+            bank_ids (dict): Mapping of bank name to bank_id
+            
+        Returns:
+            list: One list of bind values per review, with None for missing values
+        """
+        bank_id = reviews_df['bank'].map(bank_ids)
+        if bank_id.isna().any():
+            raise KeyError(f"Unknown banks: {sorted(set(reviews_df.loc[bank_id.isna(), 'bank']))}")
+        
+        # Convert themes and keywords to strings
+        def join(values):
+            return values.map(lambda x: '|'.join(x) if isinstance(x, list) else x)
+        
+        columns = pd.DataFrame({
+            'review_key': review_keys(reviews_df).to_numpy(),
+            'bank_id': bank_id.astype(int),
+            'review': reviews_df['review'],
+            'rating': reviews_df['rating'].astype(float),
+            'date': pd.to_datetime(reviews_df['date'], format='%Y-%m-%d').dt.date,
+            'source': reviews_df['source'],
+            'sentiment_label': reviews_df['sentiment_label'],
+            'sentiment_score': reviews_df['sentiment_score'].astype(float),
+            'vader_score': reviews_df['vader_score'].astype(float),
+            'textblob_score': reviews_df['textblob_score'].astype(float),
+            'themes': join(reviews_df['themes']),
+            'keywords': join(reviews_df['keywords'])
+        }).astype(object)
+        rows = columns.where(columns.notna(), None).values.tolist()
+        
+        # Fingerprint of the loaded values, used to skip unchanged rows on merge
+        for row in rows:
+            row.append(hashlib.blake2b(repr(row[1:]).encode('utf-8'), digest_size=16).hexdigest())
+        return rows
+
     def close(self):
-        """Close the database connection."""
-        if hasattr(self, 'connection'):
+        """Close the database connection, or return it to the backend pool."""
+        if not hasattr(self, 'connection'):
+            return
+        if self.backend is not None:
+            self.backend.release(self.connection)
+            logger.info("Database connection returned to the pool")
+        else:
             self.connection.close()
             logger.info("Database connection closed")
+        del self.connection
 
 def main():
     """Main function to populate the database."""
@@ -134,13 +401,16 @@ def main():
         
         # Load data
         reviews_df = pd.read_csv(REVIEWS_FILE)
-        sentiment_df = pd.read_csv(SENTIMENT_RESULTS_FILE)
+        sentiment_df = read_results(
+            locate_results(SENTIMENT_RESULTS_FILE.parent),
+            columns=['review_id', 'sentiment_label', 'sentiment_score',
+                     'vader_score', 'textblob_score', 'themes', 'keywords']
+        )
         
         # Merge data
         merged_df = pd.merge(
             reviews_df,
-            sentiment_df[['review_id', 'sentiment_label', 'sentiment_score', 
-                         'vader_score', 'textblob_score', 'themes', 'keywords']],
+            sentiment_df,
             left_index=True,
             right_on='review_id',
             how='left'
@@ -148,7 +418,7 @@ def main():
         
         # Insert data
         db_manager.insert_banks(merged_df)
-        db_manager.insert_reviews(merged_df)
+        db_manager.upsert_reviews(merged_df)
         
         logger.info("Database population completed successfully")
     except Exception as e:
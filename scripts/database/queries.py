@@ -0,0 +1,165 @@
+"""
+Analytic queries answered inside the database.
+
+These mirror the aggregations of InsightsAnalyzer on the normalized
+review_theme and review_keyword tables, so only the aggregated rows leave
+the database. Every function takes an open connection with the cx_Oracle
+interface, e.g. one acquired from a backend pool or an SQLiteConnection.
+"""
+
+import pandas as pd
+
+# Month of a review date as 'YYYY-MM'
+MONTH_SQL = {
+    'oracle': "TO_CHAR(r.review_date, 'YYYY-MM')",
+    'postgresql': "TO_CHAR(r.review_date, 'YYYY-MM')",
+    'sqlite': "strftime('%Y-%m', r.review_date)"
+}
+
+THEME_COUNTS_SQL = """
+    SELECT b.bank_name, t.theme, COUNT(*)
+    FROM review_theme t
+    JOIN reviews r ON r.review_id = t.review_id
+    JOIN banks b ON b.bank_id = r.bank_id
+    GROUP BY b.bank_name, t.theme
+    ORDER BY b.bank_name, COUNT(*) DESC, t.theme
+"""
+
+# Most frequent themes per bank among reviews of one sentiment
+TOP_THEMES_SQL = """
+    SELECT bank_name, theme, reviews FROM (
+        SELECT b.bank_name, t.theme, COUNT(*) AS reviews,
+               ROW_NUMBER() OVER (PARTITION BY b.bank_name ORDER BY COUNT(*) DESC, t.theme) AS theme_rank
+        FROM review_theme t
+        JOIN reviews r ON r.review_id = t.review_id
+        JOIN banks b ON b.bank_id = r.bank_id
+        WHERE r.sentiment_label = :1
+        GROUP BY b.bank_name, t.theme
+    ) ranked
+    WHERE theme_rank <= :2
+    ORDER BY bank_name, theme_rank
+"""
+
+TOP_KEYWORDS_SQL = """
+    SELECT keyword, occurrences FROM (
+        SELECT k.keyword, SUM(k.occurrences) AS occurrences,
+               ROW_NUMBER() OVER (ORDER BY SUM(k.occurrences) DESC, k.keyword) AS keyword_rank
+        FROM review_keyword k
+        JOIN reviews r ON r.review_id = k.review_id
+        JOIN banks b ON b.bank_id = r.bank_id
+        WHERE b.bank_name = :1
+        GROUP BY k.keyword
+    ) ranked
+    WHERE keyword_rank <= :2
+    ORDER BY keyword_rank
+"""
+
+def _dialect(connection):
+    return getattr(connection, 'dialect', 'oracle')
+
+def _bank_names(cursor):
+    cursor.execute("SELECT bank_name FROM banks ORDER BY bank_name")
+    return [row[0] for row in cursor.fetchall()]
+
+def theme_counts(connection):
+    """
+    Count reviews per theme for every bank.
+    
+    Args:
+        connection: Open database connection
+        
+    Returns:
+        dict: Mapping of bank name to {theme: number of reviews}, most
+            frequent theme first
+    """
+    cursor = connection.cursor()
+    counts = {bank: {} for bank in _bank_names(cursor)}
+    cursor.execute(THEME_COUNTS_SQL)
+    for bank, theme, count in cursor.fetchall():
+        counts[bank][theme] = count
+    return counts
+
+def top_themes(connection, sentiment_label, top=2):
+    """
+    Find the most frequent themes per bank among reviews of one sentiment.
+    
+    Ties are broken by theme name.
+    
+    Args:
+        connection: Open database connection
+        sentiment_label (str): 'POSITIVE', 'NEGATIVE' or 'NEUTRAL'
+        top (int): Number of themes kept per bank
+        
+    Returns:
+        dict: Mapping of bank name to {theme: number of reviews}
+    """
+    cursor = connection.cursor()
+    themes = {bank: {} for bank in _bank_names(cursor)}
+    cursor.execute(TOP_THEMES_SQL, [sentiment_label, top])
+    for bank, theme, count in cursor.fetchall():
+        themes[bank][theme] = count
+    return themes
+
+def drivers(connection, top=2):
+    """Top themes of positive reviews per bank, as in InsightsAnalyzer.generate_insights."""
+    return top_themes(connection, 'POSITIVE', top)
+
+def pain_points(connection, top=2):
+    """Top themes of negative reviews per bank, as in InsightsAnalyzer.generate_insights."""
+    return top_themes(connection, 'NEGATIVE', top)
+
+def top_keywords(connection, bank, top=100):
+    """
+    Find the most frequent keywords of a bank's reviews, e.g. for its keyword cloud.
+    
+    Args:
+        connection: Open database connection
+        bank (str): Bank name
+        top (int): Number of keywords returned
+        
+    Returns:
+        dict: Mapping of keyword to occurrences, most frequent first
+    """
+    cursor = connection.cursor()
+    cursor.execute(TOP_KEYWORDS_SQL, [bank, top])
+    return dict(cursor.fetchall())
+
+def monthly_theme_counts(connection, sentiment_label=None, theme=None):
+    """
+    Count reviews per bank, month, theme and sentiment.
+    
+    Answers questions like "NEGATIVE reviews with theme X per bank per
+    month" from the theme index instead of scanning review texts.
+    
+    Args:
+        connection: Open database connection
+        sentiment_label (str, optional): Only count reviews with this sentiment
+        theme (str, optional): Only count reviews with this theme
+        
+    Returns:
+        pd.DataFrame: Columns bank, month, theme, sentiment_label and reviews
+    """
+    filters, params = [], []
+    if sentiment_label is not None:
+        params.append(sentiment_label)
+        filters.append(f"r.sentiment_label = :{len(params)}")
+    if theme is not None:
+        params.append(theme)
+        filters.append(f"t.theme = :{len(params)}")
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    month = MONTH_SQL[_dialect(connection)]
+    
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT b.bank_name, {month}, t.theme, r.sentiment_label, COUNT(*)
+        FROM review_theme t
+        JOIN reviews r ON r.review_id = t.review_id
+        JOIN banks b ON b.bank_id = r.bank_id
+        {where}
+        GROUP BY b.bank_name, {month}, t.theme, r.sentiment_label
+        ORDER BY 1, 2, 3, 4
+    """, params)
+    return pd.DataFrame(
+        cursor.fetchall(),
+        columns=['bank', 'month', 'theme', 'sentiment_label', 'reviews']
+    )
@@ -0,0 +1,137 @@
+"""
+Local SQLite stand-in for the Oracle database.
+
+Wraps a sqlite3 connection behind the subset of the cx_Oracle interface
+used by DatabaseManager, so loaders can be run and tested without an
+Oracle server.
+"""
+
+import re
+import sqlite3
+
+# Schema equivalent to the Oracle tables described in README.md
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS banks (
+    bank_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bank_name TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    review_key TEXT NOT NULL UNIQUE,
+    bank_id INTEGER NOT NULL REFERENCES banks (bank_id),
+    review_text TEXT,
+    rating REAL,
+    review_date DATE,
+    source TEXT,
+    sentiment_label TEXT,
+    sentiment_score REAL,
+    vader_score REAL,
+    textblob_score REAL,
+    themes TEXT,
+    keywords TEXT,
+    row_hash TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS reviews_bank_date_ix ON reviews (bank_id, review_date, sentiment_label);
+CREATE TABLE IF NOT EXISTS review_theme (
+    review_id INTEGER NOT NULL REFERENCES reviews (review_id) ON DELETE CASCADE,
+    theme TEXT NOT NULL,
+    PRIMARY KEY (review_id, theme)
+);
+CREATE INDEX IF NOT EXISTS review_theme_theme_ix ON review_theme (theme, review_id);
+CREATE TABLE IF NOT EXISTS review_keyword (
+    review_id INTEGER NOT NULL REFERENCES reviews (review_id) ON DELETE CASCADE,
+    keyword TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    PRIMARY KEY (review_id, keyword)
+);
+CREATE INDEX IF NOT EXISTS review_keyword_keyword_ix ON review_keyword (keyword, review_id);
+CREATE TEMP TABLE IF NOT EXISTS reviews_stage (
+    review_key TEXT NOT NULL,
+    bank_id INTEGER NOT NULL,
+    review_text TEXT,
+    rating REAL,
+    review_date DATE,
+    source TEXT,
+    sentiment_label TEXT,
+    sentiment_score REAL,
+    vader_score REAL,
+    textblob_score REAL,
+    themes TEXT,
+    keywords TEXT,
+    row_hash TEXT
+)
+"""
+
+# Oracle positional binds (:1, :2, ...) become SQLite qmark binds
+_POSITIONAL_BIND = re.compile(r':\d+')
+
+class SQLiteCursor:
+    """Cursor accepting Oracle-style statements and binds."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def setinputsizes(self, *args, **kwargs):
+        """SQLite binds are dynamically typed, so input sizes are ignored."""
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_POSITIONAL_BIND.sub('?', sql), [_adapt(value) for value in params])
+        return self
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(
+            _POSITIONAL_BIND.sub('?', sql),
+            ([_adapt(value) for value in row] for row in rows)
+        )
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """sqlite3 connection exposing the cx_Oracle connection methods DatabaseManager uses."""
+
+    # SQL dialect DatabaseManager generates statements for
+    dialect = 'sqlite'
+
+    def __init__(self, database=':memory:'):
+        """
+        Open the database and create the tables.
+
+        Args:
+            database (str or Path): SQLite file or "file:" URI, in memory by default
+        """
+        # Pooled connections are handed between threads
+        self._connection = sqlite3.connect(str(database), uri=True, check_same_thread=False)
+        self._connection.executescript(SCHEMA_SQL)
+
+    def cursor(self):
+        return SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+def _adapt(value):
+    """Store dates as ISO strings, as sqlite3's default adapters are deprecated."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
@@ -0,0 +1,138 @@
+import math
+import re
+from collections import Counter
+
+# Language tags of detect_language
+ENGLISH = "en"
+AMHARIC = "am"
+AMHARIC_LATIN = "am-latn"
+OTHER = "other"
+UNDETERMINED = "und"
+
+# Ethiopic, Ethiopic Supplement, Ethiopic Extended and Extended-A letters
+_ETHIOPIC = re.compile("[ሀ-᎟ⶀ-⷟꬀-꬯]")
+_LATIN = re.compile("[a-zA-ZÀ-ɏ]")
+_LATIN_WORD = re.compile("[a-z]+")
+
+# Common English words of app reviews, the English character model
+ENGLISH_WORDS = """
+the a an and or but not no is are was were be been it its this that these those i you we they he she my
+your our their me us them to of in on at for with from by as about into over after before under again very
+so too just only also more most much many some any all every each other new good great nice best better bad
+worst poor excellent amazing awesome love like easy fast slow simple helpful useful wonderful perfect please
+thank thanks app application bank banking mobile account transfer money payment service services customer
+support update version login password network error problem issue work works working worked use using used
+time always never sometimes still even ever can cannot could would should will do does did done have has had
+make makes get got give keep open opening crash crashes fix need needs want try there here what when where
+why how which who because if then than well really quite experience system feature features option phone
+send receive balance transaction transactions card code otp screen page system branch easy user friendly
+yes ok okay real life game changer smart technology review
+""".split()
+
+# Common words of Amharic written in Latin letters, the transliteration model
+AMHARIC_LATIN_WORDS = """
+betam betm mirt mrt tiru tru arif arf gobez konjo des yilal yelem ylm alew alw aydelem aydel new nw gin gn
+ena na le be ke wede yihe yhe yih endet lemin lmn min mn man yet sew bir birr neger hulu hulum tinish tnsh
+bicha bcha ahun ahn ebakachu ebakih ebakish ameseginalehu amesegnalehu amesegenalehu selam tebareku
+yibarek yebarkachu egziabher amlak chigr chiger aysera ayseram yeseral yemiyaseraw aykebelm atikakem michu
+kelel yale yetemeta yemeta tegebi akawnt lay wust silk silke lak mela eske gize sint ewnet bzu enji nachu
+nat nachew alebet kezih bet ager hagere abet awo aydelem yichalal ychalal yasfeligal yistekakel malet
+ende yemil yemiyasfelig weym wey lela lelam ayne yene yante yanchi yenante endih endezih sele sle
+""".split()
+
+def default_english_words():
+    """ENGLISH_WORDS, scikit-learn's English stop words and the words of the VADER lexicon."""
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    lexicon = SentimentIntensityAnalyzer().lexicon
+    return set(ENGLISH_WORDS) | ENGLISH_STOP_WORDS | {word for word in lexicon if word.isalpha()}
+
+def _trigrams(word):
+    padded = f" {word} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+class TrigramModel:
+    """Add-one smoothed character trigram model of a word list."""
+
+    def __init__(self, words):
+        self.counts = Counter(gram for word in words for gram in _trigrams(word))
+        self.total = sum(self.counts.values())
+        self.size = len(self.counts) + 1
+
+    def log_probability(self, gram):
+        return math.log((self.counts.get(gram, 0) + 1) / (self.total + self.size))
+
+class LanguageDetector:
+    """Tag reviews as English, Amharic, transliterated Amharic, other or undetermined.
+
+    Reviews are first told apart by script: mostly Ethiopic letters is
+    Amharic, letters of another script only (e.g. Arabic) is other, and no
+    letters at all (emoji, numbers) is undetermined. Each word of
+    Latin text then votes: known English words for English, known
+    transliterated words for Amharic, and any other word for the character
+    trigram model it fits best by more than threshold (mean log-likelihood
+    ratio). Ties go to English, so the English analyzers still see text they
+    might be able to score.
+    """
+
+    def __init__(self, threshold=0.5, english_words=None):
+        self.threshold = threshold
+        if english_words is None:
+            english_words = default_english_words()
+        self.english = frozenset(english_words)
+        self.amharic = frozenset(AMHARIC_LATIN_WORDS)
+        english = TrigramModel(ENGLISH_WORDS)
+        amharic = TrigramModel(AMHARIC_LATIN_WORDS)
+        grams = set(english.counts) | set(amharic.counts)
+        self.ratios = {gram: amharic.log_probability(gram) - english.log_probability(gram) for gram in grams}
+        # Trigrams neither model has seen
+        self.unseen = amharic.log_probability("") - english.log_probability("")
+
+    def word_score(self, word):
+        """Mean log-likelihood ratio of transliterated Amharic over English for one word."""
+        ratios, unseen = self.ratios, self.unseen
+        grams = _trigrams(word)
+        return sum(ratios.get(gram, unseen) for gram in grams) / len(grams)
+
+    def latin_votes(self, text):
+        """Count the (English, transliterated Amharic) votes of the Latin words of a text."""
+        english = amharic = 0
+        for word in _LATIN_WORD.findall(text.lower()):
+            if word in self.english:
+                english += 1
+            elif word in self.amharic:
+                amharic += 1
+            elif len(word) > 2:
+                score = self.word_score(word)
+                if score > self.threshold:
+                    amharic += 1
+                elif score < -self.threshold:
+                    english += 1
+        return english, amharic
+
+    def detect(self, text):
+        if not isinstance(text, str):
+            return UNDETERMINED
+        ethiopic = len(_ETHIOPIC.findall(text))
+        latin = len(_LATIN.findall(text))
+        if ethiopic == 0 and latin == 0:
+            return OTHER if any(char.isalpha() for char in text) else UNDETERMINED
+        if ethiopic >= latin:
+            return AMHARIC
+        english, amharic = self.latin_votes(text)
+        return AMHARIC_LATIN if amharic > english else ENGLISH
+
+    def tag(self, texts):
+        return [self.detect(text) for text in texts]
+
+_default_detector = None
+
+def tag_languages(df, detector=None):
+    detector = LanguageDetector() if detector is None else detector
+    return df.assign(language=detector.tag(df["review"]))
+
+def detect_language(text):
+    global _default_detector
+    if _default_detector is None:
+        _default_detector = LanguageDetector()
+    return _default_detector.detect(text)
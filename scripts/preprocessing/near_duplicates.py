@@ -0,0 +1,157 @@
+import logging
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Defaults of NearDuplicateDetector
+DEFAULT_NUM_PERM = 32
+DEFAULT_BANDS = 8
+DEFAULT_THRESHOLD = 0.8
+
+_WORDS = re.compile(r"\w+")
+
+def normalize_review(text):
+    """Lowercase words only, so "Good app", "good app!!" and "Good app 👍" are equal.
+
+    Text without any word characters (e.g. only emoji) keeps its symbols.
+    """
+    text = "" if not isinstance(text, str) else text
+    return " ".join(_WORDS.findall(text.lower())) or "".join(text.split())
+
+def _hash_shingles(texts):
+    """Hash the character 3-grams of normalized texts, padded with a space on both sides.
+
+    Texts normalizing to "" become three spaces, so every text has at least
+    one 3-gram and all empty texts share a signature.
+
+    Returns the 32-bit hashes of all texts back to back and the position of
+    the first hash of every text.
+    """
+    padded = [f" {normalize_review(text) or ' '} " for text in texts]
+    lengths = np.array([len(text) for text in padded], dtype=np.int64)
+    codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    grams = codes[:-2] * np.uint64(0x10FFFF * 0x10FFFF) + codes[1:-1] * np.uint64(0x10FFFF) + codes[2:]
+    # Drop 3-grams that span two texts
+    text_of = np.repeat(np.arange(len(padded)), lengths)
+    grams = grams[text_of[:-2] == text_of[2:]]
+    hashes = (grams * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+    starts = np.cumsum(lengths) - lengths - 2 * np.arange(len(padded))
+    return hashes, starts
+
+class NearDuplicateDetector:
+    """Cluster near-duplicate reviews with MinHash signatures and LSH banding.
+
+    Every review gets a MinHash signature of its character 3-grams. The
+    signature is cut into bands; reviews of the same group (bank) sharing a
+    band with an earlier cluster representative are compared with it, and
+    join its cluster when their estimated Jaccard similarity reaches
+    threshold. Work per review is constant, so a whole stream is clustered in
+    linear time. Only cluster representatives are indexed, and state persists
+    across calls to assign, so duplicates are found across chunks.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS, threshold=DEFAULT_THRESHOLD,
+                 seed=1, batch_size=2000):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.batch_size = batch_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash functions standing in for random permutations
+        self.a = (rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1))[:, None]
+        self.b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)[:, None]
+        # Band hash -> cluster, and the signature of every cluster representative
+        self.buckets = {}
+        self.representatives = np.empty((0, num_perm), dtype=np.uint32)
+        self.sizes = []
+
+    def signatures(self, texts):
+        """MinHash signatures of texts, one row per text."""
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            hashes, starts = _hash_shingles(batch)
+            permuted = (self.a * hashes + self.b) >> np.uint64(32)
+            result[start:start + len(batch)] = np.minimum.reduceat(permuted, starts, axis=1).T
+        return result
+
+    def band_keys(self, groups, signatures):
+        """Hash every band of every signature together with the group and band number."""
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        keys = np.zeros(bands.shape[:2], dtype=np.uint64)
+        for row in range(self.rows):
+            keys = keys * np.uint64(0x100000001B3) ^ bands[:, :, row]
+        group_keys = np.array([hash(group) for group in groups], dtype=np.int64).view(np.uint64)
+        keys ^= group_keys[:, None] * np.uint64(0x9E3779B97F4A7C15)
+        keys += np.arange(self.bands, dtype=np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)
+        return keys
+
+    def _new_cluster(self, signature):
+        cluster = len(self.sizes)
+        if cluster == len(self.representatives):
+            grown = np.empty((max(1024, 2 * cluster), self.num_perm), dtype=np.uint32)
+            grown[:cluster] = self.representatives
+            self.representatives = grown
+        self.representatives[cluster] = signature
+        self.sizes.append(0)
+        return cluster
+
+    def assign(self, groups, texts):
+        """Assign every review to a cluster, numbered in order of first appearance.
+
+        Args:
+            groups (iterable): Group of every review; only reviews of the same
+                group can be near duplicates
+            texts (sequence): Review texts
+
+        Returns:
+            list: Cluster id of every review
+        """
+        texts = list(texts)
+        signatures = self.signatures(texts)
+        band_keys = self.band_keys(list(groups), signatures).tolist()
+        buckets, min_agreement = self.buckets, self.threshold * self.num_perm
+        clusters = []
+        for signature, keys in zip(signatures, band_keys):
+            cluster = None
+            for key in keys:
+                candidate = buckets.get(key)
+                if candidate is not None and \
+                        np.count_nonzero(self.representatives[candidate] == signature) >= min_agreement:
+                    cluster = candidate
+                    break
+            if cluster is None:
+                cluster = self._new_cluster(signature)
+                for key in keys:
+                    buckets.setdefault(key, cluster)
+            self.sizes[cluster] += 1
+            clusters.append(cluster)
+        return clusters
+
+def cluster_near_duplicates(df, detector=None, collapse=False):
+    """Add a cluster_id column, or keep only the first review of every cluster.
+
+    When collapsing, cluster_size records how many reviews of df each kept
+    review stands for. Reviews joining a cluster that an earlier frame of the
+    same detector opened are dropped, and since that cluster's review was
+    already returned its cluster_size stays short of them: cluster_size is
+    per frame. A warning counts such reviews; the size of every cluster over
+    all frames so far is detector.sizes[cluster_id].
+    """
+    detector = NearDuplicateDetector() if detector is None else detector
+    start = len(detector.sizes)
+    df = df.assign(cluster_id=detector.assign(df["bank"], df["review"]))
+    if collapse:
+        sizes = df["cluster_id"].map(df["cluster_id"].value_counts())
+        earlier = df["cluster_id"] < start
+        if earlier.any():
+            logger.warning(f"{int(earlier.sum())} reviews joined clusters of earlier frames; "
+                           "their cluster_size does not count them")
+        keep = ~df["cluster_id"].duplicated() & ~earlier
+        df = df.assign(cluster_size=sizes)[keep]
+    return df
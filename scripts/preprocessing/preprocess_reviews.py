@@ -1,22 +1,103 @@
+import hashlib
+
 import pandas as pd
 
-def preprocess_reviews(input_path, output_path):
-    # Load raw data
-    df = pd.read_csv(input_path)
+from scripts.preprocessing.language import LanguageDetector, tag_languages
+from scripts.preprocessing.near_duplicates import NearDuplicateDetector, cluster_near_duplicates
 
-    # Remove duplicates
-    df = df.drop_duplicates(subset=["review", "rating", "date", "bank"])
+# Columns that identify a duplicate review
+DUPLICATE_SUBSET = ["review", "rating", "date", "bank"]
 
+# Columns every cleaned review must have
+EXPECTED_COLUMNS = ["review", "rating", "date", "bank", "source"]
+
+# Ways to handle near-duplicate reviews: tag them with a cluster_id, or keep one per cluster
+NEAR_DUPLICATE_MODES = ("flag", "collapse")
+
+def clean_reviews(df):
     # Handle missing data
+    df = df.copy()
     df["review"] = df["review"].fillna("No review text")  # Replace NaN with placeholder
-    print(df.isna().sum())  # Check for other missing values
 
     # Normalize dates
     df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
 
     # Validate columns
-    expected_columns = ["review", "rating", "date", "bank", "source"]
-    assert all(col in df.columns for col in expected_columns), "Missing required columns"
+    assert all(col in df.columns for col in EXPECTED_COLUMNS), "Missing required columns"
+    return df
+
+class ReviewDeduplicator:
+    """Drop duplicate reviews across chunks of a stream.
+
+    Only a 64-bit digest of each distinct review is kept, so memory grows with
+    the number of distinct reviews rather than with their text.
+    """
+
+    def __init__(self, subset=DUPLICATE_SUBSET):
+        self.subset = subset
+        self.seen = set()
+
+    def digest(self, values):
+        value = "\x1f".join("" if pd.isna(v) else str(v) for v in values)
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def filter(self, chunk):
+        keep = []
+        for values in zip(*(chunk[col] for col in self.subset)):
+            digest = self.digest(values)
+            keep.append(digest not in self.seen)
+            self.seen.add(digest)
+        return chunk[keep]
+
+def check_near_duplicates(near_duplicates):
+    if near_duplicates is not None and near_duplicates not in NEAR_DUPLICATE_MODES:
+        raise ValueError(f"near_duplicates must be one of {NEAR_DUPLICATE_MODES}, got {near_duplicates!r}")
+
+def preprocess_chunks(input_path, chunk_size, detect_language=False, near_duplicates=None):
+    check_near_duplicates(near_duplicates)
+    deduplicator = ReviewDeduplicator()
+    detector = None
+    if detect_language:
+        detector = LanguageDetector()
+    clusterer = None
+    if near_duplicates is not None:
+        # One detector for the whole stream, so clusters span chunks; when
+        # collapsing, cluster_size only counts the reviews of the kept review's chunk
+        clusterer = NearDuplicateDetector()
+    # Read as strings so duplicates compare the same way in every chunk
+    for chunk in pd.read_csv(input_path, chunksize=chunk_size, dtype=str):
+        chunk = deduplicator.filter(chunk)
+        if chunk.empty:
+            continue
+        chunk = chunk.assign(rating=pd.to_numeric(chunk["rating"]))
+        chunk = clean_reviews(chunk)
+        if detector is not None:
+            chunk = tag_languages(chunk, detector)
+        if clusterer is not None:
+            chunk = cluster_near_duplicates(chunk, clusterer, collapse=near_duplicates == "collapse")
+            if chunk.empty:
+                continue
+        yield chunk
+
+def preprocess_reviews(input_path, output_path, detect_language=False, near_duplicates=None):
+    check_near_duplicates(near_duplicates)
+
+    # Load raw data
+    df = pd.read_csv(input_path)
+
+    # Remove duplicates
+    df = df.drop_duplicates(subset=DUPLICATE_SUBSET)
+
+    print(df.isna().sum())  # Check for other missing values
+    df = clean_reviews(df)
+
+    # Tag languages so the English-only analyzers can skip other reviews
+    if detect_language:
+        df = tag_languages(df)
+
+    # Cluster near-duplicate reviews (e.g. "Good app" and "good app!!") before analysis
+    if near_duplicates is not None:
+        df = cluster_near_duplicates(df, collapse=near_duplicates == "collapse")
 
     # Save cleaned data
     df.to_csv(output_path, index=False)
@@ -24,4 +105,4 @@ def preprocess_reviews(input_path, output_path):
     return df
 
 if __name__ == "__main__":
-    preprocess_reviews("data/raw/reviews_raw.csv", "data/processed/reviews_cleaned.csv")
\ No newline at end of file
+    preprocess_reviews("data/raw/reviews_raw.csv", "data/processed/reviews_cleaned.csv")
@@ -0,0 +1,253 @@
+"""
+Concurrent Google Play review collector.
+
+Several apps and language/country combinations are paged at once on a
+thread pool. Requests to each host go through a token bucket, transient
+errors are retried with exponential backoff, and continuation tokens are
+saved to disk after every page so an interrupted run can resume.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+from pathlib import Path
+import random
+import threading
+import time
+
+import pandas as pd
+from google_play_scraper.exceptions import ExtraHTTPError
+# Private class; its slots are what the store saves, so requirements.txt
+# pins google-play-scraper to the version this was written against
+from google_play_scraper.features.reviews import _ContinuationToken
+
+logger = logging.getLogger(__name__)
+
+# Host every Google Play request goes to
+PLAY_HOST = "play.google.com"
+
+class EmptyPageError(Exception):
+    """A page came back without reviews and without a continuation token."""
+
+# Errors worth retrying: network failures, unexpected HTTP statuses, and
+# empty pages, which google_play_scraper also returns when a request fails
+TRANSIENT_ERRORS = (OSError, ExtraHTTPError, EmptyPageError)
+
+ScrapeTarget = namedtuple("ScrapeTarget", ["bank", "app_id", "lang", "country"])
+
+def target_key(target):
+    """Identify a target in the continuation store."""
+    return f"{target.app_id}:{target.lang}:{target.country}"
+
+def review_row(review, target):
+    """Convert a google_play_scraper review into a reviews_raw.csv row."""
+    return {
+        "review": review["content"] or "",  # Handle None values
+        "rating": review["score"],
+        "date": review["at"],
+        "bank": target.bank,
+        "source": "Google Play"
+    }
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second on average."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until it becomes available."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token now and wait for the debt to be refilled
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            self.sleep(wait)
+
+class ContinuationStore:
+    """JSON file holding the paging state of every target."""
+
+    def __init__(self, path, resume=True):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.states = {}
+        if resume and self.path.exists():
+            with open(self.path) as f:
+                self.states = json.load(f)
+
+    def get(self, key):
+        """Return the saved state of a target, or None if it was never paged."""
+        return self.states.get(key)
+
+    def update(self, key, collected, token, done):
+        """Record the state of a target after a page and save the file."""
+        with self.lock:
+            self.states[key] = {
+                "collected": collected,
+                "done": done,
+                "token": self.encode_token(token)
+            }
+            # Write to a temporary file first so a crash never leaves a torn file
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.states, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def encode_token(token):
+        if token is None:
+            return None
+        return {slot: getattr(token, slot) for slot in _ContinuationToken.__slots__}
+
+    @staticmethod
+    def decode_token(state):
+        if state is None:
+            return None
+        return _ContinuationToken(**state)
+
+class ConcurrentScraper:
+    """Collect reviews for many targets concurrently."""
+
+    def __init__(self, fetch, workers=4, rate=2.0, burst=2, max_retries=3, backoff=1.0,
+                 store=None, sleep=time.sleep):
+        """
+        Args:
+            fetch (callable): Function with the signature of google_play_scraper.reviews
+            workers (int): Number of targets paged at once
+            rate (float): Requests per second allowed per host
+            burst (int): Requests a host bucket can take back to back
+            max_retries (int): Retries of a page after a transient error
+            backoff (float): Base delay in seconds of the exponential backoff
+            store (ContinuationStore, optional): Paging state saved after every page
+            sleep (callable): Sleep function, replaceable in tests
+        """
+        self.fetch = fetch
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.store = store
+        self.sleep = sleep
+        self.buckets = {PLAY_HOST: TokenBucket(rate, burst, sleep=sleep)}
+        self.output_lock = threading.Lock()
+
+    def collect(self, targets, output_path, per_target=400, page_size=100):
+        """
+        Collect reviews for all targets and append them to a CSV file.
+
+        Rows are written as pages arrive, before the continuation token of the
+        page is saved, so a resumed run never loses a page. Delivery is at
+        least once: a crash between the two repeats that page on resume, and
+        the repeated rows are dropped as exact duplicates in preprocessing.
+
+        google_play_scraper swallows request errors and returns an empty page
+        without a continuation token, which is also how a stream ends. Such
+        pages are retried, and a target whose retries run out is reported as
+        failed without being saved as done, so a resumed run pages it again.
+        Pages are page_size long, since continuation calls reuse the count of
+        the first call; the page reaching per_target is trimmed, and the rest
+        of it is not collected by a resumed run.
+
+        Args:
+            targets (list): ScrapeTarget tuples to collect
+            output_path (str or Path): CSV receiving the reviews
+            per_target (int): Number of reviews wanted per target
+            page_size (int): Number of reviews requested per page
+
+        Returns:
+            dict: Reviews collected, elapsed seconds, reviews per second and
+                the keys of targets that failed
+        """
+        self.output_path = Path(output_path)
+        resuming = self.store is not None and self.store.states
+        if not resuming and self.output_path.exists():
+            self.output_path.unlink()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            outcomes = list(executor.map(
+                lambda target: self._collect_target(target, per_target, page_size), targets
+            ))
+        elapsed = time.perf_counter() - start
+
+        collected = sum(count for count, _ in outcomes)
+        return {
+            "reviews": collected,
+            "seconds": elapsed,
+            "reviews_per_second": collected / elapsed if elapsed else 0.0,
+            "failed": [target_key(target) for target, (_, ok) in zip(targets, outcomes) if not ok]
+        }
+
+    def _collect_target(self, target, per_target, page_size):
+        """Page through one target; returns (reviews collected this run, success)."""
+        key = target_key(target)
+        state = self.store.get(key) if self.store is not None else None
+        if state is not None and state["done"]:
+            return 0, True
+        collected = state["collected"] if state is not None else 0
+        token = ContinuationStore.decode_token(state["token"]) if state is not None else None
+
+        new_reviews = 0
+        while collected < per_target:
+            try:
+                result, token = self._fetch_page(target, page_size, token)
+            except Exception as e:
+                logger.error(f"Error scraping {key}: {e}")
+                return new_reviews, False
+
+            rows = [review_row(review, target) for review in result[:per_target - collected]]
+            collected += len(rows)
+            new_reviews += len(rows)
+            # A target is done once Google Play has no more pages for it
+            done = token is None or token.token is None
+            with self.output_lock:
+                if rows:
+                    pd.DataFrame(rows).to_csv(
+                        self.output_path, mode="a", index=False,
+                        header=not self.output_path.exists()
+                    )
+                if self.store is not None:
+                    self.store.update(key, collected, token, done)
+            logger.info(f"Collected {collected} reviews for {key}")
+            if done:
+                break
+        return new_reviews, True
+
+    def _fetch_page(self, target, count, token):
+        """
+        Fetch one page, waiting for the host bucket and retrying transient errors.
+
+        Retries reuse the token the page was requested with, since a failed
+        request returns a token without a next page.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.buckets[PLAY_HOST].acquire()
+            try:
+                result, next_token = self.fetch(
+                    target.app_id,
+                    lang=target.lang,
+                    country=target.country,
+                    count=count,
+                    continuation_token=token
+                )
+                if not result and (next_token is None or next_token.token is None):
+                    raise EmptyPageError("no reviews and no continuation token")
+                return result, next_token
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt * (0.5 + random.random())
+                logger.warning(f"Transient error for {target_key(target)} ({e}), retrying in {delay:.1f}s")
+                self.sleep(delay)
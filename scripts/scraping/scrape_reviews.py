@@ -1,6 +1,16 @@
 from google_play_scraper import reviews
-import pandas as pd
-import time
+from pathlib import Path
+import argparse
+import itertools
+import logging
+import sys
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from scripts.scraping.concurrent_scraper import ConcurrentScraper, ContinuationStore, ScrapeTarget
 
 # Define app IDs
 app_ids = {
@@ -9,38 +19,37 @@ app_ids = {
     "Dashen": "com.dashen.dashensuperapp"
 }
 
-all_reviews = []
-for bank, app_id in app_ids.items():  # Fixed: changed 'apps' to 'app_ids'
-    reviews_collected = 0
-    token = None
-    try:
-        while reviews_collected < 400:
-            result, token = reviews(
-                app_id,
-                lang="en",
-                country="et",
-                count=100,
-                continuation_token=token
-            )
-            if not result:  # Handle empty results
-                print(f"No more reviews for {bank}")
-                break
-            for review in result:
-                all_reviews.append({
-                    "review": review["content"] or "",  # Handle None values
-                    "rating": review["score"],
-                    "date": review["at"],
-                    "bank": bank,
-                    "source": "Google Play"
-                })
-            reviews_collected += len(result)
-            print(f"Collected {reviews_collected} reviews for {bank}")
-            time.sleep(1)  # Avoid rate limits
-    except Exception as e:
-        print(f"Error scraping {bank}: {e}")
-    print(f"Total collected: {reviews_collected} reviews for {bank}")
-
-# Save to CSV
-df = pd.DataFrame(all_reviews)
-df.to_csv("data/raw/reviews_raw.csv", index=False)
-print("Saved reviews to data/raw/reviews_raw.csv")
\ No newline at end of file
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Google Play reviews for the bank apps.")
+    parser.add_argument("--langs", nargs="+", default=["en"], help="Review languages to collect")
+    parser.add_argument("--countries", nargs="+", default=["et"], help="Store countries to collect")
+    parser.add_argument("--per-target", type=int, default=400,
+                        help="Reviews collected per app, language and country")
+    parser.add_argument("--workers", type=int, default=4, help="Targets collected at once")
+    parser.add_argument("--rate", type=float, default=2.0, help="Requests per second to Google Play")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the continuation tokens saved by the previous run")
+    parser.add_argument("--output", default="data/raw/reviews_raw.csv")
+    parser.add_argument("--state", default="data/raw/scrape_state.json")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    targets = [
+        ScrapeTarget(bank, app_id, lang, country)
+        for (bank, app_id), lang, country in itertools.product(app_ids.items(), args.langs, args.countries)
+    ]
+    store = ContinuationStore(args.state, resume=args.resume)
+    scraper = ConcurrentScraper(reviews, workers=args.workers, rate=args.rate, store=store)
+    stats = scraper.collect(targets, args.output, per_target=args.per_target)
+
+    print(f"Collected {stats['reviews']} reviews in {stats['seconds']:.1f}s "
+          f"({stats['reviews_per_second']:.1f} reviews/s)")
+    if stats["failed"]:
+        print(f"Failed targets (rerun with --resume): {', '.join(stats['failed'])}")
+    print(f"Saved reviews to {args.output}")
+
+if __name__ == "__main__":
+    main()
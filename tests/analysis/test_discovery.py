@@ -0,0 +1,76 @@
+"""
+Tests for embedding-based theme discovery.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import normalize
+from scripts.analysis.sentiment_thematic.discovery import (
+    UNASSIGNED, CosineLSHIndex, ThemeDiscovery, discover_themes
+)
+
+TOPICS = {
+    'otp': ["otp code never arrives", "the otp sms is late", "no otp code again", "otp sms never comes"],
+    'crash': ["app crashes on startup", "crashes after update", "the app crashes every time", "update crashes app"],
+    'fee': ["transfer fee too high", "high fee for every transfer", "the fee is too high", "transfer fee charged twice"]
+}
+
+@pytest.fixture
+def results():
+    rows = []
+    for repeat in range(10):
+        for topic, texts in TOPICS.items():
+            for text in texts:
+                rows.append({
+                    'review_id': len(rows),
+                    'review_text': text,
+                    'themes': ['Account Access Issues'] if topic == 'otp' and repeat % 2 else []
+                })
+    return pd.DataFrame(rows)
+
+def test_lsh_index_finds_nearest_neighbours():
+    rng = np.random.default_rng(0)
+    vectors = normalize(rng.standard_normal((2000, 16))).astype(np.float32)
+    index = CosineLSHIndex(vectors, n_bits=6, n_tables=8, max_bucket=64)
+    queries = normalize(vectors[:100] + 0.05 * rng.standard_normal((100, 16))).astype(np.float32)
+    ids, similarities = index.query(queries, k=5)
+    assert ids.shape == (100, 5)
+    assert (ids[:, 0] == np.arange(100)).mean() > 0.95
+    assert (np.diff(similarities, axis=1) <= 1e-6).all()
+    assert np.allclose(similarities[:, 0], np.einsum('ij,ij->i', queries, vectors[ids[:, 0]]), atol=1e-5)
+
+def test_clusters_follow_topics(results):
+    discovery = ThemeDiscovery(n_clusters=3, dimensions=8).fit(results['review_text'].tolist())
+    clusters, similarity = discovery.assign([text for texts in TOPICS.values() for text in texts])
+    clusters = clusters.reshape(len(TOPICS), -1)
+    assert all(len(set(row)) == 1 for row in clusters)
+    assert len(set(clusters[:, 0])) == len(TOPICS)
+    assert (similarity > 0.3).all()
+
+    names = discovery.themes.set_index('cluster')['keywords']
+    assert 'otp' in names[clusters[0, 0]][:3]
+    assert 'fee' in names[clusters[2, 0]][:3]
+
+def test_unknown_text_stays_unassigned(results):
+    discovery = ThemeDiscovery(n_clusters=3, dimensions=8).fit(results['review_text'].tolist())
+    clusters, similarity = discovery.assign(["", "zzz qqq"])
+    assert clusters.tolist() == [UNASSIGNED, UNASSIGNED]
+    assert similarity.tolist() == [0.0, 0.0]
+
+def test_discover_themes_assigns_unthemed_reviews(results):
+    themes, assignments = discover_themes(results, n_clusters=3, dimensions=8, batch_size=7)
+    assert len(themes) == 3
+    unthemed = results.index[results['themes'].str.len() == 0]
+    assert assignments.index.equals(unthemed)
+    assert (assignments['cluster'] != UNASSIGNED).all()
+    otp = themes[themes['keywords'].map(lambda keywords: 'otp' in keywords[:3])]
+    assert otp['known_theme'].tolist() == ['Account Access Issues']
+    assert themes['known_theme'].isna().sum() == 2
+    named = themes.set_index('cluster')['name']
+    assert (assignments['discovered_theme'] == named[assignments['cluster']].to_numpy()).all()
+
+@pytest.mark.parametrize("texts", [[], ["", " "], ["a"], ["otp", "otp otp"]])
+def test_too_few_keywords_are_rejected(texts):
+    with pytest.raises(ValueError, match="keywords"):
+        ThemeDiscovery().fit(texts)
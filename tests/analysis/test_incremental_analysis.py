@@ -0,0 +1,70 @@
+"""
+Tests for incremental sentiment and thematic analysis.
+"""
+
+import pytest
+import pandas as pd
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.analysis.sentiment_thematic.incremental import process_incremental, review_keys
+
+@pytest.fixture
+def analyzer():
+    return SentimentThematicAnalyzer()
+
+@pytest.fixture
+def reviews():
+    return pd.DataFrame({
+        'review': ["Love the app", "App crashes often", "Can't login to my account"],
+        'rating': [5, 2, 1],
+        'date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+        'bank': ['CBE', 'BOA', 'Dashen'],
+        'source': ['Google Play'] * 3
+    })
+
+def test_review_keys_are_stable(reviews):
+    keys = review_keys(reviews)
+    assert keys.is_unique
+    assert keys.tolist() == review_keys(reviews.iloc[::-1]).iloc[::-1].tolist()
+
+def test_incremental_scores_only_new_reviews(analyzer, reviews, tmp_path):
+    first, scored = process_incremental(analyzer, reviews.iloc[:2])
+    assert scored == 2
+
+    # Round trip through the results file like main.py does
+    results_path = tmp_path / "results.csv"
+    analyzer.save_results(first, results_path)
+    existing = analyzer.load_results(results_path)
+
+    # New review arrives first and an old rating is corrected
+    current = pd.concat([reviews.iloc[2:], reviews.iloc[:2]], ignore_index=True)
+    current.loc[2, 'rating'] = 4
+    merged, scored = process_incremental(analyzer, current, existing)
+    assert scored == 1
+
+    full, _ = process_incremental(analyzer, current)
+    pd.testing.assert_frame_equal(merged, full, check_dtype=False)
+
+def test_incremental_accepts_results_without_keys(analyzer, reviews):
+    existing = analyzer.process_reviews(reviews)
+    merged, scored = process_incremental(analyzer, reviews, existing)
+    assert scored == 0
+    assert merged['review_key'].tolist() == review_keys(reviews).tolist()
+
+def test_incremental_reuses_results_stored_before_preprocessing_columns(analyzer, reviews):
+    existing = analyzer.process_reviews(reviews)
+    clustered = reviews.assign(cluster_id=[0, 1, 2], cluster_size=[1, 1, 1])
+    merged, scored = process_incremental(analyzer, clustered, existing)
+    assert scored == 0
+    assert merged['cluster_id'].tolist() == [0, 1, 2]
+
+    # Language decides scoring, so rows stored without it are scored again
+    tagged = clustered.assign(language=['en', 'en', 'am'])
+    merged, scored = process_incremental(analyzer, tagged, existing)
+    assert scored == 3
+    assert merged['language'].tolist() == ['en', 'en', 'am']
+
+    retagged = tagged.assign(language=['en', 'am', 'am'])
+    merged, scored = process_incremental(analyzer, retagged, merged)
+    assert scored == 1
+    full, _ = process_incremental(analyzer, retagged)
+    pd.testing.assert_frame_equal(merged, full)
@@ -0,0 +1,99 @@
+"""
+Tests for the lazy data loading of the insights analyzer.
+"""
+
+import os
+import pytest
+import pandas as pd
+from scripts.analysis.insights.analyze_insights import InsightsAnalyzer
+from scripts.analysis.sentiment_thematic.rollup import RollupCube
+from scripts.analysis.sentiment_thematic.storage import results_fingerprint, write_results
+
+@pytest.fixture
+def reviews():
+    return pd.DataFrame({
+        'review': ["Love the app", "App crashes often", "Can't login to my account", "ok"],
+        'rating': [5, 2, 1, 3],
+        'date': ['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-03'],
+        'bank': ['CBE', 'BOA', 'Dashen', 'CBE'],
+        'source': ['Google Play'] * 4
+    })
+
+@pytest.fixture
+def project(reviews, tmp_path):
+    (tmp_path / 'data' / 'processed').mkdir(parents=True)
+    reviews.to_csv(tmp_path / 'data' / 'processed' / 'reviews_cleaned.csv', index=False)
+    # Results out of order and missing the last review
+    results = pd.DataFrame({
+        'review_id': [2, 0, 1],
+        'sentiment_label': ['NEGATIVE', 'POSITIVE', 'NEGATIVE'],
+        'sentiment_score': [0.4, 0.6, 0.3],
+        'vader_score': [-0.4, 0.6, -0.3],
+        'textblob_score': [0.0, 0.5, -0.2],
+        'themes': [['Account Access Issues'], ['User Interface & Experience'], ['Transaction Performance']],
+        'keywords': [['login', 'account'], ['love', 'app'], ['crashes']]
+    })
+    results_dir = tmp_path / 'data' / 'analysis' / 'sentiment_thematic'
+    results_dir.mkdir(parents=True)
+    write_results(results, results_dir / 'sentiment_thematic_results.csv')
+    return tmp_path
+
+def test_init_reads_nothing(tmp_path):
+    analyzer = InsightsAnalyzer(tmp_path)
+    assert analyzer.output_dir.is_dir()
+    with pytest.raises(FileNotFoundError):
+        analyzer.load(['bank'])
+
+def test_load_projects_and_caches_columns(project, monkeypatch):
+    reads = []
+    read_csv = pd.read_csv
+    def recording_read_csv(path, usecols=None, **kwargs):
+        reads.append(sorted(usecols))
+        return read_csv(path, usecols=usecols, **kwargs)
+    monkeypatch.setattr(pd, 'read_csv', recording_read_csv)
+
+    analyzer = InsightsAnalyzer(project)
+    counts = analyzer.sentiment_figure().data
+    assert list(analyzer._data.columns) == ['bank', 'sentiment_label']
+    assert isinstance(analyzer._data['bank'].dtype, pd.CategoricalDtype)
+    assert counts.loc['CBE', 'POSITIVE'] == 1
+    assert counts.loc['BOA', 'NEGATIVE'] == 1
+
+    analyzer.load(['bank', 'rating'])
+    analyzer.load(['rating', 'sentiment_label'])
+    assert reads == [['bank'], ['review_id', 'sentiment_label'], ['rating']]
+    with pytest.raises(KeyError):
+        analyzer.load(['not_a_column'])
+
+def test_join_matches_eager_merge(project, reviews):
+    analyzer = InsightsAnalyzer(project)
+    merged = analyzer.merged_df
+    assert merged['sentiment_label'].tolist()[:3] == ['POSITIVE', 'NEGATIVE', 'NEGATIVE']
+    assert pd.isna(merged['sentiment_label'].iloc[3])
+    assert merged['themes'].tolist()[:3] == [['User Interface & Experience'], ['Transaction Performance'],
+                                             ['Account Access Issues']]
+    assert merged['review'].tolist() == reviews['review'].tolist()
+    assert analyzer.rollup.theme_counts()['CBE'] == {'User Interface & Experience': 1}
+
+def test_rollup_reads_saved_cube(project):
+    results_dir = project / 'data' / 'analysis' / 'sentiment_thematic'
+    saved = RollupCube.from_results(pd.DataFrame({
+        'bank': ['CBE', 'CBE'],
+        'date': ['2024-01-01', '2024-01-02'],
+        'sentiment_label': ['NEGATIVE', 'NEGATIVE'],
+        'themes': [['Customer Support'], ['Customer Support']],
+        'rating': [1, 2],
+        'sentiment_score': [0.2, 0.3]
+    }))
+    results_path = results_dir / 'sentiment_thematic_results.csv'
+    saved.results_fingerprint = results_fingerprint(results_path)
+    saved.save(results_dir / 'sentiment_thematic_rollup.csv')
+
+    analyzer = InsightsAnalyzer(project)
+    assert analyzer.rollup.theme_counts()['CBE'] == {'Customer Support': 2}
+    assert analyzer._data is None
+
+    # A rollup of other results is rebuilt from the rows, however recent it is
+    results_path.write_text(results_path.read_text() + '\n')
+    os.utime(results_dir / 'sentiment_thematic_rollup.csv')
+    assert InsightsAnalyzer(project).rollup.theme_counts()['CBE'] == {'User Interface & Experience': 1}
@@ -0,0 +1,58 @@
+"""
+Tests for the TF-IDF keyword ranker.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from scripts.analysis.sentiment_thematic.ranking import KeywordRanker, rank_keywords
+from scripts.analysis.sentiment_thematic.tokenizer import Tokenizer
+
+TEXTS = [
+    "good app",
+    "good app but otp never arrives",
+    "otp code never arrives, otp again",
+    "transfer failed, good support",
+    "good"
+]
+
+def test_weights_match_tfidf_vectorizer():
+    ranker = KeywordRanker().fit(TEXTS)
+    tfidf = TfidfVectorizer(analyzer=Tokenizer().keywords).fit(TEXTS)
+    columns = [ranker.column(term) for term in tfidf.get_feature_names_out()]
+    expected = tfidf.transform(TEXTS).toarray()
+    np.testing.assert_allclose(ranker.transform(TEXTS)[:, columns].toarray(), expected)
+
+def test_partial_fit_equals_fit():
+    chunked = KeywordRanker().partial_fit(TEXTS[:2]).partial_fit(TEXTS[2:])
+    whole = KeywordRanker().fit(TEXTS)
+    assert chunked.n_documents == whole.n_documents == len(TEXTS)
+    assert (chunked.transform(TEXTS) != whole.transform(TEXTS)).nnz == 0
+
+def test_review_keywords_prefer_rare_terms():
+    ranker = KeywordRanker().fit(TEXTS)
+    assert ranker.review_keywords(TEXTS, top=1)[2] == ['otp']
+    assert ranker.review_keywords(["good"], top=3) == [['good']]
+
+def test_rank_keywords_by_bank_and_month():
+    results_df = pd.DataFrame({
+        'bank': ['CBE', 'CBE', 'BOA', 'BOA', 'CBE'],
+        'date': ['2024-01-05', '2024-02-01', '2024-01-07', '2024-01-09', '2024-02-03'],
+        'review_text': TEXTS
+    })
+    by_bank = rank_keywords(results_df, top=2)
+    assert list(by_bank) == ['CBE', 'BOA']
+    assert by_bank['BOA'][0][0] == 'otp'
+    by_month = rank_keywords(results_df, top=1, freq='M')
+    assert list(by_month) == [('CBE', '2024-01'), ('CBE', '2024-02'), ('BOA', '2024-01')]
+
+def test_rank_keywords_twice_gives_same_ranking():
+    results_df = pd.DataFrame({'bank': ['CBE', 'CBE', 'BOA', 'BOA', 'CBE'], 'review_text': TEXTS})
+    ranker = KeywordRanker()
+    first = rank_keywords(results_df, top=3, ranker=ranker)
+    assert rank_keywords(results_df, top=3, ranker=ranker) == first
+    assert ranker.n_documents == len(TEXTS)
+    assert rank_keywords(results_df, top=3, ranker=KeywordRanker().fit(TEXTS)) == first
+
+    rank_keywords(results_df, top=3, ranker=ranker, fit=True)
+    assert ranker.n_documents == 2 * len(TEXTS)
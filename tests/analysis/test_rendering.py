@@ -0,0 +1,69 @@
+"""
+Tests for the headless rendering of the insights figures.
+"""
+
+import json
+import numpy as np
+import pytest
+import pandas as pd
+from matplotlib.cbook import boxplot_stats
+from scripts.analysis.insights.rendering import (
+    MANIFEST_NAME, Figure, content_hash, draw_sentiment_distribution, draw_theme_distribution,
+    render_figures
+)
+
+@pytest.fixture
+def figures():
+    counts = pd.DataFrame({'NEGATIVE': [2, 1], 'POSITIVE': [3, 4]}, index=pd.Index(['BOA', 'CBE'], name='bank'))
+    themes = pd.DataFrame({'Bank': ['BOA', 'CBE'], 'Theme': ['Customer Support'] * 2, 'Count': [2, 5]})
+    return [
+        Figure('sentiment_distribution', draw_sentiment_distribution, counts),
+        Figure('theme_distribution', draw_theme_distribution, themes)
+    ]
+
+def test_render_figures_writes_files_and_timings(figures, tmp_path):
+    timings = render_figures(figures, tmp_path, workers=1)
+    assert set(timings) == {'sentiment_distribution', 'theme_distribution'}
+    assert all(seconds > 0 for seconds in timings.values())
+    assert (tmp_path / 'sentiment_distribution.png').stat().st_size > 0
+    assert (tmp_path / 'theme_distribution.png').stat().st_size > 0
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert manifest['theme_distribution'] == content_hash(figures[1])
+
+def test_unchanged_figures_are_skipped(figures, tmp_path):
+    render_figures(figures, tmp_path, workers=1)
+    assert render_figures(figures, tmp_path, workers=1) == {
+        'sentiment_distribution': None, 'theme_distribution': None
+    }
+
+    # Changed aggregates, a missing file or force render again
+    counts = figures[0].data.copy()
+    counts.loc['CBE', 'POSITIVE'] += 1
+    (tmp_path / 'theme_distribution.png').unlink()
+    timings = render_figures([figures[0]._replace(data=counts), figures[1]], tmp_path, workers=1)
+    assert all(seconds is not None for seconds in timings.values())
+    assert render_figures(figures[:1], tmp_path, workers=1, force=True)['sentiment_distribution'] is not None
+
+def test_render_figures_in_worker_processes(figures, tmp_path):
+    timings = render_figures(figures, tmp_path, workers=2)
+    assert all(seconds is not None for seconds in timings.values())
+    assert (tmp_path / 'theme_distribution.png').exists()
+
+def test_content_hash_is_canonical(figures):
+    counts = figures[0].data
+    same = pd.DataFrame({'POSITIVE': [3, 4], 'NEGATIVE': [2, 1]}, index=counts.index)[['NEGATIVE', 'POSITIVE']]
+    assert content_hash(figures[0]._replace(data=same)) == content_hash(figures[0])
+    assert content_hash(figures[0]._replace(data=counts.rename(columns={'NEGATIVE': 'NEG'}))) != \
+        content_hash(figures[0])
+
+    frequencies = {'app': 2.0, 'login': 1.0}
+    cloud = Figure('keyword_cloud_cbe', draw_theme_distribution, {'bank': 'CBE', 'frequencies': frequencies})
+    reordered = cloud._replace(data={'frequencies': {'login': np.float64(1.0), 'app': 2.0}, 'bank': 'CBE'})
+    assert content_hash(reordered) == content_hash(cloud)
+
+    ratings = np.array([1.0, 2.0, 5.0])
+    first, second = (
+        Figure('rating_distribution', draw_theme_distribution, boxplot_stats(ratings.copy(), labels=['CBE']))
+        for _ in range(2)
+    )
+    assert content_hash(first) == content_hash(second)
@@ -0,0 +1,54 @@
+"""
+Tests for reading and writing analysis results.
+"""
+
+import pytest
+import pandas as pd
+from scripts.analysis.sentiment_thematic.storage import locate_results, read_results, write_results
+
+@pytest.fixture
+def results():
+    return pd.DataFrame({
+        'review_id': [0, 1, 2],
+        'bank': ['CBE', 'BOA', 'CBE'],
+        'rating': [5, 1, 3],
+        'review_text': ["Love the app", "Can't login", "ok"],
+        'sentiment_label': ['POSITIVE', 'NEGATIVE', 'NEUTRAL'],
+        'sentiment_score': [0.6, 0.4, 0.0],
+        'keywords': [['love', 'app'], ['can', 'login'], []],
+        'themes': [['User Interface & Experience'], ['Account Access Issues'], []]
+    })
+
+@pytest.mark.parametrize('suffix', ['csv', 'parquet'])
+def test_results_round_trip(results, tmp_path, suffix):
+    path = tmp_path / f"sentiment_thematic_results.{suffix}"
+    write_results(results, path)
+    loaded = read_results(path)
+
+    assert loaded['keywords'].tolist() == results['keywords'].tolist()
+    assert loaded['themes'].tolist() == results['themes'].tolist()
+    pd.testing.assert_frame_equal(loaded.astype({'bank': object, 'sentiment_label': object}),
+                                  results, check_dtype=False)
+
+def test_parquet_projection_and_categoricals(results, tmp_path):
+    write_results(results, tmp_path / "sentiment_thematic_results.csv")
+    assert locate_results(tmp_path).suffix == '.csv'
+
+    write_results(results, tmp_path / "sentiment_thematic_results.parquet")
+    path = locate_results(tmp_path)
+    assert path.suffix == '.parquet'
+
+    loaded = read_results(path, columns=['bank', 'themes'])
+    assert list(loaded.columns) == ['bank', 'themes']
+    assert isinstance(loaded['bank'].dtype, pd.CategoricalDtype)
+    assert loaded['themes'].tolist() == results['themes'].tolist()
+
+@pytest.mark.parametrize('suffix', ['csv', 'parquet'])
+def test_read_results_dtype_hints(results, tmp_path, suffix):
+    path = tmp_path / f"sentiment_thematic_results.{suffix}"
+    write_results(results, path)
+    loaded = read_results(path, columns=['review_id', 'sentiment_label', 'themes'],
+                          dtype={'sentiment_label': 'category', 'rating': 'float32'})
+    assert list(loaded.columns) == ['review_id', 'sentiment_label', 'themes']
+    assert isinstance(loaded['sentiment_label'].dtype, pd.CategoricalDtype)
+    assert loaded['sentiment_label'].tolist() == results['sentiment_label'].tolist()
@@ -0,0 +1,83 @@
+"""
+Tests for the rollup cube of analysis results.
+"""
+
+import json
+import pytest
+import pandas as pd
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.analysis.sentiment_thematic.incremental import process_incremental
+from scripts.analysis.sentiment_thematic.rollup import RollupCube, refresh_rollup
+
+@pytest.fixture
+def analyzer():
+    return SentimentThematicAnalyzer()
+
+@pytest.fixture
+def reviews():
+    return pd.DataFrame({
+        'review': ["Love the app", "App crashes often", "Can't login to my account",
+                   "Transfer failed, customer service did not help", "Great design and easy transfer",
+                   "ok", "Love the app"],
+        'rating': [5, 2, 1, 1, 5, 3, 4],
+        'date': ['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-02', '2024-01-03', '2024-01-03', '2024-01-04'],
+        'bank': ['CBE', 'BOA', 'Dashen', 'CBE', 'BOA', 'CBE', 'CBE'],
+        'source': ['Google Play'] * 7
+    })
+
+def cube_equal(left, right):
+    columns = list(left.cube.columns)
+    pd.testing.assert_frame_equal(
+        left.cube.sort_values(columns[:4]).reset_index(drop=True),
+        right.cube.sort_values(columns[:4]).reset_index(drop=True),
+        check_dtype=False
+    )
+
+def test_summary_matches_generate_summary(analyzer, reviews):
+    results = analyzer.process_reviews(reviews)
+    summary = RollupCube.from_results(results).summary()
+    expected = analyzer.generate_summary(results.copy())
+    assert json.dumps(summary, indent=4) == json.dumps(expected, indent=4)
+
+def test_add_and_remove_match_rebuild(analyzer, reviews, tmp_path):
+    results = analyzer.process_reviews(reviews)
+    cube = RollupCube.from_results(results.iloc[:4])
+    cube.add(results.iloc[4:])
+    cube.remove(results.iloc[[1]])
+    cube_equal(cube, RollupCube.from_results(results.drop(index=1)))
+
+    path = tmp_path / "rollup.csv"
+    cube.save(path)
+    cube_equal(RollupCube.load(path), cube)
+
+@pytest.mark.parametrize('suffix', ['csv', 'parquet'])
+def test_save_keeps_results_fingerprint(analyzer, reviews, tmp_path, suffix):
+    cube = RollupCube.from_results(analyzer.process_reviews(reviews), results_fingerprint='abc123')
+    path = tmp_path / f"rollup.{suffix}"
+    cube.save(path)
+    loaded = RollupCube.load(path)
+    assert loaded.results_fingerprint == 'abc123'
+    cube_equal(loaded, cube)
+
+    # Rollups saved before fingerprints were stored still load
+    cube.cube.to_csv(tmp_path / "old.csv", index=False)
+    assert RollupCube.load(tmp_path / "old.csv").results_fingerprint is None
+
+def test_refresh_rollup_applies_changes(analyzer, reviews):
+    previous, _ = process_incremental(analyzer, reviews.iloc[:5])
+    cube = RollupCube.from_results(previous)
+
+    # One review disappears, one arrives and one rating is corrected
+    current_reviews = reviews.drop(index=0).copy()
+    current_reviews.loc[3, 'rating'] = 2
+    current, _ = process_incremental(analyzer, current_reviews, previous)
+    cube = refresh_rollup(cube, previous, current)
+    cube_equal(cube, RollupCube.from_results(current))
+
+def test_top_themes_match_counter(analyzer, reviews):
+    results = analyzer.process_reviews(reviews)
+    cube = RollupCube.from_results(results)
+    negative = results[results['sentiment_label'] == 'NEGATIVE']
+    for bank, themes in cube.top_themes('NEGATIVE').items():
+        counts = pd.Series([t for ts in negative.loc[negative['bank'] == bank, 'themes'] for t in ts]).value_counts()
+        assert themes == counts.head(2).to_dict()
@@ -0,0 +1,103 @@
+"""
+Tests for the full-text review search index.
+"""
+
+import pytest
+import pandas as pd
+from datetime import date
+from scripts.analysis.sentiment_thematic.incremental import review_keys
+from scripts.analysis.sentiment_thematic.search import SearchIndex, date_terms, main
+from scripts.analysis.sentiment_thematic.storage import write_results
+
+@pytest.fixture
+def results():
+    return pd.DataFrame({
+        'review_id': [0, 1, 2, 3, 4],
+        'bank': ['CBE', 'CBE', 'BOA', 'CBE', 'Dashen'],
+        'date': ['2024-05-01', '2024-05-03', '2024-05-02', '2024-06-10', '2024-05-04'],
+        'rating': [1, 2, 1, 5, 4],
+        'review_text': ["OTP code never arrives", "Can't login, the otp is wrong", "otp code never arrives",
+                        "Great app, fast transfers", "The app crashes after the update"],
+        'sentiment_label': ['NEGATIVE', 'NEGATIVE', 'NEGATIVE', 'POSITIVE', 'NEGATIVE'],
+        'sentiment_score': [0.4, 0.5, 0.4, 0.8, 0.6],
+        'themes': [['Account Access Issues'], ['Account Access Issues'], [],
+                   ['Transaction Performance', 'User Interface & Experience'], []]
+    })
+
+@pytest.fixture
+def index(results):
+    index = SearchIndex(':memory:')
+    index.add(results)
+    yield index
+    index.close()
+
+def test_term_phrase_and_filters(index):
+    assert index.count('otp') == 3
+    assert index.count('"otp code"') == 2
+    assert index.count('crash*') == 1
+    assert sorted(index.search('otp', bank='CBE')['review_id']) == [0, 1]
+    assert index.search('otp', bank='CBE', since='2024-05-02', until='2024-05-07')['review_id'].tolist() == [1]
+    assert index.count('otp', theme='Account Access Issues', sentiment='NEGATIVE') == 2
+    assert index.count('app', since='2024-06-01') == 1
+    assert index.count(sentiment='POSITIVE') == 1
+    found = index.search(theme='User Interface & Experience')
+    assert found['themes'].tolist() == [['Transaction Performance', 'User Interface & Experience']]
+    assert index.search(bank='CBE')['date'].tolist() == ['2024-06-10', '2024-05-03', '2024-05-01']
+    with pytest.raises(ValueError):
+        index.search('"unterminated')
+
+def test_date_terms_cover_range_with_fewest_tags():
+    assert date_terms(date(2023, 12, 30), date(2025, 3, 1)) == [
+        'd20231230', 'd20231231', 'y2024', 'm202501', 'm202502', 'd20250301'
+    ]
+    assert date_terms(date(2024, 5, 2), date(2024, 5, 1)) == []
+
+def test_incremental_add_and_remove(index, results):
+    assert index.add(results) == 0
+
+    # A re-analyzed review replaces its previous entry
+    assert index.add(results.iloc[[3]].assign(sentiment_label='NEGATIVE')) == 1
+    assert len(index) == 5
+    assert index.count('fast') == 1
+    assert index.search('fast', theme='Transaction Performance')['sentiment_label'].tolist() == ['NEGATIVE']
+
+    assert index.count('crashes') == 1
+    assert index.remove(review_keys(results.iloc[[4]], 'review_text')) == 1
+    assert index.count('crashes') == 0
+
+def test_sync_with_results_file(results, tmp_path):
+    path = tmp_path / 'sentiment_thematic_results.csv'
+    write_results(results, path)
+    with SearchIndex(tmp_path / 'index.sqlite') as index:
+        assert index.sync(path, chunk_size=2) == {'written': 5, 'dropped': 0}
+        assert index.sync(path, chunk_size=2) == {'written': 0, 'dropped': 0}
+
+        write_results(results.iloc[1:], path)
+        assert index.sync(path) == {'written': 0, 'dropped': 1}
+        assert index.count('otp') == 2
+
+def test_cli_build_and_query(results, tmp_path, capsys):
+    path = tmp_path / 'sentiment_thematic_results.csv'
+    write_results(results, path)
+    index_path = tmp_path / 'index.sqlite'
+    main(['--index', str(index_path), 'build', '--results', str(path)])
+    main(['--index', str(index_path), 'query', 'otp', '--bank', 'CBE', '--limit', '1'])
+    output = capsys.readouterr().out
+    assert '1 of 2 matching reviews' in output
+
+def test_filters_match_alike_with_and_without_text(index):
+    assert index.count(bank='cbe') == index.count(bank='CBE') == 3
+    assert index.count('otp', bank='cbe') == index.count('otp', bank='CBE') == 2
+    assert index.count(sentiment='negative') == index.count('app OR otp', sentiment='negative') == 4
+    assert index.count(theme='user interface & experience') == 1
+    assert index.count('fast', theme='user interface & experience') == 1
+
+def test_sync_renumbers_shifted_reviews_in_place(results, tmp_path):
+    path = tmp_path / 'sentiment_thematic_results.csv'
+    write_results(results, path)
+    with SearchIndex(tmp_path / 'index.sqlite') as index:
+        index.sync(path)
+        # Dropping the first review shifts the review_id of every later one
+        write_results(results.iloc[1:].assign(review_id=range(4)), path)
+        assert index.sync(path) == {'written': 0, 'dropped': 1}
+        assert index.search('crashes')['review_id'].tolist() == [3]
@@ -0,0 +1,95 @@
+"""
+Tests for the sentiment backend registry.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.analysis.sentiment_thematic.sentiment import (
+    SENTIMENT_BACKENDS, LexiconBackend, agreement, create_sentiment_backend
+)
+from scripts.analysis.sentiment_thematic.tokenizer import tokenize
+
+TEXTS = np.array([
+    "Great app with excellent features!",
+    "Terrible experience, app keeps crashing",
+    "The app is not good",
+    "I don't like the new update",
+    "",
+    "transfer"
+], dtype=object)
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_sentiment_backend('nope')
+
+def test_combined_backend_matches_previous_scoring():
+    analyzer = SentimentThematicAnalyzer()
+    vader, textblob = create_sentiment_backend('vader'), create_sentiment_backend('textblob')
+    for text in TEXTS:
+        label, score, vader_score, textblob_score = analyzer._score_sentiment(text)
+        assert vader_score == vader.score(text)[2]
+        assert textblob_score == textblob.score(text)[3]
+        assert score == abs((vader_score + textblob_score) / 2)
+
+@pytest.mark.parametrize('name', sorted(SENTIMENT_BACKENDS))
+def test_backends_score_batches(name):
+    analyzer = SentimentThematicAnalyzer(sentiment=name)
+    reviews_df = pd.DataFrame({
+        'review': TEXTS, 'rating': 3, 'date': '2024-01-01', 'bank': 'CBE', 'source': 'Google Play'
+    })
+    results_df = analyzer.process_reviews(reviews_df, batch_size=4)
+    assert list(results_df['sentiment_label'][:2]) == ['POSITIVE', 'NEGATIVE']
+    assert results_df['sentiment_label'][4] == 'NEUTRAL'
+    single = [analyzer.analyze_sentiment(text)['label'] for text in TEXTS]
+    assert single == list(results_df['sentiment_label'])
+
+def test_lexicon_backend_negates_following_words():
+    compound = LexiconBackend().compound
+    scores = compound([tokenize(text) for text in ["good", "not good", "I don't like it", "not", "good"]])
+    assert scores[0] > 0 and scores[1] < 0 and scores[2] < 0
+    # Negation does not carry over into the next review
+    assert scores[4] == scores[0]
+
+def test_backend_changes_fingerprint():
+    assert SentimentThematicAnalyzer(sentiment='vader').fingerprint() != SentimentThematicAnalyzer().fingerprint()
+
+def test_agreement_report():
+    reference = pd.DataFrame({'sentiment_label': ['POSITIVE', 'NEGATIVE', 'NEUTRAL'], 'sentiment_score': [0.8, 0.5, 0.01]})
+    candidate = pd.DataFrame({'sentiment_label': ['POSITIVE', 'NEUTRAL', 'NEUTRAL'], 'sentiment_score': [0.6, 0.02, 0.0]})
+    report = agreement(reference, candidate)
+    assert report['label_agreement'] == pytest.approx(2 / 3)
+    assert report['score_correlation'] > 0.5
+    assert report['confusion'].loc['NEGATIVE', 'NEUTRAL'] == 1
+
+def test_non_english_reviews_skip_sentiment():
+    analyzer = SentimentThematicAnalyzer()
+    reviews_df = pd.DataFrame({
+        'review': ["Great app", "በጣም ጥሩ app ነው", "Terrible support"],
+        'rating': 3, 'date': '2024-01-01', 'bank': 'CBE', 'source': 'Google Play',
+        'language': ['en', 'am', None]
+    })
+    results_df = analyzer.process_reviews(reviews_df)
+    assert list(results_df['language'][:2]) == ['en', 'am']
+    assert list(results_df['sentiment_label']) == ['POSITIVE', 'UNSCORED', 'NEGATIVE']
+    assert np.isnan(results_df['sentiment_score'][1])
+    assert results_df['themes'][1] == ['User Interface & Experience']
+    assert 'language' not in analyzer.process_reviews(reviews_df.drop(columns='language')).columns
+
+def test_agreement_correlates_signed_scores_of_neutral_reviews():
+    reference = pd.DataFrame({
+        'sentiment_label': ['POSITIVE', 'NEGATIVE', 'NEUTRAL', 'NEUTRAL'],
+        'sentiment_score': [0.5, 0.5, 0.04, 0.04],
+        'vader_score': [0.6, -0.6, -0.04, 0.04],
+        'textblob_score': [0.4, -0.4, -0.04, 0.04]
+    })
+    candidate = reference.assign(vader_score=[0.5, -0.5, -0.04, 0.04]).drop(columns='textblob_score')
+    assert agreement(reference, candidate)['score_correlation'] == pytest.approx(1.0)
+
+    texts = ["Great app", "Terrible app", "not bad", "the app"]
+    lexicon = SentimentThematicAnalyzer(sentiment='lexicon').process_reviews(pd.DataFrame({
+        'review': texts, 'rating': 3, 'date': '2024-01-01', 'bank': 'CBE', 'source': 'Google Play'
+    }))
+    compound = LexiconBackend().compound([tokenize(text) for text in texts])
+    assert lexicon['vader_score'].to_numpy() == pytest.approx(compound)
@@ -2,9 +2,11 @@
 Tests for sentiment and thematic analysis.
 """
 
+import json
 import pytest
 import pandas as pd
 from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.analysis.sentiment_thematic.cache import AnalysisCache
 
 @pytest.fixture
 def analyzer():
@@ -66,4 +68,92 @@ def test_process_reviews(analyzer, sample_reviews):
     assert all(0 <= score <= 1 for score in results['sentiment_score'])
     
     # Check if themes are lists
-    assert all(isinstance(themes, list) for themes in results['themes']) 
\ No newline at end of file
+    assert all(isinstance(themes, list) for themes in results['themes']) 
+
+@pytest.fixture
+def cleaned_reviews():
+    return pd.DataFrame({
+        'review': [
+            "Great app! The interface is very user-friendly and transfers are quick.",
+            "Terrible experience. Can't login and customer support is unresponsive.",
+            "Good features but the app crashes sometimes during transactions.",
+            "ok"
+        ],
+        'rating': [5, 1, 4, 3],
+        'date': ['2024-01-01', '2024-01-02', '2024-01-02', '2024-01-03'],
+        'bank': ['Bank A', 'Bank B', 'Bank A', 'Bank B'],
+        'source': ['Google Play'] * 4
+    }, index=[10, 11, 12, 13])
+
+def test_process_reviews_batch_size(analyzer, cleaned_reviews):
+    expected = analyzer.process_reviews(cleaned_reviews)
+    for batch_size in [1, 3, 100]:
+        results = analyzer.process_reviews(cleaned_reviews, batch_size=batch_size)
+        pd.testing.assert_frame_equal(results, expected)
+
+    # Batched results match the per-review methods
+    assert expected['review_id'].tolist() == [10, 11, 12, 13]
+    for row in expected.itertuples():
+        sentiment = analyzer.analyze_sentiment(row.review_text)
+        assert row.sentiment_label == sentiment['label']
+        assert row.sentiment_score == sentiment['score']
+        assert row.keywords == analyzer.extract_keywords(row.review_text)
+        assert row.themes == analyzer.identify_themes(row.review_text)
+
+    with pytest.raises(ValueError):
+        analyzer.process_reviews(cleaned_reviews, batch_size=0)
+
+def test_process_reviews_parallel_matches_serial(analyzer, cleaned_reviews):
+    serial = analyzer.process_reviews(cleaned_reviews)
+    for batch_size in [1, 3]:
+        parallel = analyzer.process_reviews(cleaned_reviews, batch_size=batch_size, workers=2)
+        pd.testing.assert_frame_equal(parallel, serial)
+
+def test_theme_matching_whole_words(analyzer):
+    # Keywords must not match inside other words
+    assert analyzer.identify_themes("I am happy with it") == []
+    assert analyzer.identify_themes("They should build more branches") == ['Feature Requests']
+
+    # Multi-word keywords match across whitespace and count per hit
+    hits = analyzer.count_themes("Customer  service was slow, no help at all. App is ok, app is fine")
+    assert hits == {'User Interface & Experience': 2, 'Customer Support': 2}
+
+def test_custom_theme_keywords():
+    analyzer = SentimentThematicAnalyzer(theme_keywords={'Security': ['otp', 'pin code']})
+    assert analyzer.identify_themes("The OTP never arrives") == ['Security']
+    assert analyzer.count_themes("Reset my PIN code, wrong pin codes") == {'Security': 2}
+    assert analyzer.identify_themes("Great app") == []
+
+def test_process_reviews_cached(cleaned_reviews, tmp_path):
+    expected = SentimentThematicAnalyzer().process_reviews(cleaned_reviews)
+    reviews = pd.concat([cleaned_reviews, cleaned_reviews])
+    reviews.loc[:, 'review'] = reviews['review'].str.replace(' ', '  ')
+
+    cache = AnalysisCache(max_entries=2, path=tmp_path / "cache.db")
+    results = SentimentThematicAnalyzer(cache=cache).process_reviews(reviews)
+    pd.testing.assert_frame_equal(results.iloc[4:].drop(columns='review_text').reset_index(drop=True),
+                                  expected.drop(columns='review_text'))
+    assert cache.stats()['misses'] == 4
+    assert cache.stats()['evictions'] == 2
+    cache.close()
+
+    # Entries survive between runs until the theme keywords change
+    cache = AnalysisCache(path=tmp_path / "cache.db")
+    SentimentThematicAnalyzer(cache=cache).process_reviews(cleaned_reviews)
+    assert cache.stats()['hits'] == 4
+    SentimentThematicAnalyzer(theme_keywords={'Speed': ['slow']}, cache=cache).process_reviews(cleaned_reviews)
+    assert cache.stats()['misses'] == 4
+    cache.close()
+
+def test_generate_summary_matches_per_bank_loop(analyzer):
+    from scripts.benchmarks.bench_generate_summary import generate_summary_per_bank
+    from scripts.benchmarks.synthetic import make_results
+
+    results = make_results(5000, n_banks=7, seed=1)
+    original = results.copy()
+    expected = json.dumps(generate_summary_per_bank(results.copy()), indent=4)
+    assert json.dumps(analyzer.generate_summary(results), indent=4) == expected
+    pd.testing.assert_frame_equal(results, original)
+
+    categorical = results.astype({'bank': 'category', 'sentiment_label': 'category'})
+    assert json.dumps(analyzer.generate_summary(categorical), indent=4) == expected
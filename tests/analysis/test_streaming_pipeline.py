@@ -0,0 +1,62 @@
+"""
+Tests for the streaming raw-to-results pipeline.
+"""
+
+import pytest
+import pandas as pd
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.analysis.sentiment_thematic.storage import read_results
+from scripts.analysis.sentiment_thematic.streaming import stream_reviews
+from scripts.preprocessing.preprocess_reviews import preprocess_reviews
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    data = [
+        {"review": "Love the app", "rating": 5, "date": "2023-10-15 12:34:56", "bank": "CBE", "source": "Google Play"},
+        {"review": "App crashes often", "rating": 2, "date": "2023-10-16 09:00:00", "bank": "BOA", "source": "Google Play"},
+        {"review": None, "rating": 3, "date": "2023-10-17 14:22:33", "bank": "Dashen", "source": "Google Play"},
+        {"review": "Love the app", "rating": 5, "date": "2023-10-15 12:34:56", "bank": "CBE", "source": "Google Play"},
+        {"review": "Transfer failed twice", "rating": 1, "date": "2023-10-18 08:00:00", "bank": "CBE", "source": "Google Play"},
+        {"review": None, "rating": 3, "date": "2023-10-17 14:22:33", "bank": "Dashen", "source": "Google Play"},
+        {"review": "App crashes often", "rating": 2, "date": "2023-10-16 09:00:00", "bank": "BOA", "source": "Google Play"}
+    ]
+    path = tmp_path / "reviews_raw.csv"
+    pd.DataFrame(data).to_csv(path, index=False)
+    return path
+
+@pytest.mark.parametrize('suffix', ['csv', 'parquet'])
+def test_streaming_matches_batch_pipeline(raw_csv, tmp_path, suffix):
+    analyzer = SentimentThematicAnalyzer()
+    cleaned = preprocess_reviews(raw_csv, tmp_path / "reviews_cleaned.csv")
+    expected = analyzer.process_reviews(cleaned.reset_index(drop=True))
+
+    results_path = tmp_path / f"results.{suffix}"
+    cleaned_path = tmp_path / "streamed_cleaned.csv"
+    rows = stream_reviews(analyzer, raw_csv, results_path, cleaned_path=cleaned_path, chunk_size=2)
+    assert rows == 4
+
+    results = read_results(results_path).drop(columns='review_key')
+    pd.testing.assert_frame_equal(results.astype({'bank': object, 'source': object, 'sentiment_label': object}),
+                                  expected, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_csv(cleaned_path), pd.read_csv(tmp_path / "reviews_cleaned.csv"))
+
+def test_streaming_collapses_near_duplicates(tmp_path):
+    raw = pd.DataFrame({
+        "review": ["Good app", "good app!!", "Transfer failed", "Good app 👍", "transfer failed."],
+        "rating": [5, 5, 1, 4, 1],
+        "date": ["2023-10-15", "2023-10-16", "2023-10-16", "2023-10-17", "2023-10-18"],
+        "bank": "CBE",
+        "source": "Google Play"
+    })
+    raw_path = tmp_path / "reviews_raw.csv"
+    raw.to_csv(raw_path, index=False)
+    analyzer = SentimentThematicAnalyzer()
+
+    rows = stream_reviews(analyzer, raw_path, tmp_path / "results.csv", chunk_size=2, near_duplicates='collapse')
+    assert rows == 2
+    results = read_results(tmp_path / "results.csv")
+    assert list(results['review_text']) == ["Good app", "Transfer failed"]
+    assert list(results['cluster_id']) == [0, 1]
+
+    cleaned = preprocess_reviews(raw_path, tmp_path / "cleaned.csv", near_duplicates='flag')
+    assert list(cleaned['cluster_id']) == [0, 0, 1, 0, 1]
@@ -0,0 +1,57 @@
+"""
+Tests for the keyword tokenizer and vocabulary.
+"""
+
+import numpy as np
+from scripts.analysis.sentiment_thematic.analyzer import SentimentThematicAnalyzer
+from scripts.analysis.sentiment_thematic.matcher import ThemeMatcher
+from scripts.analysis.sentiment_thematic.tokenizer import KeywordArray, Tokenizer, Vocabulary, tokenize
+from scripts.benchmarks.bench_keywords import extract_keywords_uncompiled
+
+TEXTS = [
+    "The app is great, but the login-page crashes!!",
+    "Transfer failed... money_sent yet? #support",
+    "",
+    "ok",
+    "Ünïcode wörds—and   tabs\tand 12345"
+]
+
+def test_tokenizer_matches_previous_extract_keywords():
+    tokenizer = Tokenizer()
+    for text in TEXTS:
+        assert tokenizer.keywords(text) == extract_keywords_uncompiled(text)
+
+def test_custom_stop_words_change_keywords_and_fingerprint():
+    analyzer = SentimentThematicAnalyzer(stop_words={'app'})
+    assert analyzer.extract_keywords("The app is great") == ['the', 'great']
+    assert analyzer.fingerprint() != SentimentThematicAnalyzer().fingerprint()
+
+def test_keywords_are_interned():
+    analyzer = SentimentThematicAnalyzer()
+    first = analyzer.extract_keywords("great app")
+    second = analyzer.extract_keywords("".join(["gre", "at"]))
+    assert first[0] is second[0]
+
+def test_keyword_array_round_trip():
+    vocabulary = Vocabulary()
+    keywords = KeywordArray.from_texts(TEXTS, Tokenizer(), vocabulary)
+    assert len(keywords) == len(TEXTS)
+    assert keywords.to_lists() == [extract_keywords_uncompiled(text) for text in TEXTS]
+    assert keywords[2] == []
+    assert keywords.ids.dtype == np.int32
+    assert keywords.counts()[vocabulary.ids['tabs']] == 1
+    assert keywords.counts().sum() == len(keywords.ids)
+
+def test_tokenize_splits_once_into_words_and_gaps():
+    tokens = tokenize("Great app, slow  LOGIN!")
+    assert tokens.lowered == "great app, slow  login!"
+    assert tokens.words == ['great', 'app', 'slow', 'login', '']
+    assert tokens.gaps == [' ', ', ', '  ', '!']
+    assert Tokenizer().select_keywords(tokens) == Tokenizer().keywords(tokens.text)
+
+def test_theme_matcher_phrases_on_tokens():
+    matcher = ThemeMatcher({'Support': ['customer service', 'help'], 'Access': ['log in', 'e-mail']})
+    tokens = tokenize("Customer\tServices helped me log in by e-mails")
+    assert matcher.count_tokens(tokens) == {'Support': 2, 'Access': 2}
+    assert matcher.count("customer, service") == {}
+    assert matcher.count("log-in and email") == {}
@@ -0,0 +1,102 @@
+"""
+Tests for the rolling trends of analysis results.
+"""
+
+import pytest
+import pandas as pd
+from scripts.analysis.sentiment_thematic.rollup import RollupCube
+from scripts.analysis.sentiment_thematic.trends import TrendEngine, negative_z_scores
+
+def make_results(days, bank='CBE', negative_days=(), per_day=10):
+    """Results with per_day reviews a day, all negative on negative_days, a third negative otherwise."""
+    rows = []
+    for day in pd.date_range('2024-01-01', periods=days):
+        for i in range(per_day):
+            negative = day in negative_days or i % 3 == 0
+            rows.append({
+                'bank': bank,
+                'date': f'{day:%Y-%m-%d}',
+                'rating': 1 if negative else 5,
+                'sentiment_label': 'NEGATIVE' if negative else 'POSITIVE',
+                'sentiment_score': 0.5,
+                'themes': ['Customer Support'] if negative else []
+            })
+    return pd.DataFrame(rows)
+
+def test_daily_trend_values():
+    results = make_results(3)
+    results.loc[0, 'date'] = 'not a date'
+    trend = TrendEngine.from_rollup(RollupCube.from_results(results)).trends('daily', window=2)
+    assert trend['reviews'].tolist() == [9, 19, 20]
+    last = trend.iloc[-1]
+    assert last['date'] == pd.Timestamp('2024-01-03')
+    assert last['negative_share'] == pytest.approx(8 / 20)
+    assert last['positive_share'] == pytest.approx(12 / 20)
+    assert last['average_rating'] == pytest.approx((8 * 1 + 12 * 5) / 20)
+
+def test_weekly_and_monthly_resampling():
+    engine = TrendEngine.from_rollup(RollupCube.from_results(make_results(40)))
+    weekly = engine.trends('weekly', window=1)
+    assert weekly['date'].iloc[0] == pd.Timestamp('2024-01-01')
+    assert (weekly['reviews'].iloc[:-1] == 70).all()
+    monthly = engine.trends('monthly', window=1)
+    assert monthly['reviews'].tolist() == [310, 90]
+    shares = engine.theme_shares('monthly', window=1)
+    assert shares['Customer Support'].tolist() == pytest.approx([(31 * 4) / 310, (9 * 4) / 90])
+    with pytest.raises(ValueError):
+        engine.trends('hourly')
+
+def test_incremental_updates_match_full_build():
+    results = pd.concat([make_results(20), make_results(20, bank='BOA', per_day=4)], ignore_index=True)
+    full = TrendEngine.from_rollup(RollupCube.from_results(results))
+    engine = TrendEngine()
+    for _, day in results.groupby('date'):
+        engine.add(day)
+    for frequency in ['daily', 'weekly', 'monthly']:
+        pd.testing.assert_frame_equal(engine.trends(frequency), full.trends(frequency))
+        pd.testing.assert_frame_equal(engine.theme_shares(frequency), full.theme_shares(frequency))
+
+def test_negative_spike_alerts():
+    spike = pd.Timestamp('2024-02-09')
+    engine = TrendEngine.from_rollup(RollupCube.from_results(make_results(40, negative_days=[spike], per_day=25)))
+    trend = engine.trends('daily', window=1)
+    assert trend.loc[trend['negative_spike'], 'date'].tolist() == [spike]
+
+    alerts = engine.alerts('daily', window=1)
+    assert alerts['bank'].tolist() == ['CBE']
+    assert alerts['negative_z'].iloc[0] > 3
+
+    # Too few reviews to alert on
+    assert engine.alerts('daily', window=1, min_reviews=26).empty
+
+def test_theme_shares_cover_unthemed_banks_and_days():
+    results = pd.concat([
+        make_results(2).assign(themes=[['Customer Support']] * 10 + [[]] * 10),
+        make_results(2, bank='BOA').assign(themes=[[]] * 20)
+    ], ignore_index=True)
+    engine = TrendEngine.from_rollup(RollupCube.from_results(results))
+    shares = engine.theme_shares('daily', window=2).set_index(['bank', 'date'])['Customer Support']
+    assert shares[('CBE', pd.Timestamp('2024-01-02'))] == pytest.approx(0.5)
+    assert shares.loc['BOA'].tolist() == [0.0, 0.0]
+    merged = engine.trends('daily', window=2).merge(engine.theme_shares('daily', window=2), on=['bank', 'date'])
+    assert len(merged) == 4
+    assert merged['Customer Support'].notna().all()
+
+def test_windows_span_periods_without_reviews():
+    results = make_results(12)
+    gapped = results[~results['date'].between('2024-01-04', '2024-01-10')]
+    engine = TrendEngine.from_rollup(RollupCube.from_results(gapped))
+    trend = engine.trends('daily', window=7, baseline=3, min_reviews=0)
+    assert trend['date'].dt.day.tolist() == [1, 2, 3, 4, 5, 6, 7, 8, 9, 11, 12]
+    assert trend.set_index('date').loc['2024-01-11', 'reviews'] == 10
+    daily, _, _ = engine.periods('daily')
+    assert len(daily) == 12
+
+    # A gap in the input index still counts as periods without reviews
+    reviews = daily.xs('reviews', axis=1, level='measure')
+    negative = reviews / 2
+    kept = reviews.index[reviews['CBE'] > 0]
+    z, base = negative_z_scores(reviews.loc[kept], negative.loc[kept], 2, 3)
+    expected_z, expected_base = negative_z_scores(reviews, negative, 2, 3)
+    pd.testing.assert_frame_equal(z, expected_z.loc[kept])
+    pd.testing.assert_frame_equal(base, expected_base.loc[kept])
@@ -0,0 +1,103 @@
+import pytest
+import pandas as pd
+from google_play_scraper.features.reviews import _ContinuationToken
+from scripts.scraping.concurrent_scraper import (
+    ConcurrentScraper, ContinuationStore, ScrapeTarget, TokenBucket
+)
+
+class StubPlayStore:
+    """Local stand-in for google_play_scraper.reviews serving numbered pages."""
+
+    def __init__(self, reviews_per_app=250, fail_first=0, swallow_errors=False):
+        self.reviews_per_app = reviews_per_app
+        self.fail_first = fail_first
+        self.swallow_errors = swallow_errors
+        self.calls = 0
+
+    def __call__(self, app_id, lang="en", country="us", count=100, continuation_token=None):
+        self.calls += 1
+        if continuation_token is not None:
+            # Like google_play_scraper, continuation calls reuse the first count
+            count = continuation_token.count
+        if self.fail_first:
+            self.fail_first -= 1
+            if self.swallow_errors:
+                # google_play_scraper returns an empty page without a next token
+                return [], _ContinuationToken(None, lang, country, 2, count, None, None)
+            raise ConnectionResetError("stub connection reset")
+        offset = int(continuation_token.token) if continuation_token is not None else 0
+        stop = min(offset + count, self.reviews_per_app)
+        result = [
+            {"content": f"{app_id} {lang} review {i}", "score": i % 5 + 1,
+             "at": pd.Timestamp("2024-01-01") + pd.Timedelta(days=i)}
+            for i in range(offset, stop)
+        ]
+        token = str(stop) if stop < self.reviews_per_app else None
+        return result, _ContinuationToken(token, lang, country, 2, count, None, None)
+
+@pytest.fixture
+def targets():
+    return [
+        ScrapeTarget("CBE", "app.cbe", "en", "et"),
+        ScrapeTarget("BOA", "app.boa", "en", "et"),
+        ScrapeTarget("BOA", "app.boa", "am", "et")
+    ]
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+    def sleep(seconds):
+        now[0] += seconds
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(12):
+        bucket.acquire()
+    # Two requests in the burst, ten more at 10 per second
+    assert now[0] == pytest.approx(1.0)
+
+def test_collect_concurrently_with_retries(targets, tmp_path):
+    stub = StubPlayStore(fail_first=2)
+    scraper = ConcurrentScraper(stub, workers=3, rate=1000, burst=10, sleep=lambda s: None)
+    stats = scraper.collect(targets, tmp_path / "reviews_raw.csv", per_target=200, page_size=60)
+
+    df = pd.read_csv(tmp_path / "reviews_raw.csv")
+    assert list(df.columns) == ["review", "rating", "date", "bank", "source"]
+    assert stats["reviews"] == len(df) == 600
+    assert stats["failed"] == []
+    assert stats["reviews_per_second"] > 0
+    assert df.groupby("bank").size().to_dict() == {"BOA": 400, "CBE": 200}
+
+def test_collect_resumes_from_saved_tokens(targets, tmp_path):
+    output_path = tmp_path / "reviews_raw.csv"
+    state_path = tmp_path / "scrape_state.json"
+
+    # First run stops early for every target
+    scraper = ConcurrentScraper(StubPlayStore(), rate=1000, store=ContinuationStore(state_path))
+    scraper.collect(targets, output_path, per_target=100, page_size=50)
+
+    stub = StubPlayStore()
+    scraper = ConcurrentScraper(stub, rate=1000, store=ContinuationStore(state_path, resume=True))
+    stats = scraper.collect(targets, output_path, per_target=300, page_size=50)
+
+    df = pd.read_csv(output_path)
+    assert stats["reviews"] == 3 * 150
+    assert len(df) == 3 * 250
+    assert not df.duplicated().any()
+
+def test_empty_pages_without_token_are_retried(targets, tmp_path):
+    stub = StubPlayStore(fail_first=2, swallow_errors=True)
+    scraper = ConcurrentScraper(stub, workers=1, rate=1000, burst=10, sleep=lambda s: None)
+    stats = scraper.collect(targets[:1], tmp_path / "reviews_raw.csv", per_target=130, page_size=60)
+    assert stats["failed"] == []
+    # The last page is trimmed to per_target
+    assert stats["reviews"] == len(pd.read_csv(tmp_path / "reviews_raw.csv")) == 130
+
+def test_target_failing_with_empty_pages_is_not_saved_as_done(targets, tmp_path):
+    output_path = tmp_path / "reviews_raw.csv"
+    store = ContinuationStore(tmp_path / "scrape_state.json")
+    stub = StubPlayStore(fail_first=10, swallow_errors=True)
+    scraper = ConcurrentScraper(stub, rate=1000, max_retries=2, store=store, sleep=lambda s: None)
+    stats = scraper.collect(targets[:1], output_path, per_target=100, page_size=50)
+    assert stats["failed"] == ["app.cbe:en:et"]
+    assert store.get("app.cbe:en:et") is None
+
+    scraper = ConcurrentScraper(StubPlayStore(), rate=1000, store=ContinuationStore(store.path))
+    assert scraper.collect(targets[:1], output_path, per_target=100, page_size=50)["reviews"] == 100
@@ -0,0 +1,79 @@
+import threading
+import pytest
+import pandas as pd
+from scripts.database.backends import OracleBackend, SQLiteBackend, get_backend
+from scripts.database.db_operations import DatabaseManager
+
+@pytest.fixture
+def backend():
+    backend = SQLiteBackend(":memory:", min_size=1, max_size=3)
+    yield backend
+    backend.close()
+
+def test_sqlite_pool_is_shared_and_bounded(backend):
+    with backend.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("INSERT INTO banks (bank_name) VALUES (:1)", ["CBE"])
+        connection.commit()
+
+    barrier = threading.Barrier(3)
+    counts = []
+
+    def query():
+        with backend.connection() as connection:
+            barrier.wait(timeout=5)
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM banks")
+            counts.append(cursor.fetchone()[0])
+
+    threads = [threading.Thread(target=query) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every pooled connection sees the same in-memory database
+    assert counts == [1] * 6
+    stats = backend.stats()
+    assert stats["acquired"] == stats["released"] == 7
+    assert stats["in_use"] == 0
+    assert stats["peak_in_use"] == 3
+
+def test_database_manager_returns_connection_to_pool(backend):
+    reviews = pd.DataFrame({
+        "review": ["great app", "slow transfer"],
+        "rating": [5, 2],
+        "date": ["2024-01-01", "2024-01-02"],
+        "bank": ["CBE", "BOA"],
+        "source": "Google Play",
+        "sentiment_label": ["POSITIVE", "NEGATIVE"],
+        "sentiment_score": [0.8, 0.4],
+        "vader_score": [0.6, -0.3],
+        "textblob_score": [0.8, -0.5],
+        "themes": [["User Interface & Experience"], ["Transaction Performance"]],
+        "keywords": [["great", "app"], ["slow", "transfer"]]
+    })
+    db_manager = DatabaseManager(backend=backend)
+    assert db_manager.dialect == "sqlite"
+    db_manager.create_tables()
+    db_manager.insert_banks(reviews)
+    assert db_manager.upsert_reviews(reviews)["changed"] == 2
+    db_manager.close()
+    assert backend.stats()["in_use"] == 0
+
+    # A later manager reuses the pooled connection and sees the loaded rows
+    db_manager = DatabaseManager(backend=backend)
+    cursor = db_manager.connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM reviews")
+    assert cursor.fetchone()[0] == 2
+    db_manager.close()
+
+def test_oracle_backend_initializes_client_lazily():
+    # Constructing the backend neither imports the driver nor connects
+    backend = OracleBackend()
+    assert backend.stats()["acquired"] == 0
+
+def test_get_backend_is_shared():
+    assert get_backend("sqlite") is get_backend("sqlite")
+    with pytest.raises(ValueError):
+        get_backend("mysql")
@@ -0,0 +1,83 @@
+import sys
+from types import SimpleNamespace
+import pytest
+import pandas as pd
+from scripts.database.db_operations import REVIEW_COLUMNS, DatabaseManager, review_input_sizes
+from scripts.database.sqlite_standin import SQLiteConnection
+
+@pytest.fixture
+def merged_reviews():
+    n = 1200
+    return pd.DataFrame({
+        "review": [f"review {i}" for i in range(n)],
+        "rating": [i % 5 + 1 for i in range(n)],
+        "date": ["2024-01-%02d" % (i % 28 + 1) for i in range(n)],
+        "bank": ["CBE", "BOA", "Dashen"] * (n // 3),
+        "source": "Google Play",
+        "sentiment_label": ["POSITIVE", "NEGATIVE", "NEUTRAL", None] * (n // 4),
+        "sentiment_score": [0.5] * n,
+        "vader_score": [0.6] * n,
+        "textblob_score": [0.4] * n,
+        "themes": [["Customer Support", "Feature Requests"], []] * (n // 2),
+        "keywords": [["review"], float("nan")] * (n // 2)
+    })
+
+@pytest.fixture
+def db_manager():
+    manager = DatabaseManager(connection=SQLiteConnection())
+    yield manager
+    manager.close()
+
+def test_insert_reviews_in_batches(db_manager, merged_reviews):
+    db_manager.insert_banks(merged_reviews)
+    stats = db_manager.insert_reviews(merged_reviews, batch_size=500)
+    assert stats["rows"] == len(merged_reviews)
+    assert stats["rows_per_second"] > 0
+
+    cursor = db_manager.connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM reviews")
+    assert cursor.fetchone()[0] == len(merged_reviews)
+
+    cursor.execute("""
+        SELECT b.bank_name, r.review_text, r.rating, r.review_date, r.sentiment_label, r.themes, r.keywords
+        FROM reviews r JOIN banks b ON b.bank_id = r.bank_id
+        ORDER BY r.review_id
+    """)
+    rows = cursor.fetchall()
+    assert rows[0] == ("CBE", "review 0", 1.0, "2024-01-01", "POSITIVE", "Customer Support|Feature Requests", "review")
+    assert rows[3] == ("CBE", "review 3", 4.0, "2024-01-04", None, "", None)
+
+def test_insert_reviews_rejects_unknown_banks(db_manager, merged_reviews):
+    with pytest.raises(KeyError):
+        db_manager.insert_reviews(merged_reviews)
+
+def test_upsert_reviews_is_idempotent(db_manager, merged_reviews):
+    db_manager.create_tables()
+    db_manager.insert_banks(merged_reviews)
+    first = db_manager.upsert_reviews(merged_reviews, batch_size=500)
+    assert first["changed"] == len(merged_reviews)
+
+    # Loading the same data again touches nothing
+    db_manager.create_tables()
+    db_manager.insert_banks(merged_reviews)
+    assert db_manager.upsert_reviews(merged_reviews)["changed"] == 0
+
+    # Only changed reviews are rewritten
+    changed = merged_reviews.copy()
+    changed.loc[[4, 7], "sentiment_label"] = "NEGATIVE"
+    assert db_manager.upsert_reviews(changed)["changed"] == 2
+
+    cursor = db_manager.connection.cursor()
+    cursor.execute("SELECT COUNT(*), COUNT(DISTINCT review_key) FROM reviews")
+    assert cursor.fetchone() == (len(merged_reviews), len(merged_reviews))
+    cursor.execute("SELECT COUNT(*) FROM banks")
+    assert cursor.fetchone()[0] == 3
+    cursor.execute("SELECT sentiment_label FROM reviews WHERE review_text = 'review 4'")
+    assert cursor.fetchone()[0] == "NEGATIVE"
+
+def test_text_columns_bind_as_clob_on_oracle(monkeypatch):
+    monkeypatch.setitem(sys.modules, "cx_Oracle", SimpleNamespace(DB_TYPE_CLOB="DB_TYPE_CLOB"))
+    sizes = dict(zip(REVIEW_COLUMNS, review_input_sizes("oracle")))
+    assert sizes["review_text"] == sizes["themes"] == sizes["keywords"] == "DB_TYPE_CLOB"
+    assert sizes["review_key"] == 32
+    assert "CLOB" not in review_input_sizes("oracle")
@@ -0,0 +1,86 @@
+from collections import Counter
+import pytest
+import pandas as pd
+from scripts.database import queries
+from scripts.database.db_operations import DatabaseManager
+from scripts.database.sqlite_standin import SQLiteConnection
+
+THEMES = [
+    ["Customer Support"],
+    ["Transaction Performance", "Customer Support"],
+    [],
+    ["User Interface & Experience"],
+    ["Transaction Performance"],
+    ["Account Access Issues", "Transaction Performance"]
+]
+
+@pytest.fixture
+def analyzed_reviews():
+    n = 300
+    return pd.DataFrame({
+        "review": [f"review {i}" for i in range(n)],
+        "rating": [i % 5 + 1 for i in range(n)],
+        "date": ["2024-%02d-%02d" % (i % 3 + 1, i % 28 + 1) for i in range(n)],
+        "bank": ["CBE", "BOA", "Dashen", "CBE"] * (n // 4),
+        "source": "Google Play",
+        "sentiment_label": ["POSITIVE", "NEGATIVE", "NEGATIVE", "NEUTRAL", "POSITIVE"] * (n // 5),
+        "sentiment_score": [0.5] * n,
+        "vader_score": [0.6] * n,
+        "textblob_score": [0.4] * n,
+        "themes": [THEMES[i % len(THEMES)] for i in range(n)],
+        "keywords": [["slow", "app", "slow"], ["great"], float("nan")] * (n // 3)
+    })
+
+@pytest.fixture
+def connection(analyzed_reviews):
+    connection = SQLiteConnection()
+    db_manager = DatabaseManager(connection=connection)
+    db_manager.insert_banks(analyzed_reviews)
+    db_manager.upsert_reviews(analyzed_reviews)
+    yield connection
+    connection.close()
+
+def counted_themes(df):
+    return {
+        bank: Counter(theme for themes in group["themes"] for theme in themes)
+        for bank, group in df.groupby("bank")
+    }
+
+def test_theme_counts_match_pandas(connection, analyzed_reviews):
+    assert queries.theme_counts(connection) == counted_themes(analyzed_reviews)
+
+def test_pain_points_and_drivers(connection, analyzed_reviews):
+    for sentiment, query in [("NEGATIVE", queries.pain_points), ("POSITIVE", queries.drivers)]:
+        expected = counted_themes(analyzed_reviews[analyzed_reviews["sentiment_label"] == sentiment])
+        result = query(connection)
+        for bank, counts in expected.items():
+            top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:2]
+            assert list(result[bank].items()) == top
+
+def test_keywords_are_counted_per_review(connection, analyzed_reviews):
+    keywords = queries.top_keywords(connection, "CBE", top=2)
+    cbe = analyzed_reviews[analyzed_reviews["bank"] == "CBE"]
+    expected = Counter(kw for kws in cbe["keywords"] if isinstance(kws, list) for kw in kws)
+    assert keywords == dict(expected.most_common(2))
+
+def test_monthly_theme_counts(connection, analyzed_reviews):
+    counts = queries.monthly_theme_counts(connection, "NEGATIVE", "Transaction Performance")
+    exploded = analyzed_reviews.explode("themes").assign(month=lambda df: df["date"].str[:7])
+    expected = exploded[
+        (exploded["sentiment_label"] == "NEGATIVE") & (exploded["themes"] == "Transaction Performance")
+    ].groupby(["bank", "month"]).size()
+    assert counts.set_index(["bank", "month"])["reviews"].to_dict() == expected.to_dict()
+
+def test_upsert_replaces_child_rows(connection, analyzed_reviews):
+    changed = analyzed_reviews.copy()
+    changed.at[0, "themes"] = ["Feature Requests"]
+    DatabaseManager(connection=connection).upsert_reviews(changed)
+
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT t.theme FROM review_theme t JOIN reviews r ON r.review_id = t.review_id
+        WHERE r.review_text = 'review 0'
+    """)
+    assert cursor.fetchall() == [("Feature Requests",)]
+    cursor.execute("SELECT COUNT(*) FROM review_theme")
+    assert cursor.fetchone()[0] == sum(len(themes) for themes in changed["themes"])
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from scripts.preprocessing.near_duplicates import NearDuplicateDetector, cluster_near_duplicates
+
+def test_near_duplicates_share_a_cluster():
+    """Test that reviews differing in case, punctuation or emoji are clustered."""
+    detector = NearDuplicateDetector()
+    texts = ["Good app", "good app!!", "Good app 👍", "good bank", "very good", "very good app"]
+    clusters = detector.assign(["CBE"] * len(texts), texts)
+    assert clusters == [0, 0, 0, 1, 2, 3]
+    assert detector.sizes == [3, 1, 1, 1]
+
+def test_clusters_stay_within_bank_and_span_calls():
+    """Test that banks are clustered separately and clusters persist across chunks."""
+    detector = NearDuplicateDetector()
+    assert detector.assign(["CBE", "BOA"], ["Good app", "good app"]) == [0, 1]
+    assert detector.assign(["BOA"], ["GOOD APP!!!"]) == [1]
+
+def test_invalid_banding_is_rejected():
+    """Test that the signature must split into whole bands."""
+    with pytest.raises(ValueError):
+        NearDuplicateDetector(num_perm=30, bands=8)
+
+def test_collapse_keeps_first_review_per_cluster():
+    """Test flag and collapse modes."""
+    df = pd.DataFrame({
+        "review": ["Good app", "transfer failed", "good app!!", "Transfer failed."],
+        "bank": ["CBE"] * 4
+    })
+    flagged = cluster_near_duplicates(df)
+    assert list(flagged["cluster_id"]) == [0, 1, 0, 1]
+    collapsed = cluster_near_duplicates(df, collapse=True)
+    assert list(collapsed["review"]) == ["Good app", "transfer failed"]
+    assert list(collapsed["cluster_size"]) == [2, 2]
+
+def test_collapse_counts_cluster_size_per_frame(caplog):
+    """Test that clusters spanning frames warn and keep their full size on the detector."""
+    detector = NearDuplicateDetector()
+    first = pd.DataFrame({"review": ["Good app", "good app!!"], "bank": ["CBE"] * 2})
+    second = pd.DataFrame({"review": ["GOOD APP", "transfer failed"], "bank": ["CBE"] * 2})
+    collapsed = cluster_near_duplicates(first, detector, collapse=True)
+    assert list(collapsed["cluster_size"]) == [2]
+    with caplog.at_level("WARNING"):
+        collapsed = cluster_near_duplicates(second, detector, collapse=True)
+    assert list(collapsed["review"]) == ["transfer failed"]
+    assert "1 reviews joined clusters of earlier frames" in caplog.text
+    assert detector.sizes == [3, 1]
+
+@pytest.mark.parametrize("empty", ["", "   "])
+def test_empty_reviews_get_a_signature(empty):
+    """Test that reviews normalizing to nothing are clustered, last or not."""
+    detector = NearDuplicateDetector()
+    assert detector.assign(["CBE"] * 3, ["Good app", "bad app", empty]) == [0, 1, 2]
+    assert detector.assign(["CBE"] * 3, [empty, "good app!!", "\t"]) == [2, 0, 2]
+    signatures = detector.signatures(["Good app", empty, "bad app"])
+    assert (signatures[0] == detector.signatures(["Good app"])[0]).all()
+    assert (signatures[1] == detector.signatures([" "])[0]).all()
+    assert (signatures[2] == detector.signatures(["bad app"])[0]).all()
@@ -65,4 +65,22 @@ def test_preprocess_reviews_missing_reviews(mock_input_csv, output_dir):
     df = pd.read_csv(output_path)
     assert not df["review"].isna().any(), "Missing reviews not handled"
     assert all(df["review"] != ""), "Empty reviews not handled"
-    assert "No review text" in df["review"].values, "Missing reviews not replaced with 'No review text'"
\ No newline at end of file
+    assert "No review text" in df["review"].values, "Missing reviews not replaced with 'No review text'"
+
+def test_preprocess_reviews_language(tmp_path, output_dir):
+    """Test that detect_language tags every review with its language."""
+    from scripts.preprocessing.preprocess_reviews import preprocess_reviews
+    data = [
+        {"review": "Love the app", "rating": 5, "date": "2023-10-15", "bank": "CBE", "source": "Google Play"},
+        {"review": "በጣም ጥሩ ነው", "rating": 5, "date": "2023-10-15", "bank": "CBE", "source": "Google Play"},
+        {"review": "betam mirt nw", "rating": 4, "date": "2023-10-16", "bank": "BOA", "source": "Google Play"},
+        {"review": "👍👍", "rating": 5, "date": "2023-10-17", "bank": "Dashen", "source": "Google Play"}
+    ]
+    input_path = tmp_path / "mixed_reviews.csv"
+    pd.DataFrame(data).to_csv(input_path, index=False)
+    output_path = output_dir / "reviews_cleaned.csv"
+    preprocess_reviews(input_path, output_path, detect_language=True)
+
+    df = pd.read_csv(output_path)
+    assert list(df.columns) == ["review", "rating", "date", "bank", "source", "language"]
+    assert list(df["language"]) == ["en", "am", "am-latn", "und"]